@@ -1,10 +1,8 @@
-import json
-import os
-import requests
+from task.app.client import DialClient
 from task.models.conversation import Conversation
 from task.models.message import Message
 from task.models.role import Role
-from task.constants import API_KEY, DEFAULT_MODEL, DEFAULT_SYSTEM_PROMPT, DIAL_ENDPOINT
+from task.constants import DEFAULT_MODEL, DEFAULT_SYSTEM_PROMPT, DIAL_ENDPOINT
 
 USER_MESSAGE = "Why is the snow white?"
 
@@ -14,59 +12,36 @@ def run(
     print_only_content: bool = False,
     **kwargs
 ):
-    endpoint = DIAL_ENDPOINT.format(model=deployment_name)
-    
+    client = DialClient(
+        endpoint=DIAL_ENDPOINT,
+        deployment_name=deployment_name,
+    )
+
     conversation = Conversation()
     conversation.add_message(Message(Role.SYSTEM, DEFAULT_SYSTEM_PROMPT))
     conversation.add_message(Message(Role.USER, USER_MESSAGE))
 
-    request_data = {
-        "messages": [msg.to_dict() for msg in conversation.get_messages()],
-        **kwargs,
-    }
-    headers = {
-        "api-key": API_KEY,
-        "Content-Type": "application/json"
-    }
-    
-    response = requests.post(url=endpoint, headers=headers, json=request_data, timeout=60)
+    result = client.get_completions(
+        messages=conversation.get_messages(),
+        print_request=print_request,
+        print_only_content=print_only_content,
+        **kwargs
+    )
 
-    if response.status_code == 200:
-        data = response.json()
-        choices = data.get("choices", [])
-        
-        if choices:
-            n = kwargs.get("n", 1)
-            
-            print("\n" + "="*50 + " RESPONSE " + "="*50)
-            if print_only_content:
-                for choice in choices:
-                    content = choice.get("message", {}).get("content", "")
-                    print(content)
-            else:
-                print(json.dumps(data, indent=2, sort_keys=True))
-            print("="*108)
-            
-            messages = []
-            for choice in choices:
-                content = choice.get("message", {}).get("content", "")
-                messages.append(Message(Role.AI, content))
-            
-            return {
-                "model": deployment_name,
-                "n": n,
-                "choices": [
-                    {
-                        "index": i,
-                        "role": msg.role.value,
-                        "content": msg.content
-                    }
-                    for i, msg in enumerate(messages)
-                ]
+    return {
+        "model": deployment_name,
+        "n": kwargs.get("n", 1),
+        "choices": [
+            {
+                "index": choice.index,
+                "role": choice.message.role.value,
+                "content": choice.message.content,
+                "finish_reason": choice.finish_reason,
             }
-        raise ValueError("No Choice has been present in the response")
-    else:
-        raise Exception(f"HTTP {response.status_code}: {response.text}")
+            for choice in result.choices
+        ],
+        "usage": result.usage,
+    }
 
 if __name__ == "__main__":
     model = DEFAULT_MODEL
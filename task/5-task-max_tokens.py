@@ -11,6 +11,7 @@ def run(
         max_tokens: int = 0,
         print_request: bool = True,
         print_only_content: bool = False,
+        stream: bool = True,
         **kwargs
 ) -> None:
     client = DialClient(
@@ -21,11 +22,16 @@ def run(
     conversation.add_message(Message(Role.SYSTEM, DEFAULT_SYSTEM_PROMPT))
     conversation.add_message(Message(Role.USER, USER_MESSAGE))
 
+    if stream:
+        # Enforce the budget locally as well, so providers that overshoot max_tokens are cut off
+        kwargs.setdefault("token_budget", max_tokens or None)
+
     return client.get_completion(
         max_tokens=max_tokens,
         messages=conversation.get_messages(),
         print_request=print_request,
         print_only_content=print_only_content,
+        stream=stream,
         **kwargs
     )
 
@@ -10,6 +10,7 @@ def run(
         deployment_name: str,
         print_request: bool = True,
         print_only_content: bool = False,
+        stream: bool = True,
         **kwargs
 ) -> None:
     client = DialClient(
@@ -24,6 +25,7 @@ def run(
         messages=conversation.get_messages(),
         print_request=print_request,
         print_only_content=print_only_content,
+        stream=stream,
         **kwargs
     )
 
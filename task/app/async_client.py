@@ -0,0 +1,168 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Iterable
+
+from task.app.client import DialClient
+from task.app.observers import ClientObserver
+from task.app.streaming import CompletionStream
+from task.app.router import Router
+from task.app.scheduler import Priority
+from task.app.transport import DEFAULT_POOL_MAXSIZE
+from task.models.message import Message
+
+
+_EXHAUSTED = object()
+
+
+class AsyncCompletionStream:
+    """Async iterator over a CompletionStream; each chunk is read on the client's worker pool."""
+
+    def __init__(self, stream: CompletionStream, executor: ThreadPoolExecutor):
+        self.stream = stream
+        self._executor = executor
+        self._deltas = iter(stream)
+
+    def __aiter__(self) -> "AsyncCompletionStream":
+        return self
+
+    async def __anext__(self) -> str:
+        loop = asyncio.get_running_loop()
+        delta = await loop.run_in_executor(self._executor, next, self._deltas, _EXHAUSTED)
+        if delta is _EXHAUSTED:
+            raise StopAsyncIteration
+        return delta
+
+    async def aclose(self) -> None:
+        try:
+            self._deltas.close()
+        except ValueError:
+            # a chunk is being read on a worker thread; closing the stream below interrupts it
+            pass
+        self.stream.close()
+
+    async def __aenter__(self) -> "AsyncCompletionStream":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.aclose()
+
+    @property
+    def message(self) -> Message:
+        return self.stream.message
+
+
+@dataclass
+class CompletionRequest:
+    messages: list[Message]
+    params: dict[str, Any] = field(default_factory=dict)
+    print_request: bool = False
+    print_only_content: bool = True
+
+
+class AsyncDialClient:
+    """
+    asyncio front-end for DialClient.
+
+    Each completion runs on a worker thread that borrows a keep-alive connection from
+    the shared host pool, so awaiting many completions at once overlaps their network
+    time instead of adding it up. `max_workers` caps how many requests can be on the
+    wire at the same time; the host pool is grown to at least that size.
+    """
+
+    def __init__(
+            self,
+            endpoint: str,
+            deployment_name: str | Router,
+            max_workers: int = DEFAULT_POOL_MAXSIZE,
+            pool_maxsize: int | None = None,
+            idle_timeout: float | None = None,
+            timeout: float = 60,
+            priority: Priority = Priority.DEFAULT,
+            observers: list[ClientObserver] | None = None,
+    ):
+        self._client = DialClient(
+            endpoint=endpoint,
+            deployment_name=deployment_name,
+            pool_maxsize=max(pool_maxsize or 0, max_workers),
+            idle_timeout=idle_timeout,
+            timeout=timeout,
+            priority=priority,
+            observers=observers,
+        )
+        self._max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dial")
+
+    async def get_completion(
+            self, messages: list[Message],
+            print_request: bool,
+            print_only_content: bool,
+            **kwargs
+    ) -> Message:
+        """Await a completion. Same arguments and result as `DialClient.get_completion`."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor,
+            partial(
+                self._client.get_completion,
+                messages,
+                print_request=print_request,
+                print_only_content=print_only_content,
+                **kwargs
+            ),
+        )
+
+    async def stream_completion(
+            self, messages: list[Message],
+            print_request: bool = False,
+            **kwargs
+    ) -> AsyncCompletionStream:
+        """
+        Send a streaming request and return an async iterator over the content deltas.
+
+        Use it with `async with` (or call `aclose()`) when the stream may be left before its end.
+        """
+        loop = asyncio.get_running_loop()
+        stream = await loop.run_in_executor(
+            self._executor,
+            partial(self._client.stream_completion, messages, print_request=print_request, **kwargs),
+        )
+        return AsyncCompletionStream(stream, self._executor)
+
+    async def gather_completions(
+            self,
+            requests: Iterable[CompletionRequest],
+            max_concurrency: int = 8,
+            return_exceptions: bool = False,
+    ) -> list[Message | BaseException]:
+        """
+        Run many completions concurrently and return the results in input order.
+
+        Args:
+            requests (Iterable[CompletionRequest]): Completions to send
+            max_concurrency (int): Maximum number of requests in flight at once (capped by `max_workers`)
+            return_exceptions (bool): If True, failed requests yield their exception instead of raising
+        """
+        semaphore = asyncio.Semaphore(max(1, min(max_concurrency, self._max_workers)))
+
+        async def _one(request: CompletionRequest) -> Message:
+            async with semaphore:
+                return await self.get_completion(
+                    request.messages,
+                    print_request=request.print_request,
+                    print_only_content=request.print_only_content,
+                    **request.params
+                )
+
+        return await asyncio.gather(*(_one(r) for r in requests), return_exceptions=return_exceptions)
+
+    async def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._client.close()
+
+    async def __aenter__(self) -> "AsyncDialClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
@@ -0,0 +1,130 @@
+import threading
+from concurrent.futures import Future
+from typing import Callable
+
+
+class _Batch:
+    def __init__(self):
+        self.waiters: list[tuple[Future, int]] = []
+        self.total = 0
+        self.full = threading.Event()
+
+
+def split_choices(data: dict, counts: list[int]) -> list[dict]:
+    """
+    Split a multi-choice response into one response per caller.
+
+    Caller i receives the next `counts[i]` choices, re-indexed from 0. The prompt is billed
+    once per batch, so each part reports the full `prompt_tokens` and a share of
+    `completion_tokens` proportional to its number of choices.
+    """
+    choices = sorted(data.get("choices", []), key=lambda c: c.get("index", 0))
+    usage = data.get("usage") or {}
+    total = sum(counts) or 1
+    parts = []
+    offset = 0
+    for count in counts:
+        part_choices = [{**choice, "index": i} for i, choice in enumerate(choices[offset:offset + count])]
+        offset += count
+        part = {**data, "choices": part_choices}
+        if usage:
+            completion_tokens = round(usage.get("completion_tokens", 0) * count / total)
+            part["usage"] = {
+                **usage,
+                "completion_tokens": completion_tokens,
+                "total_tokens": usage.get("prompt_tokens", 0) + completion_tokens,
+            }
+        parts.append(part)
+    return parts
+
+
+def merge_choices(responses: list[dict]) -> dict:
+    """
+    Merge single-choice responses into one OpenAI-shaped multi-choice response.
+
+    Choices are indexed in the order of `responses`, and every numeric `usage` field is
+    summed (each request paid for its own prompt).
+    """
+    first = responses[0]
+    choices = []
+    usage: dict = {}
+    for response in responses:
+        for choice in response.get("choices", [])[:1]:
+            choices.append({**choice, "index": len(choices)})
+        for name, value in (response.get("usage") or {}).items():
+            if isinstance(value, (int, float)):
+                usage[name] = usage.get(name, 0) + value
+    merged = {**first, "choices": choices}
+    if usage:
+        merged["usage"] = usage
+    return merged
+
+
+class RequestBatcher:
+    """
+    Merge concurrent identical requests into a single `n=k` request.
+
+    The first request for a key opens a batch and waits up to `window` seconds (or until
+    `max_batch` choices are requested) for identical requests to join. The batch is then
+    sent once with `n` set to the total number of choices and the choices are handed back
+    to each caller. Only makes sense for deployments that return multiple choices natively.
+    """
+
+    def __init__(self, window: float = 0.02, max_batch: int = 16):
+        self.window = window
+        self.max_batch = max_batch
+        self._open: dict[str, _Batch] = {}
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.requests = 0
+
+    def submit(self, key: str, n: int, send: Callable[[int], dict]) -> dict:
+        """
+        Join (or open) the batch for `key` and return this caller's part of the response.
+
+        Args:
+            key (str): Identity of the request without `n`
+            n (int): Number of choices this caller wants
+            send (Callable[[int], dict]): Sends the request with the given `n` and returns the response JSON
+        """
+        future = Future()
+        with self._lock:
+            batch = self._open.get(key)
+            leader = batch is None
+            if leader:
+                batch = _Batch()
+                self._open[key] = batch
+            batch.waiters.append((future, n))
+            batch.total += n
+            self.requests += 1
+            if batch.total >= self.max_batch:
+                batch.full.set()
+                del self._open[key]
+
+        if leader:
+            batch.full.wait(self.window)
+            with self._lock:
+                if self._open.get(key) is batch:
+                    del self._open[key]
+                self.batches += 1
+            self._dispatch(batch, send)
+        return future.result()
+
+    def _dispatch(self, batch: _Batch, send: Callable[[int], dict]) -> None:
+        try:
+            data = send(batch.total)
+        except BaseException as e:
+            for future, _ in batch.waiters:
+                future.set_exception(e)
+            return
+        parts = split_choices(data, [n for _, n in batch.waiters])
+        for (future, _), part in zip(batch.waiters, parts):
+            future.set_result(part)
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "saved_requests": self.requests - self.batches,
+        }
+
@@ -0,0 +1,267 @@
+"""
+Measure the CPU time, allocations and throughput DialClient spends on a call outside the network.
+
+    python -m task.app.bench [--quick] [--output bench_results.json] [--compare bench_baseline.json]
+
+Every scenario sends the same request repeatedly to a stand-in DIAL server running in a
+child process, so the client thread's CPU time and the traced allocations belong to the
+client alone. Payloads range from 2 to 10k messages and `n` from 1 to 128, each
+silent (no observers), quiet (the default console output) and verbose
+(`print_request=True, print_only_content=False`), printed to /dev/null. `--save`
+writes the results as the new baseline; `--compare` exits with 1 when a scenario got
+slower or allocates more than the baseline plus `--tolerance`.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+
+from task.app.client import DialClient
+from task.models.message import Message
+from task.models.role import Role
+
+DEFAULT_BASELINE_PATH = "bench_baseline.json"
+DEPLOYMENT = "gpt-4o"
+OUTPUTS = ("silent", "quiet", "verbose")
+# metrics compared against the baseline; wall time is left out since it mostly measures the stand-in
+COMPARED_METRICS = ("cpu_ms", "peak_kib")
+
+
+@dataclass(frozen=True)
+class Scenario:
+    messages: int = 2
+    n: int = 1
+    stream: bool = False
+    output: str = "quiet"
+
+    @property
+    def verbose(self) -> bool:
+        return self.output == "verbose"
+
+    @property
+    def name(self) -> str:
+        name = f"messages={self.messages},n={self.n}"
+        if self.stream:
+            name += ",stream"
+        return f"{name},{self.output}"
+
+
+def default_scenarios(quick: bool = False) -> list[Scenario]:
+    sizes = (2, 100) if quick else (2, 100, 1000, 10000)
+    ns = (1, 8) if quick else (1, 8, 32, 128)
+    shapes = [(size, 1) for size in sizes] + [(2, n) for n in ns if n > 1]
+    scenarios = [Scenario(size, n, output=output) for size, n in shapes for output in OUTPUTS]
+    scenarios += [Scenario(stream=True, output=output) for output in ("silent", "quiet")]
+    return scenarios
+
+
+def conversation(size: int, chars: int = 200) -> list[Message]:
+    """`size` alternating user/assistant messages of about `chars` characters each."""
+    text = ("The quick brown fox jumps over the lazy dog. " * (chars // 45 + 1))[:chars]
+    return [Message(Role.USER if i % 2 == 0 else Role.AI, f"{i}: {text}") for i in range(size)]
+
+
+@dataclass
+class BenchResult:
+    name: str
+    calls: int
+    cpu_ms: float
+    wall_ms: float
+    wall_p95_ms: float
+    calls_per_second: float
+    request_kib: float
+    response_kib: float
+    peak_kib: float
+    allocations: int
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _call(client: DialClient, scenario: Scenario, messages: list[Message]) -> str:
+    if scenario.stream:
+        with client.stream_completion(messages, print_request=scenario.verbose, seed=1) as stream:
+            return "".join(stream)
+    result = client.get_completions(
+        messages, print_request=scenario.verbose, print_only_content=not scenario.verbose, n=scenario.n, seed=1
+    )
+    return json.dumps(result.raw)
+
+
+def run_scenario(
+        client: DialClient, scenario: Scenario, min_time: float = 0.3, min_calls: int = 5, max_calls: int = 200
+) -> BenchResult:
+    """
+    Time `scenario` until `min_time` has passed (within `min_calls`..`max_calls` calls), then trace allocations.
+
+    CPU time is that of the calling thread, so time spent waiting for the server is not counted.
+    """
+    messages = conversation(scenario.messages)
+    request_bytes = len(json.dumps([m.to_dict() for m in messages]))
+    cpu, wall = [], []
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        response = _call(client, scenario, messages)
+        started = time.perf_counter()
+        while len(wall) < max_calls and (len(wall) < min_calls or time.perf_counter() - started < min_time):
+            cpu_started, wall_started = time.thread_time(), time.perf_counter()
+            _call(client, scenario, messages)
+            cpu.append(time.thread_time() - cpu_started)
+            wall.append(time.perf_counter() - wall_started)
+        elapsed = time.perf_counter() - started
+        peak, allocations = _trace(client, scenario, messages)
+
+    wall.sort()
+    return BenchResult(
+        name=scenario.name,
+        calls=len(wall),
+        cpu_ms=round(statistics.median(cpu) * 1000, 3),
+        wall_ms=round(statistics.median(wall) * 1000, 3),
+        wall_p95_ms=round(wall[min(len(wall) - 1, int(len(wall) * 0.95))] * 1000, 3),
+        calls_per_second=round(len(wall) / elapsed, 1),
+        request_kib=round(request_bytes / 1024, 1),
+        response_kib=round(len(response) / 1024, 1),
+        peak_kib=round(peak / 1024, 1),
+        allocations=allocations,
+    )
+
+
+def _trace(client: DialClient, scenario: Scenario, messages: list[Message]) -> tuple[int, int]:
+    """Peak traced memory of one call above what was allocated before it, and the blocks it allocated."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        _call(client, scenario, messages)
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    allocations = sum(max(0, stat.count_diff) for stat in after.compare_to(before, "lineno"))
+    return peak, allocations
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextlib.contextmanager
+def standin_process(*args: str):
+    """Run a stand-in DIAL server in a child process (`args` are its CLI options); yields its endpoint."""
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-u", "-m", "task.app.standin", "--port", str(port), *args],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        line = process.stdout.readline()
+        if "listening on" not in line:
+            raise RuntimeError(f"Stand-in did not start: {line!r}")
+        yield line.rsplit(" ", 1)[-1].strip()
+    finally:
+        process.terminate()
+        process.wait(10)
+
+
+def run(endpoint: str, scenarios: list[Scenario], min_time: float = 0.3) -> dict:
+    """Run every scenario against `endpoint` and return the report (with run metadata)."""
+    os.environ.setdefault("DIAL_API_KEY", "bench-key-0123456789")
+    results = []
+    with (
+        DialClient(endpoint=endpoint, deployment_name=DEPLOYMENT, single_flight=None) as console,
+        DialClient(endpoint=endpoint, deployment_name=DEPLOYMENT, single_flight=None, observers=[]) as silent,
+    ):
+        for scenario in scenarios:
+            client = silent if scenario.output == "silent" else console
+            results.append(run_scenario(client, scenario, min_time=min_time).to_dict())
+    return {
+        "meta": {
+            "created": int(time.time()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "commit": _commit(),
+        },
+        "results": results,
+    }
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(report: dict, baseline: dict, tolerance: float = 0.25) -> list[str]:
+    """Regressions of `report` against `baseline`: scenarios whose compared metrics grew by more than `tolerance`."""
+    previous = {result["name"]: result for result in baseline.get("results", [])}
+    regressions = []
+    for result in report["results"]:
+        old = previous.get(result["name"])
+        if old is None:
+            continue
+        for metric in COMPARED_METRICS:
+            if old[metric] > 0 and result[metric] > old[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{result['name']}: {metric} {old[metric]} -> {result[metric]} "
+                    f"(+{(result[metric] / old[metric] - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def format_report(report: dict) -> str:
+    columns = ("cpu_ms", "wall_ms", "wall_p95_ms", "calls_per_second", "request_kib", "response_kib", "peak_kib")
+    width = max(len(result["name"]) for result in report["results"])
+    lines = [f"{'scenario':<{width}}  " + "  ".join(f"{c:>16}" for c in columns)]
+    for result in report["results"]:
+        lines.append(f"{result['name']:<{width}}  " + "  ".join(f"{result[c]:>16}" for c in columns))
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--endpoint", help="Completion URL template of a running stand-in (default: start one)")
+    parser.add_argument("--quick", action="store_true", help="Only the small payloads and n values")
+    parser.add_argument("--min-time", type=float, default=0.3, help="Seconds to spend timing each scenario")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--save", action="store_true", help=f"Write the results as the baseline ({DEFAULT_BASELINE_PATH})")
+    parser.add_argument("--compare", metavar="BASELINE", help="Fail on regressions against this baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    scenarios = default_scenarios(args.quick)
+    if args.endpoint:
+        report = run(args.endpoint, scenarios, args.min_time)
+    else:
+        with standin_process() as endpoint:
+            report = run(endpoint, scenarios, args.min_time)
+    print(format_report(report))
+
+    for path in filter(None, (args.output, DEFAULT_BASELINE_PATH if args.save else None)):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
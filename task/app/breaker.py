@@ -0,0 +1,181 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from enum import StrEnum
+
+from task.app.errors import DialError
+
+
+class BreakerState(StrEnum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(DialError):
+    """The deployment's circuit is open: the call was rejected without touching the network."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"Circuit for '{name}' is open, retry in {retry_in:.1f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+
+@dataclass
+class BreakerConfig:
+    """
+    window: number of most recent calls the rates are computed over
+    min_calls: calls needed in the window before the breaker may open
+    failure_rate_threshold: open when this fraction of the window failed
+    slow_call_threshold: seconds after which a call counts as slow
+    slow_call_rate_threshold: open when this fraction of the window was slow
+    open_duration: seconds to fail fast before letting probe calls through
+    half_open_probes: successful probe calls needed to close the circuit again
+    """
+    window: int = 20
+    min_calls: int = 5
+    failure_rate_threshold: float = 0.5
+    slow_call_threshold: float = 30.0
+    slow_call_rate_threshold: float = 0.8
+    open_duration: float = 30.0
+    half_open_probes: int = 1
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open circuit breaker for one deployment.
+
+    While closed every call goes through and its outcome and latency are recorded in a
+    rolling window. When the failure rate or the slow-call rate crosses its threshold the
+    circuit opens and calls fail at once with CircuitOpenError. After `open_duration`
+    seconds the circuit turns half-open and lets `half_open_probes` calls through; if they
+    succeed it closes, if any of them fails it opens again.
+    """
+
+    def __init__(self, name: str, config: BreakerConfig | None = None):
+        self.name = name
+        self.config = config or BreakerConfig()
+        self.state = BreakerState.CLOSED
+        self._outcomes: deque[tuple[bool, bool]] = deque(maxlen=self.config.window)
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.times_opened = 0
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may be sent now."""
+        with self._lock:
+            if self.state == BreakerState.OPEN:
+                remaining = self._opened_at + self.config.open_duration - time.monotonic()
+                if remaining > 0:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.name, remaining)
+                self.state = BreakerState.HALF_OPEN
+                self._probes_in_flight = 0
+                self._probe_successes = 0
+            if self.state == BreakerState.HALF_OPEN:
+                if self._probes_in_flight >= self.config.half_open_probes:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.name, 0.0)
+                self._probes_in_flight += 1
+
+    def cancel(self) -> None:
+        """Forget a call let through by `before_call` that ended without an outcome (frees its probe slot)."""
+        with self._lock:
+            if self.state == BreakerState.HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def record(self, success: bool, latency: float) -> None:
+        slow = latency >= self.config.slow_call_threshold
+        with self._lock:
+            if self.state == BreakerState.HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if not success or slow:
+                    self._open()
+                    return
+                self._probe_successes += 1
+                if self._probe_successes >= self.config.half_open_probes:
+                    self.state = BreakerState.CLOSED
+                    self._outcomes.clear()
+                return
+            if self.state == BreakerState.OPEN:
+                return
+            self._outcomes.append((success, slow))
+            if len(self._outcomes) < self.config.min_calls:
+                return
+            failure_rate, slow_rate = self._rates()
+            if failure_rate >= self.config.failure_rate_threshold or slow_rate >= self.config.slow_call_rate_threshold:
+                self._open()
+
+    def _open(self) -> None:
+        self.state = BreakerState.OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.times_opened += 1
+
+    def _rates(self) -> tuple[float, float]:
+        total = len(self._outcomes)
+        if not total:
+            return 0.0, 0.0
+        failures = sum(1 for success, _ in self._outcomes if not success)
+        slow = sum(1 for _, is_slow in self._outcomes if is_slow)
+        return failures / total, slow / total
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            failure_rate, slow_rate = self._rates()
+            retry_in = 0.0
+            if self.state == BreakerState.OPEN:
+                retry_in = max(0.0, self._opened_at + self.config.open_duration - time.monotonic())
+            return {
+                "state": self.state.value,
+                "calls_in_window": len(self._outcomes),
+                "failure_rate": round(failure_rate, 3),
+                "slow_call_rate": round(slow_rate, 3),
+                "retry_in": round(retry_in, 2),
+                "rejected": self.rejected,
+                "times_opened": self.times_opened,
+            }
+
+
+class BreakerRegistry:
+    """
+    One CircuitBreaker per deployment endpoint, shared by every client in the process.
+
+    Breakers are keyed by the deployment's completion URL as well as its name, so failures
+    of a deployment behind one proxy never fast-fail calls to the same deployment elsewhere.
+    """
+
+    def __init__(self, config: BreakerConfig | None = None):
+        self.config = config or BreakerConfig()
+        self._breakers: dict[tuple[str, str], CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str, endpoint: str = "") -> CircuitBreaker:
+        """The breaker of deployment `name` at `endpoint`, its completion URL."""
+        with self._lock:
+            breaker = self._breakers.get((endpoint, name))
+            if breaker is None:
+                breaker = CircuitBreaker(name, self.config)
+                self._breakers[(endpoint, name)] = breaker
+            return breaker
+
+    def reset(self) -> None:
+        """Forget every breaker (all deployments start closed again)."""
+        with self._lock:
+            self._breakers.clear()
+
+    def snapshot(self) -> dict[str, dict]:
+        """State of every breaker, for dashboards, keyed by `name @ endpoint` (or the name alone)."""
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {
+            f"{name} @ {endpoint}" if endpoint else name: breaker.snapshot()
+            for (endpoint, name), breaker in breakers.items()
+        }
+
+
+BREAKERS = BreakerRegistry()
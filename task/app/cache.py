@@ -0,0 +1,342 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+
+def key_fingerprint(api_key: str) -> str:
+    """Short hash that tells API keys apart without storing them ("" for no key)."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16] if api_key else ""
+
+
+def cache_key(
+        deployment_name: str, messages: list[dict], params: dict, endpoint: str = "", api_key: str = ""
+) -> str:
+    """
+    Canonical hash of a completion request: deployment, serialized messages and sorted params.
+
+    The `endpoint` URL and a fingerprint of the `api_key` are part of the key, so answers
+    of one proxy or tenant are never served to another.
+    """
+    canonical = json.dumps(
+        {
+            "endpoint": endpoint,
+            "key": key_fingerprint(api_key),
+            "deployment": deployment_name,
+            "messages": messages,
+            "params": params,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def is_deterministic(params: dict) -> bool:
+    """A request is worth caching by default only if it asks for a repeatable answer."""
+    return params.get("seed") is not None or params.get("temperature") == 0
+
+
+class MemoryCache:
+    """In-process LRU tier with an optional time-to-live in seconds."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float | None = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created, value = entry
+            if self.ttl is not None and time.time() - created > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: dict, created: float | None = None) -> None:
+        with self._lock:
+            self._entries[key] = (created or time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskCache:
+    """
+    On-disk tier: one JSON file per response under `directory`.
+
+    Files older than `ttl` seconds are ignored and removed; when the directory grows past
+    `max_bytes` the least recently used files (by mtime, refreshed on every hit) are deleted.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 100 * 1024 * 1024, ttl: float | None = 7 * 24 * 3600):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._size = sum(entry.stat().st_size for entry in self._entries())
+
+    def _entries(self) -> list[os.DirEntry]:
+        return [e for e in os.scandir(self.directory) if e.is_file() and e.name.endswith(".json")]
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> tuple[float, dict] | None:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if self.ttl is not None and time.time() - entry["created"] > self.ttl:
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry["created"], entry["value"]
+
+    def set(self, key: str, value: dict, created: float | None = None) -> None:
+        payload = json.dumps({"created": created or time.time(), "value": value}, ensure_ascii=False)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._size += len(payload.encode("utf-8"))
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries(), key=lambda e: e.stat().st_mtime)
+        self._size = sum(e.stat().st_size for e in entries)
+        for entry in entries:
+            if self._size <= self.max_bytes * 0.9:
+                break
+            self._size -= entry.stat().st_size
+            self._remove(entry.path)
+
+    def _remove(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def clear(self) -> None:
+        with self._lock:
+            for entry in self._entries():
+                self._remove(entry.path)
+            self._size = 0
+
+
+class SQLiteCache:
+    """
+    Cache tier in a SQLite database that several processes can share.
+
+    The database runs in WAL mode so readers never block the writer, and responses are
+    written with an atomic insert-if-absent. Besides the responses it keeps in-flight
+    markers: the first process to `claim` a key sends the request, the others `wait`
+    for its result instead of sending the same request again. A marker older than
+    `inflight_timeout` seconds is considered abandoned (its owner crashed) and can be
+    claimed again.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            ttl: float | None = 7 * 24 * 3600,
+            inflight_timeout: float = 120.0,
+            poll_interval: float = 0.05,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.inflight_timeout = inflight_timeout
+        self.poll_interval = poll_interval
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, created REAL, value TEXT)")
+        conn.execute("CREATE TABLE IF NOT EXISTS inflight (key TEXT PRIMARY KEY, owner TEXT, started REAL)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> tuple[float, dict] | None:
+        row = self._connection().execute(
+            "SELECT created, value FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        created, value = row
+        if self.ttl is not None and time.time() - created > self.ttl:
+            self._connection().execute("DELETE FROM responses WHERE key = ? AND created = ?", (key, created))
+            return None
+        return created, json.loads(value)
+
+    def set(self, key: str, value: dict, created: float | None = None) -> None:
+        created = created or time.time()
+        payload = json.dumps(value, ensure_ascii=False)
+        conn = self._connection()
+        if self.ttl is not None:
+            conn.execute("DELETE FROM responses WHERE key = ? AND created < ?", (key, created - self.ttl))
+        conn.execute("INSERT OR IGNORE INTO responses (key, created, value) VALUES (?, ?, ?)", (key, created, payload))
+
+    def claim(self, key: str) -> bool:
+        """Mark the key as in flight. Returns False if another live process already owns it."""
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM inflight WHERE key = ? AND started < ?", (key, now - self.inflight_timeout))
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO inflight (key, owner, started) VALUES (?, ?, ?)",
+                (key, f"{os.getpid()}:{threading.get_ident()}", now),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return cursor.rowcount == 1
+
+    def release(self, key: str) -> None:
+        self._connection().execute(
+            "DELETE FROM inflight WHERE key = ? AND owner = ?", (key, f"{os.getpid()}:{threading.get_ident()}")
+        )
+
+    def wait(self, key: str) -> tuple[float, dict] | None:
+        """Wait for another process to store the key. Returns None if its marker goes away without a result."""
+        conn = self._connection()
+        deadline = time.monotonic() + self.inflight_timeout
+        while time.monotonic() < deadline:
+            entry = self.get(key)
+            if entry is not None:
+                return entry
+            if conn.execute("SELECT 1 FROM inflight WHERE key = ?", (key,)).fetchone() is None:
+                return self.get(key)
+            time.sleep(self.poll_interval)
+        return None
+
+    def clear(self) -> None:
+        conn = self._connection()
+        conn.execute("DELETE FROM responses")
+        conn.execute("DELETE FROM inflight")
+
+
+class ResponseCache:
+    """
+    Two-tier cache of raw completion responses used by DialClient.
+
+    Only requests accepted by `policy` (by default: `seed` set or `temperature == 0`) are
+    looked up and stored; everything else bypasses the cache unless `cache_nondeterministic`
+    is set. Disk hits are promoted to the memory tier. With a SQLiteCache as the disk tier,
+    identical requests issued by several processes at once are sent only once.
+    """
+
+    def __init__(
+            self,
+            memory: MemoryCache | None = None,
+            disk: DiskCache | SQLiteCache | None = None,
+            policy: Callable[[dict], bool] = is_deterministic,
+            cache_nondeterministic: bool = False,
+    ):
+        self.memory = memory if memory is not None else MemoryCache()
+        self.disk = disk
+        self.policy = policy
+        self.cache_nondeterministic = cache_nondeterministic
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.shared_waits = 0
+        self._lock = threading.Lock()
+
+    def cacheable(self, params: dict) -> bool:
+        return self.cache_nondeterministic or self.policy(params)
+
+    def get(self, key: str) -> dict | None:
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            entry = self.disk.get(key)
+            if entry is not None:
+                created, value = entry
+                self.memory.set(key, value, created)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def get_or_load(self, key: str, load: Callable[[], dict]) -> dict:
+        """Return the cached value, or call `load` once (across processes, if the tier supports it) and store it."""
+        value = self.get(key)
+        if value is not None:
+            return value
+        claim = getattr(self.disk, "claim", None)
+        if claim is None:
+            value = load()
+            self.set(key, value)
+            return value
+        # the owner can go away without a result (or its marker expire); only the next claim wins then
+        while not claim(key):
+            entry = self.disk.wait(key)
+            if entry is not None:
+                created, value = entry
+                self.memory.set(key, value, created)
+                with self._lock:
+                    self.shared_waits += 1
+                return value
+        try:
+            value = load()
+            self.set(key, value)
+            return value
+        finally:
+            self.disk.release(key)
+
+    def set(self, key: str, value: dict) -> None:
+        created = time.time()
+        self.memory.set(key, value, created)
+        if self.disk is not None:
+            self.disk.set(key, value, created)
+
+    def record_bypass(self) -> None:
+        with self._lock:
+            self.bypasses += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "shared_waits": self.shared_waits,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "memory_entries": len(self.memory),
+        }
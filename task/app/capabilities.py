@@ -0,0 +1,194 @@
+import json
+import os
+import re
+from dataclasses import asdict, dataclass, field
+from enum import StrEnum
+from typing import Any
+
+from task.app.errors import DialError
+
+NATIVE_N_PREFIXES = ("gpt-", "o1", "o3", "o4")
+OPENAI_ONLY_PARAMS = frozenset({"n", "seed", "frequency_penalty", "presence_penalty", "logit_bias", "logprobs"})
+
+_VERSION_SUFFIX = re.compile(r"(-\d{4}-\d{2}-\d{2}|-\d{8}(-v\d+:\d+)?|-v\d+(:\d+)?|@.*)$")
+_VENDOR_PREFIXES = {
+    "gpt-": "openai",
+    "o1": "openai",
+    "o3": "openai",
+    "o4": "openai",
+    "text-embedding": "openai",
+    "anthropic.": "anthropic",
+    "claude": "anthropic",
+    "gemini": "google",
+    "deepseek": "deepseek",
+}
+
+
+def supports_n(deployment_name: str) -> bool:
+    """
+    Whether a deployment returns several choices for `n > 1` in one response.
+
+    OpenAI deployments do; Anthropic and Google deployments behind DIAL answer with a
+    single choice whatever `n` is.
+    """
+    return deployment_name.lower().startswith(NATIVE_N_PREFIXES)
+
+
+def supports_param(deployment_name: str, param: str) -> bool:
+    """Whether a deployment honours `param` natively (OpenAI-only params are ignored elsewhere)."""
+    if param not in OPENAI_ONLY_PARAMS:
+        return True
+    return vendor(deployment_name) == "openai"
+
+
+def model_family(deployment_name: str) -> str:
+    """Deployment name without its version/date suffix: `gpt-4o-2024-08-06` -> `gpt-4o`."""
+    return _VERSION_SUFFIX.sub("", deployment_name.lower())
+
+
+def vendor(deployment_name: str) -> str | None:
+    name = deployment_name.lower()
+    for prefix, vendor_name in _VENDOR_PREFIXES.items():
+        if name.startswith(prefix):
+            return vendor_name
+    return None
+
+
+MATRIX_VERSION = 1
+DEFAULT_MATRIX_PATH = "capabilities.json"
+
+# params DialClient can emulate when a deployment does not honour them
+EMULATED_PARAMS = frozenset({"n", "stop"})
+
+
+class CapabilityPolicy(StrEnum):
+    FAIL = "fail"
+    ADAPT = "adapt"
+
+
+@dataclass
+class ParamCapability:
+    """
+    supported: the deployment accepted the param
+    minimum / maximum: smallest and largest probed value it accepted, for numeric params
+    native: for `n`, whether several choices came back in one response
+    """
+    supported: bool
+    minimum: float | None = None
+    maximum: float | None = None
+    native: bool = True
+
+    def to_dict(self) -> dict:
+        return {k: v for k, v in asdict(self).items() if v is not None}
+
+
+@dataclass
+class Violation:
+    param: str
+    value: Any
+    reason: str
+    fix: str | None = None
+
+
+class UnsupportedParameterError(DialError):
+    """The request uses params the deployment is known to reject; nothing was sent."""
+
+    def __init__(self, deployment_name: str, violations: list[Violation]):
+        details = "; ".join(f"{v.param}={v.value!r}: {v.reason}" for v in violations)
+        super().__init__(f"'{deployment_name}' would reject the request: {details}")
+        self.deployment_name = deployment_name
+        self.violations = violations
+
+
+@dataclass
+class CapabilityMatrix:
+    """
+    Which params every deployment accepts, as found by `python -m task.app.probe`.
+
+    Deployments and params that were not probed are unknown and never cause a violation.
+    The JSON file carries a `version`; files written in another format are ignored.
+    """
+    deployments: dict[str, dict[str, ParamCapability]] = field(default_factory=dict)
+    probed_at: float | None = None
+    version: int = MATRIX_VERSION
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_MATRIX_PATH) -> "CapabilityMatrix":
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls()
+        if data.get("version") != MATRIX_VERSION:
+            return cls()
+        return cls(
+            deployments={
+                name: {param: ParamCapability(**capability) for param, capability in params.items()}
+                for name, params in data.get("deployments", {}).items()
+            },
+            probed_at=data.get("probed_at"),
+        )
+
+    def save(self, path: str = DEFAULT_MATRIX_PATH) -> None:
+        payload = {
+            "version": self.version,
+            "probed_at": self.probed_at,
+            "deployments": {
+                name: {param: capability.to_dict() for param, capability in sorted(params.items())}
+                for name, params in sorted(self.deployments.items())
+            },
+        }
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def get(self, deployment_name: str, param: str) -> ParamCapability | None:
+        return self.deployments.get(deployment_name, {}).get(param)
+
+    def supports(self, deployment_name: str, param: str) -> bool | None:
+        """Whether the deployment accepts `param`, or None when it was not probed."""
+        capability = self.get(deployment_name, param)
+        return capability.supported if capability is not None else None
+
+    def native_n(self, deployment_name: str) -> bool | None:
+        capability = self.get(deployment_name, "n")
+        return capability.supported and capability.native if capability is not None else None
+
+    def violations(self, deployment_name: str, request_data: dict) -> list[Violation]:
+        """Params of `request_data` the deployment is known to reject, with how each can be fixed."""
+        found = []
+        for param, value in request_data.items():
+            capability = self.get(deployment_name, param)
+            if capability is None or value is None:
+                continue
+            if not capability.supported:
+                fix = "emulate" if param in EMULATED_PARAMS else "drop"
+                found.append(Violation(param, value, "not supported", fix))
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                if capability.minimum is not None and value < capability.minimum:
+                    found.append(Violation(param, value, f"below minimum {capability.minimum}", "clamp"))
+                elif capability.maximum is not None and value > capability.maximum:
+                    found.append(Violation(param, value, f"above maximum {capability.maximum}", "clamp"))
+        return found
+
+    def adapt(self, deployment_name: str, request_data: dict) -> tuple[dict, list[Violation]]:
+        """
+        Return a copy of `request_data` the deployment accepts, and the violations that were fixed.
+
+        Unsupported params are dropped and out-of-range values clamped; the client emulates a
+        dropped `stop` by trimming the content at the stop sequence. An unsupported `n` is kept:
+        the client sends `n` separate requests in its place, which only works for complete
+        responses, so streams with it are rejected.
+        """
+        found = self.violations(deployment_name, request_data)
+        adapted = dict(request_data)
+        for violation in found:
+            if violation.fix == "clamp":
+                capability = self.get(deployment_name, violation.param)
+                low = capability.minimum if capability.minimum is not None else violation.value
+                high = capability.maximum if capability.maximum is not None else violation.value
+                adapted[violation.param] = min(max(violation.value, low), high)
+            elif violation.param != "n":
+                adapted.pop(violation.param)
+        return adapted, found
@@ -0,0 +1,278 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from enum import StrEnum
+from typing import Callable, Iterator
+from urllib.parse import urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from task.app.errors import DialError
+
+# params that do not change which recording a fuzzy match picks
+FUZZY_IGNORED_PARAMS = frozenset({"seed", "temperature", "top_p", "user", "stream_options"})
+_WHITESPACE = re.compile(r"\s+")
+
+
+class CassetteMode(StrEnum):
+    RECORD = "record"
+    REPLAY = "replay"
+    AUTO = "auto"
+
+
+class MatchMode(StrEnum):
+    EXACT = "exact"
+    FUZZY = "fuzzy"
+
+
+class CassetteMissError(DialError):
+    """Replay found no recording for the request."""
+
+
+def _canonical(value) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def exact_key(path: str, request_data: dict) -> str:
+    return hashlib.sha256(_canonical([path, request_data]).encode("utf-8")).hexdigest()
+
+
+def fuzzy_key(path: str, request_data: dict) -> str:
+    """Deployment path and messages with whitespace and case normalised."""
+    messages = [
+        [m.get("role"), _WHITESPACE.sub(" ", (m.get("content") or "")).strip().lower()]
+        for m in request_data.get("messages", [])
+    ]
+    return hashlib.sha256(_canonical([path, messages, bool(request_data.get("stream"))]).encode("utf-8")).hexdigest()
+
+
+class _RecordingRaw:
+    """Wraps a streamed urllib3 response and notes every chunk with its offset from the request start."""
+
+    def __init__(self, raw, started: float, on_done: Callable[[list], None]):
+        self._raw = raw
+        self._started = started
+        self._on_done = on_done
+        self._chunks: list[list] = []
+        self._done = False
+
+    def stream(self, amt=None, decode_content=True) -> Iterator[bytes]:
+        for chunk in self._raw.stream(amt, decode_content=decode_content):
+            # latin-1 maps bytes 1:1, so a multi-byte character split across chunks survives the round trip
+            self._chunks.append([round(time.perf_counter() - self._started, 4), chunk.decode("latin-1")])
+            yield chunk
+        self._finish()
+
+    def close(self) -> None:
+        self._raw.close()
+        self._finish()
+
+    def _finish(self) -> None:
+        if not self._done:
+            self._done = True
+            self._on_done(self._chunks)
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+
+class _ReplayRaw:
+    """Plays recorded chunks back, optionally at their original pace."""
+
+    def __init__(self, chunks: list[list], replay_latency: bool, started: float):
+        self._chunks = chunks
+        self._replay_latency = replay_latency
+        self._started = started
+        self._closed = False
+
+    def stream(self, amt=None, decode_content=True) -> Iterator[bytes]:
+        for offset, text in self._chunks:
+            if self._closed:
+                return
+            if self._replay_latency:
+                delay = offset - (time.perf_counter() - self._started)
+                if delay > 0:
+                    time.sleep(delay)
+            yield text.encode("latin-1")
+
+    def close(self) -> None:
+        self._closed = True
+
+
+class Cassette:
+    """
+    Recorded DIAL responses, one JSON line per request, keyed by deployment path and request body.
+
+    In RECORD mode every request goes to the server and its response is appended to
+    `path`; streamed responses are saved chunk by chunk with their arrival offsets once
+    the caller has read them. In REPLAY mode responses come from memory and nothing is
+    sent - a request without a recording raises CassetteMissError. AUTO replays what it
+    can and records the rest. Several recordings of the same request are played in turn,
+    so repeated random calls still differ. FUZZY matching ignores whitespace, case and
+    sampling params. With `replay_latency` the original time to first byte and chunk
+    timing are reproduced.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            mode: CassetteMode = CassetteMode.REPLAY,
+            match: MatchMode = MatchMode.EXACT,
+            replay_latency: bool = False,
+    ):
+        self.path = path
+        self.mode = mode
+        self.match = match
+        self.replay_latency = replay_latency
+        self._exact: dict[str, list[dict]] = {}
+        self._fuzzy: dict[str, list[dict]] = {}
+        self._turns: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.recorded = 0
+        self._load()
+
+    @classmethod
+    def from_env(cls) -> "Cassette | None":
+        """
+        The cassette configured by `DIAL_CASSETTE` (path), `DIAL_CASSETTE_MODE`,
+        `DIAL_CASSETTE_MATCH` and `DIAL_CASSETTE_LATENCY=1`; one instance per path and process.
+        """
+        path = os.getenv("DIAL_CASSETTE")
+        if not path:
+            return None
+        with _ENV_LOCK:
+            cassette = _ENV_CASSETTES.get(path)
+            if cassette is None:
+                cassette = cls(
+                    path,
+                    mode=CassetteMode(os.getenv("DIAL_CASSETTE_MODE", CassetteMode.REPLAY)),
+                    match=MatchMode(os.getenv("DIAL_CASSETTE_MATCH", MatchMode.EXACT)),
+                    replay_latency=os.getenv("DIAL_CASSETTE_LATENCY") == "1",
+                )
+                _ENV_CASSETTES[path] = cassette
+            return cassette
+
+    @property
+    def needs_api_key(self) -> bool:
+        return self.mode != CassetteMode.REPLAY
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self._index(json.loads(line))
+        except FileNotFoundError:
+            pass
+
+    def _index(self, entry: dict) -> None:
+        self._exact.setdefault(exact_key(entry["path"], entry["request"]), []).append(entry)
+        self._fuzzy.setdefault(fuzzy_key(entry["path"], entry["request"]), []).append(entry)
+
+    def post(
+            self,
+            send: Callable[[], requests.Response],
+            endpoint: str,
+            request_data: dict,
+            stream: bool = False,
+    ) -> requests.Response:
+        """Serve the request from the cassette, or call `send` and record its response, depending on the mode."""
+        path = urlsplit(endpoint).path
+        if self.mode != CassetteMode.RECORD:
+            entry = self.find(path, request_data)
+            if entry is not None:
+                return self._replay(entry, endpoint)
+            if self.mode == CassetteMode.REPLAY:
+                raise CassetteMissError(f"No recording for {path} in {self.path}")
+        return self._record(send, path, request_data, stream)
+
+    def find(self, path: str, request_data: dict) -> dict | None:
+        with self._lock:
+            if self.match == MatchMode.EXACT:
+                key = exact_key(path, request_data)
+                entries = self._exact.get(key)
+            else:
+                key = fuzzy_key(path, request_data)
+                entries = self._closest(self._fuzzy.get(key), request_data)
+            if not entries:
+                return None
+            turn = self._turns.get(key, 0)
+            self._turns[key] = turn + 1
+            self.hits += 1
+            return entries[turn % len(entries)]
+
+    @staticmethod
+    def _closest(entries: list[dict] | None, request_data: dict) -> list[dict]:
+        """Recordings whose non-sampling params agree most with the request."""
+        if not entries:
+            return []
+
+        def score(entry: dict) -> int:
+            recorded = entry["request"]
+            params = (set(recorded) | set(request_data)) - FUZZY_IGNORED_PARAMS - {"messages"}
+            return sum(1 for p in params if recorded.get(p) == request_data.get(p))
+
+        best = max(score(entry) for entry in entries)
+        return [entry for entry in entries if score(entry) == best]
+
+    def _replay(self, entry: dict, endpoint: str) -> requests.Response:
+        started = time.perf_counter()
+        if self.replay_latency and entry.get("latency"):
+            time.sleep(entry["latency"])
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.headers = CaseInsensitiveDict(entry.get("headers", {}))
+        response.url = endpoint
+        response.encoding = "utf-8"
+        if "chunks" in entry:
+            response.raw = _ReplayRaw(entry["chunks"], self.replay_latency, started)
+        else:
+            response._content = entry.get("body", "").encode("utf-8")
+            response._content_consumed = True
+        return response
+
+    def _record(
+            self, send: Callable[[], requests.Response], path: str, request_data: dict, stream: bool
+    ) -> requests.Response:
+        started = time.perf_counter()
+        response = send()
+        entry = {
+            "path": path,
+            "request": request_data,
+            "status": response.status_code,
+            "headers": {k: v for k, v in response.headers.items() if k.lower() != "set-cookie"},
+            "latency": round(time.perf_counter() - started, 4),
+        }
+        if stream and response.status_code == 200:
+            response.raw = _RecordingRaw(response.raw, started, lambda chunks: self._append({**entry, "chunks": chunks}))
+        else:
+            self._append({**entry, "body": response.text})
+        return response
+
+    def _append(self, entry: dict) -> None:
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self._index(entry)
+            self.recorded += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "mode": self.mode.value,
+                "recordings": sum(len(entries) for entries in self._exact.values()),
+                "hits": self.hits,
+                "recorded": self.recorded,
+            }
+
+
+_ENV_CASSETTES: dict[str, Cassette] = {}
+_ENV_LOCK = threading.Lock()
@@ -1,25 +1,231 @@
-import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable
 
 import requests
 
+from task.app.batching import RequestBatcher, merge_choices
+from task.app.breaker import BREAKERS, BreakerRegistry, CircuitBreaker
+from task.app.cassette import Cassette
+from task.app.cache import ResponseCache, cache_key, is_deterministic
+from task.app.capabilities import (
+    CapabilityMatrix,
+    CapabilityPolicy,
+    UnsupportedParameterError,
+    Violation,
+    supports_n,
+)
+from task.app.coalescing import INFLIGHT, SingleFlight
+from task.app.concurrency import AdaptiveLimiter, ConcurrencyRegistry
+from task.app.errors import DialHTTPError
+from task.app.observers import (
+    ClientObserver,
+    ConsoleObserver,
+    ErrorEvent,
+    RequestEvent,
+    ResponseEvent,
+    RetryEvent,
+    notify,
+)
+from task.app.ratelimit import (
+    RATE_LIMITS,
+    RateLimitRegistry,
+    Reservation,
+    estimate_prompt_tokens,
+    estimate_request_tokens,
+)
+from task.app.retry import RetryBudget, RetryPolicy
+from task.app.router import Router
+from task.app.scheduler import SCHEDULER, Priority, Scheduler
+from task.app.streaming import CLIENT_STOP, CompletionStream
+from task.app.transport import POOLS, HostPool
+from task.models.completion import Choice, CompletionResult
 from task.models.message import Message
-from task.models.role import Role
+
+# options of `stream_completion` that are not request params; calls without streaming ignore them
+STREAM_OPTIONS = ("token_budget", "client_stop")
+
+
+@dataclass
+class _Deployment:
+    """Everything a request needs to know about the deployment it is sent to."""
+    name: str
+    endpoint: str
+    breaker: CircuitBreaker | None
+    concurrency: AdaptiveLimiter | None
+    native_n: bool
 
 
 class DialClient:
     _endpoint: str
     _api_key: str
+    _pool: HostPool | None
 
-    def __init__(self, endpoint: str, deployment_name: str):
+    def __init__(
+            self,
+            endpoint: str,
+            deployment_name: str | Router,
+            pool_maxsize: int | None = None,
+            idle_timeout: float | None = None,
+            timeout: float = 60,
+            cache: ResponseCache | None = None,
+            single_flight: SingleFlight | None = INFLIGHT,
+            batcher: RequestBatcher | None = None,
+            retry_policy: RetryPolicy | None = None,
+            retry_budget: RetryBudget | None = None,
+            breakers: BreakerRegistry | None = BREAKERS,
+            rate_limits: RateLimitRegistry | None = RATE_LIMITS,
+            concurrency: ConcurrencyRegistry | None = None,
+            scheduler: Scheduler | None = SCHEDULER,
+            priority: Priority = Priority.DEFAULT,
+            capabilities: CapabilityMatrix | None = None,
+            on_unsupported: CapabilityPolicy = CapabilityPolicy.ADAPT,
+            cassette: Cassette | None = None,
+            observers: list[ClientObserver] | None = None,
+    ):
+        """
+        Args:
+            endpoint (str): Completion URL template with a `{model}` placeholder
+            deployment_name (str | Router): DIAL deployment to send completions to, or a Router that picks
+                the deployment for every call
+            pool_maxsize (int | None): Keep-alive connections kept per host (shared with other clients)
+            idle_timeout (float | None): Seconds an idle keep-alive connection is kept before eviction
+            timeout (float): Per-request timeout in seconds
+            cache (ResponseCache | None): Serve repeated deterministic requests from this cache (non-streaming only)
+            single_flight (SingleFlight | None): Share one in-flight request between concurrent identical
+                deterministic calls. Defaults to the process-wide instance; None disables coalescing
+            batcher (RequestBatcher | None): Merge concurrent identical non-deterministic requests into one `n=k`
+                request (only for deployments that support `n` natively)
+            retry_policy (RetryPolicy | None): When to re-send 429/5xx/connection failures. Use `NO_RETRY` to disable
+            retry_budget (RetryBudget | None): Caps retries to a fraction of this client's requests;
+                pass the same instance to several clients to share one budget
+            breakers (BreakerRegistry | None): Per-deployment circuit breakers; calls to a deployment whose
+                circuit is open fail fast with CircuitOpenError. Defaults to the process-wide registry
+            rate_limits (RateLimitRegistry | None): Requests/tokens per minute limits for this API key and
+                deployment; requests wait for capacity instead of running into 429s. Defaults to the
+                process-wide registry, which limits nothing until `RATE_LIMITS.configure(...)` is called
+            concurrency (ConcurrencyRegistry | None): Adaptive (AIMD) per-deployment limit on requests in flight,
+                e.g. the process-wide `ADAPTIVE_CONCURRENCY`. Off by default
+            scheduler (Scheduler | None): Queues every request by priority class with weighted fair queuing.
+                Defaults to the process-wide scheduler shared by all clients; None sends at once
+            priority (Priority): Class of this client's requests: INTERACTIVE, DEFAULT or BATCH
+            capabilities (CapabilityMatrix | None): Probed params of every deployment. Requests are checked against
+                it before sending; see `on_unsupported`
+            on_unsupported (CapabilityPolicy): FAIL raises UnsupportedParameterError without a network call, ADAPT
+                drops unsupported params, clamps out-of-range values and emulates `n` (not for streams) and `stop`
+            cassette (Cassette | None): Record responses to, or replay them from, a cassette file. Defaults to the
+                one configured by the `DIAL_CASSETTE*` environment variables; replaying needs no API key
+            observers (list[ClientObserver] | None): Receive on_request / on_response / on_retry / on_error /
+                on_stream_chunk events with timings and sizes. None prints to the console as directed by the
+                `print_request` / `print_only_content` args of every call; a list replaces that console output
+                (add a ConsoleObserver to keep it), and an empty list makes the client silent at no extra cost
+        """
+        self._cassette = cassette if cassette is not None else Cassette.from_env()
         api_key = os.getenv('DIAL_API_KEY', '')
-        if not api_key or api_key.strip() == "":
+        if (not api_key or api_key.strip() == "") and (self._cassette is None or self._cassette.needs_api_key):
             raise ValueError("API key cannot be null or empty")
 
-        self._endpoint = endpoint.format(
-            model=deployment_name
-        )
+        self._router = deployment_name if isinstance(deployment_name, Router) else None
+        self._endpoint_template = endpoint
         self._api_key = api_key
+        self._timeout = timeout
+        self._cache = cache
+        self._single_flight = single_flight
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._retry_budget = retry_budget or RetryBudget()
+        self._breakers = breakers
+        self._rate_limits = rate_limits
+        self._concurrency_registry = concurrency
+        self._scheduler = scheduler
+        self._priority = priority
+        self._capabilities = capabilities
+        self._on_unsupported = on_unsupported
+        self._console = observers is None
+        self._observers = tuple(observers or ())
+        self._deployments: dict[str, _Deployment] = {}
+        self._deployments_lock = threading.Lock()
+        if self._router is None:
+            self._default = self._deployment(deployment_name)
+            self._endpoint = self._default.endpoint
+            self._deployment_name = deployment_name
+            self._batcher = batcher if batcher is not None and self._default.native_n else None
+        else:
+            self._default = None
+            self._endpoint = endpoint.format(model=self._router.candidates[0])
+            self._deployment_name = None
+            self._batcher = batcher
+        self._pool = POOLS.acquire(self._endpoint, pool_maxsize=pool_maxsize, idle_timeout=idle_timeout)
+
+    def _deployment(self, name: str) -> _Deployment:
+        with self._deployments_lock:
+            deployment = self._deployments.get(name)
+            if deployment is None:
+                endpoint = self._endpoint_template.format(model=name)
+                deployment = _Deployment(
+                    name=name,
+                    endpoint=endpoint,
+                    breaker=self._breakers.get(name, endpoint) if self._breakers is not None else None,
+                    concurrency=self._concurrency_registry.get(name) if self._concurrency_registry is not None else None,
+                    native_n=self._native_n(name),
+                )
+                self._deployments[name] = deployment
+            return deployment
+
+    def _native_n(self, name: str) -> bool:
+        probed = self._capabilities.native_n(name) if self._capabilities is not None else None
+        return supports_n(name) if probed is None else probed
+
+    def _resolve(self, request_data: dict) -> _Deployment:
+        """The deployment this request goes to: the fixed one, or the router's pick."""
+        if self._router is None:
+            return self._default
+        return self._deployment(self._router.select(request_data, endpoint=self._endpoint_template))
+
+    def close(self) -> None:
+        """Release this client's reference to the shared connection pool."""
+        if self._pool is not None:
+            POOLS.release(self._pool)
+            self._pool = None
+
+    def cache_stats(self) -> dict | None:
+        """Hit/miss counters of the response cache, or None when caching is off."""
+        return self._cache.stats() if self._cache is not None else None
+
+    def coalescing_stats(self) -> dict | None:
+        """How many identical in-flight requests were served by another caller's HTTP call."""
+        return self._single_flight.stats() if self._single_flight is not None else None
+
+    def batching_stats(self) -> dict | None:
+        """How many requests were merged into shared `n=k` calls, or None when batching is off."""
+        return self._batcher.stats() if self._batcher is not None else None
+
+    def retry_stats(self) -> dict:
+        """Requests sent, retries spent and how often the retry budget ran out."""
+        return self._retry_budget.stats()
+
+    def breaker_state(self) -> dict | None:
+        """Circuit breaker snapshot for this client's deployment (None for a routed client, see `BREAKERS`)."""
+        breaker = self._default.breaker if self._default is not None else None
+        return breaker.snapshot() if breaker is not None else None
+
+    def concurrency_limit(self) -> dict | None:
+        """Current adaptive concurrency limit of this client's deployment, or None when it is off."""
+        concurrency = self._default.concurrency if self._default is not None else None
+        return concurrency.snapshot() if concurrency is not None else None
+
+    def routing_stats(self) -> dict | None:
+        """Latency, error-rate and throughput the router observed per deployment, or None without a router."""
+        return self._router.stats() if self._router is not None else None
+
+    def __enter__(self) -> "DialClient":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
 
     def get_completion(
             self, messages: list[Message],
@@ -58,6 +264,8 @@ class DialClient:
 
                 n (int): How many chat completion choices to generate for each input message. Note that you will be charged
                     based on the number of generated tokens across all of the choices. Keep n as 1 to minimize costs
+                    Deployments without native `n` support (Claude, Gemini) get n concurrent single-choice requests
+                    merged into one response.
                     Default: 1
 
                 seed (int): If specified, the system will make a best effort to sample deterministically, such that repeated
@@ -85,67 +293,374 @@ class DialClient:
                 stop (str or list[str]): Tells the AI to stop generating text when it encounters specific words or phrases.
                     Like setting custom "end of response" triggers.
                     Default: None
+
+                stream (bool): If True, receive the response as server-sent events and print the content as it arrives.
+                    The returned Message is the same as without streaming. Use `stream_completion` to consume the deltas yourself.
+                    In stream mode `stop` is also enforced on the client side (unless `client_stop=False`), and
+                    `token_budget` (int) closes the connection once that many tokens (estimated locally) were
+                    received. Both options are ignored without streaming and never sent.
+                    Default: False
+        """
+        observers = self._call_observers(print_request, print_only_content, all_choices=False)
+        if kwargs.pop("stream", False):
+            with self._stream_completion(messages, observers, **kwargs) as stream:
+                for _ in stream:
+                    pass
+            return stream.message
+
+        return self._request_completions(messages, observers, kwargs).message
+
+    def get_completions(
+            self, messages: list[Message],
+            print_request: bool = False,
+            print_only_content: bool = True,
+            **kwargs
+    ) -> CompletionResult:
+        """
+        Send a request to DIAL API and return every choice of the response.
+
+        Accepts the same parameters as `get_completion`. Use `n` to get several samples in
+        one round trip; each Choice carries its `finish_reason`, and the result keeps the
+        `usage` block and response metadata. Streaming is not supported here: use
+        `stream_completion`, whose CompletionStream collects every choice with `contents()`.
+        """
+        if kwargs.get("stream"):
+            raise ValueError("get_completions does not stream; use stream_completion")
+        observers = self._call_observers(print_request, print_only_content, all_choices=True)
+        return self._request_completions(messages, observers, kwargs)
+
+    def _call_observers(
+            self, print_request: bool, print_only_content: bool, all_choices: bool, print_response: bool = True
+    ) -> tuple[ClientObserver, ...]:
+        """The client's observers plus, unless they replaced it, the console output this call asks for."""
+        if not self._console:
+            return self._observers
+        return self._observers + (ConsoleObserver(print_request, print_only_content, all_choices, print_response),)
+
+    def _request_completions(
+            self, messages: list[Message], observers: tuple[ClientObserver, ...], params: dict
+    ) -> CompletionResult:
+        params = {key: value for key, value in params.items() if key not in STREAM_OPTIONS}
+        request_data, headers = self._build_request(messages, params)
+        deployment = self._resolve(request_data)
+        request_data, fixed = self._check_capabilities(deployment, request_data)
+        if not observers:
+            return self._completion_result(deployment, request_data, headers, params, fixed)
+
+        started = time.perf_counter()
+        request = RequestEvent(deployment.name, deployment.endpoint, request_data, headers, stream=False)
+        notify(observers, "on_request", request)
+        try:
+            result = self._completion_result(deployment, request_data, headers, params, fixed)
+        except Exception as e:
+            notify(observers, "on_error", ErrorEvent(deployment.name, e, time.perf_counter() - started))
+            raise
+        notify(observers, "on_response", ResponseEvent(deployment.name, time.perf_counter() - started, result=result))
+        return result
+
+    def _completion_result(
+            self, deployment: _Deployment, request_data: dict, headers: dict, params: dict, fixed: list[Violation]
+    ) -> CompletionResult:
+        result = CompletionResult.from_response(self._complete(deployment, request_data, headers))
+        if not result.choices:
+            raise ValueError("No Choice has been present in the response")
+        if any(violation.param == "stop" for violation in fixed):
+            result = _apply_stop(result, params["stop"])
+        return result
+
+    def _check_capabilities(self, deployment: _Deployment, request_data: dict) -> tuple[dict, list[Violation]]:
+        """Fail fast or adapt a request the capability matrix says the deployment would reject."""
+        if self._capabilities is None:
+            return request_data, []
+        if self._on_unsupported == CapabilityPolicy.FAIL:
+            violations = self._capabilities.violations(deployment.name, request_data)
+            if violations:
+                raise UnsupportedParameterError(deployment.name, violations)
+            return request_data, []
+        return self._capabilities.adapt(deployment.name, request_data)
+
+    def _complete(self, deployment: _Deployment, request_data: dict, headers: dict) -> dict:
+        """
+        Return the response JSON for a non-streaming request.
+
+        Cacheable requests go through the cache, concurrent identical deterministic
+        requests share a single HTTP call, and concurrent identical random requests are
+        merged into one `n=k` call when a batcher is configured.
+        """
+        batcher = self._batcher if deployment.native_n else None
+        if self._cache is None and self._single_flight is None and batcher is None:
+            return self._send(deployment, request_data, headers)
+
+        params = {k: v for k, v in request_data.items() if k != "messages"}
+        key = cache_key(deployment.name, request_data["messages"], params, deployment.endpoint, self._api_key)
+        deterministic = is_deterministic(params)
+        if batcher is not None and not deterministic:
+            load = partial(self._batch, deployment, request_data, headers, params)
+        else:
+            load = partial(self._send, deployment, request_data, headers)
+        if self._cache is not None:
+            if self._cache.cacheable(params):
+                load = partial(self._cache.get_or_load, key, load)
+            else:
+                self._cache.record_bypass()
+        if self._single_flight is not None and deterministic:
+            return self._single_flight.do(key, load)
+        return load()
+
+    def _batch(self, deployment: _Deployment, request_data: dict, headers: dict, params: dict) -> dict:
+        base_params = {k: v for k, v in params.items() if k != "n"}
+        key = cache_key(deployment.name, request_data["messages"], base_params, deployment.endpoint, self._api_key)
+        return self._batcher.submit(
+            key,
+            params.get("n", 1),
+            lambda n: self._send(deployment, {**request_data, "n": n}, headers),
+        )
+
+    def _send(self, deployment: _Deployment, request_data: dict, headers: dict) -> dict:
+        n = request_data.get("n") or 1
+        if n > 1 and not deployment.native_n:
+            return self._send_emulated_n(deployment, request_data, headers, n)
+        started = time.perf_counter()
+        response, reservation, _ = self._execute(deployment, request_data, headers)
+        data = response.json()
+        usage = data.get("usage") or {}
+        if reservation is not None:
+            reservation.reconcile(usage.get("total_tokens"))
+        if self._router is not None:
+            self._router.record_throughput(deployment.name, usage.get("completion_tokens"), time.perf_counter() - started)
+        return data
+
+    def _send_emulated_n(self, deployment: _Deployment, request_data: dict, headers: dict, n: int) -> dict:
+        """Emulate `n` for deployments that return one choice: send n single requests at once and merge them."""
+        single = {k: v for k, v in request_data.items() if k != "n"}
+        with ThreadPoolExecutor(max_workers=n, thread_name_prefix="dial-n") as executor:
+            responses = list(executor.map(lambda _: self._send(deployment, single, headers), range(n)))
+        return merge_choices(responses)
+
+    def stream_completion(
+            self, messages: list[Message],
+            print_request: bool = False,
+            token_budget: int | None = None,
+            client_stop: bool = True,
+            print_only_content: bool = True,
+            **kwargs
+    ) -> CompletionStream:
+        """
+        Send a streaming request to DIAL API and return an iterator over the content deltas.
+
+        The request is sent immediately; iterating the returned CompletionStream reads the
+        server-sent events as they arrive. Accepts the same parameters as `get_completion`;
+        the deltas are not printed, so `print_only_content` has no effect here. Use the stream
+        in a `with` block when it may be left before its end, so its connection is given back.
+
+        Args:
+            token_budget (int | None): Close the stream once this many tokens (estimated locally) were received
+            client_stop (bool): Also enforce `stop` on the client side, for providers that ignore it
         """
+        kwargs.pop("stream", None)
+        observers = self._call_observers(print_request, print_only_content, all_choices=False, print_response=False)
+        return self._stream_completion(messages, observers, token_budget, client_stop, **kwargs)
+
+    def _stream_completion(
+            self, messages: list[Message],
+            observers: tuple[ClientObserver, ...],
+            token_budget: int | None = None,
+            client_stop: bool = True,
+            **kwargs
+    ) -> CompletionStream:
+        request_data, headers = self._build_request(messages, kwargs)
+        request_data["stream"] = True
+        deployment = self._resolve(request_data)
+        request_data, fixed = self._check_capabilities(deployment, request_data)
+        # `n` is emulated with separate requests, which a single stream cannot be
+        unsupported_n = [violation for violation in fixed if violation.param == "n" and violation.fix == "emulate"]
+        if unsupported_n:
+            raise UnsupportedParameterError(deployment.name, unsupported_n)
+
+        started = time.perf_counter()
+        if observers:
+            request = RequestEvent(deployment.name, deployment.endpoint, request_data, headers, stream=True)
+            notify(observers, "on_request", request)
+        try:
+            response, reservation, release = self._execute(deployment, request_data, headers, stream=True)
+        except Exception as e:
+            if observers:
+                notify(observers, "on_error", ErrorEvent(deployment.name, e, time.perf_counter() - started))
+            raise
+        return CompletionStream(
+            response,
+            started,
+            stop=kwargs.get("stop") if client_stop else None,
+            token_budget=token_budget,
+            observers=observers,
+            deployment=deployment.name,
+            reservation=reservation,
+            prompt_tokens=estimate_prompt_tokens(request_data) if reservation is not None else 0,
+            release=release,
+        )
+
+    def _build_request(self, messages: list[Message], params: dict) -> tuple[dict, dict]:
         headers = {
             "api-key": self._api_key,
             "Content-Type": "application/json"
         }
         request_data = {
             "messages": [msg.to_dict() for msg in messages],
-            **kwargs,
+            **params,
         }
+        return request_data, headers
 
-        if print_request:
-            self._print_request(request_data, headers)
-
-        response = requests.post(url=self._endpoint, headers=headers, json=request_data, timeout=60)
-
-        if response.status_code == 200:
-            data = response.json()
-            choices = data.get("choices", [])
-            if choices:
-                content = choices[0].get("message", {}).get("content")
-                print("\n" + "="*50 + " RESPONSE " + "="*50)
-                if print_only_content:
-                    print(content)
-                else:
-                    print(json.dumps(data, indent=2, sort_keys=True))
-                print("="*108)
-                return Message(Role.AI, content)
-            raise ValueError("No Choice has been present in the response")
-        else:
-            raise Exception(f"HTTP {response.status_code}: {response.text}")
+    def _execute(
+            self, deployment: _Deployment, request_data: dict, headers: dict, stream: bool = False
+    ) -> tuple[requests.Response, Reservation | None, Callable[[], None] | None]:
+        """
+        POST the request, retrying throttling, gateway errors and connection failures.
 
+        Every attempt first waits for rate-limit capacity (if limits are configured for this key
+        or deployment), for a free slot under the adaptive concurrency limit (if enabled) and,
+        once it is ready to send, for a slot of the scheduler (by the client's priority). Returns the
+        200 response with its rate-limit reservation and, for streams, the callable that gives back
+        the concurrency and scheduler slots once the stream has been read (None when there is
+        nothing to give back). Raises DialHTTPError / requests.RequestException once the retry policy gives up or
+        the client's retry budget is exhausted, and CircuitOpenError without sending anything
+        while the deployment's circuit is open.
+        """
+        self._retry_budget.on_request()
+        estimated_tokens = estimate_request_tokens(request_data) if self._rate_limits is not None else 0
+        attempt = 0
+        while True:
+            if deployment.breaker is not None:
+                deployment.breaker.before_call()
+            reservation = None
+            holds_slot = False
+            scheduled = False
+            try:
+                if self._rate_limits is not None:
+                    reservation = self._rate_limits.acquire(self._api_key, deployment.name, estimated_tokens)
+                if deployment.concurrency is not None:
+                    deployment.concurrency.acquire()
+                    holds_slot = True
+                # last, so requests waiting for rate-limit or concurrency capacity do not hold scheduler slots
+                if self._scheduler is not None:
+                    self._scheduler.acquire(self._priority)
+                    scheduled = True
+                started = time.perf_counter()
+                response = self._post(deployment.endpoint, request_data, headers, stream=stream)
+            except requests.RequestException as e:
+                latency = time.perf_counter() - started
+                self._record_outcome(deployment, False, latency, overloaded=isinstance(e, requests.Timeout))
+                if reservation is not None:
+                    reservation.cancel()
+                retryable = isinstance(e, requests.ConnectionError) and self._retry_policy.retry_connection_errors
+                if not retryable or not self._can_retry(attempt):
+                    raise
+                delay = self._retry_policy.backoff(attempt)
+                reason = type(e).__name__
+            except BaseException:
+                # not an answer of the deployment (closed client, cassette miss, interrupt): no outcome to record
+                self._abandon(deployment, reservation, holds_slot)
+                raise
+            else:
+                # 4xx other than 408/429 are the caller's fault, not a sign of a degraded deployment
+                status = response.status_code
+                healthy = status == 200 or (400 <= status < 500 and status not in (408, 429))
+                latency = time.perf_counter() - started
+                # a stream keeps its concurrency and scheduler slots while it is read, so the limiter
+                # sees its full duration and the class limits bound the streams running at once
+                keep_slot = stream and status == 200 and holds_slot
+                self._record_outcome(
+                    deployment,
+                    healthy,
+                    latency,
+                    overloaded=status in (429, 503),
+                    headers=response.headers,
+                    release_slot=not keep_slot,
+                )
+                if status == 200:
+                    release = None
+                    if stream and (keep_slot or scheduled):
+                        release = partial(
+                            self._release_stream, deployment, started, response.headers, keep_slot, scheduled
+                        )
+                        scheduled = False
+                    return response, reservation, release
+                if reservation is not None:
+                    reservation.cancel()
+                error = DialHTTPError.from_response(response)
+                if status not in self._retry_policy.retry_statuses:
+                    raise error
+                delay = self._retry_policy.delay(attempt, error.headers)
+                if delay is None or not self._can_retry(attempt):
+                    raise error
+                reason = f"HTTP {status}"
+            finally:
+                if scheduled:
+                    self._scheduler.release(self._priority)
+            if self._observers:
+                notify(self._observers, "on_retry", RetryEvent(deployment.name, attempt, reason, latency, delay))
+            attempt += 1
+            time.sleep(delay)
 
-    def _print_request(self, request_data: dict, headers: dict):
-        """Pretty print the request details."""
-        print("\n" + "="*50 + " REQUEST " + "="*50)
-        print(f"Endpoint: {self._endpoint}")
+    def _record_outcome(
+            self,
+            deployment: _Deployment,
+            success: bool,
+            latency: float,
+            overloaded: bool = False,
+            headers: dict | None = None,
+            release_slot: bool = True,
+    ) -> None:
+        if deployment.breaker is not None:
+            deployment.breaker.record(success, latency)
+        if deployment.concurrency is not None and release_slot:
+            deployment.concurrency.release(latency, overloaded, headers)
+        if self._router is not None:
+            self._router.record_call(deployment.name, success, latency)
 
-        print("\nHeaders:")
-        safe_headers = headers.copy()
-        if "api-key" in safe_headers:
-            api_key = safe_headers["api-key"]
-            safe_headers["api-key"] = f"{api_key[:8]}...{api_key[-4:]}" if len(api_key) > 12 else "***"
+    def _release_stream(
+            self, deployment: _Deployment, started: float, headers: dict, holds_slot: bool, scheduled: bool
+    ) -> None:
+        """Give back the slots a stream held while it was read; the concurrency limiter gets the time it took."""
+        try:
+            if holds_slot:
+                deployment.concurrency.release(time.perf_counter() - started, headers=headers)
+        finally:
+            if scheduled:
+                self._scheduler.release(self._priority)
 
-        for key, value in safe_headers.items():
-            print(f"  {key}: {value}")
+    @staticmethod
+    def _abandon(deployment: _Deployment, reservation: Reservation | None, holds_slot: bool) -> None:
+        """Give back the breaker probe, concurrency slot and rate-limit capacity of an attempt without outcome."""
+        if deployment.breaker is not None:
+            deployment.breaker.cancel()
+        if holds_slot:
+            deployment.concurrency.cancel()
+        if reservation is not None:
+            reservation.cancel()
 
-        print("\nRequest Body:")
-        messages = request_data.get("messages", [])
-        other_params = {k: v for k, v in request_data.items() if k != "messages"}
+    def _can_retry(self, attempt: int) -> bool:
+        return attempt + 1 < self._retry_policy.max_attempts and self._retry_budget.try_spend()
 
-        if messages:
-            print("  Messages:")
-            for i, msg in enumerate(messages):
-                role = msg.get("role", "unknown")
-                content = msg.get("content", "")
-                content_preview = content[:100] + "..." if len(content) > 100 else content
-                print(f"    [{i+1}] {role.upper()}: {content_preview}")
+    def _post(self, endpoint: str, request_data: dict, headers: dict, stream: bool = False) -> requests.Response:
+        if self._pool is None:
+            raise RuntimeError("DialClient is closed")
+        session = self._pool.session()
+        send = partial(
+            session.post, url=endpoint, headers=headers, json=request_data, timeout=self._timeout, stream=stream
+        )
+        if self._cassette is not None:
+            return self._cassette.post(send, endpoint, request_data, stream)
+        return send()
 
-        if other_params:
-            print("\n  Parameters:")
-            for key, value in sorted(other_params.items()):
-                print(f"    {key}: {value}")
 
-        print("="*107)
+def _apply_stop(result: CompletionResult, stop: str | list[str]) -> CompletionResult:
+    """Cut every choice at its first stop sequence, for deployments that do not support `stop`."""
+    stops = [stop] if isinstance(stop, str) else [s for s in stop if s]
+    choices = []
+    for choice in result.choices:
+        content = choice.message.content or ""
+        hits = [i for i in (content.find(s) for s in stops) if i != -1]
+        if hits:
+            choice = Choice(choice.index, Message(choice.message.role, content[:min(hits)]), CLIENT_STOP)
+        choices.append(choice)
+    return CompletionResult(choices, result.usage, result.model, result.id, result.created, result.raw)
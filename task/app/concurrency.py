@@ -0,0 +1,153 @@
+import threading
+import time
+from collections import deque
+from typing import Mapping
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def remaining_ratio(headers: Mapping[str, str] | None) -> float | None:
+    """Smallest `x-ratelimit-remaining-*` / `x-ratelimit-limit-*` ratio in the headers, if any."""
+    if not headers:
+        return None
+    headers = {k.lower(): v for k, v in headers.items()}
+    ratios = []
+    for kind in ("requests", "tokens"):
+        try:
+            remaining = float(headers[f"x-ratelimit-remaining-{kind}"])
+            limit = float(headers[f"x-ratelimit-limit-{kind}"])
+        except (KeyError, ValueError):
+            continue
+        if limit > 0:
+            ratios.append(remaining / limit)
+    return min(ratios) if ratios else None
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit for one deployment.
+
+    Every completed call that shows no sign of overload raises the limit by `increase /
+    limit` (about +`increase` per round of `limit` calls). A 429/503, a timeout, a
+    rate-limit header reporting less than `remaining_threshold` of the quota left, or a
+    p95 latency more than `latency_tolerance` times the best p95 seen so far multiplies the
+    limit by `decrease_factor` - at most once per `cooldown` seconds, so one burst of
+    throttled responses only counts once.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            initial_limit: int = 4,
+            min_limit: int = 1,
+            max_limit: int = 64,
+            increase: float = 1.0,
+            decrease_factor: float = 0.5,
+            latency_window: int = 20,
+            latency_tolerance: float = 2.0,
+            remaining_threshold: float = 0.1,
+            cooldown: float = 1.0,
+    ):
+        self.name = name
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.remaining_threshold = remaining_threshold
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.decreases = 0
+        self._latencies: deque[float] = deque(maxlen=latency_window)
+        self._best_p95: float | None = None
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self) -> None:
+        """Block until the number of calls in flight is below the current limit."""
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(
+            self,
+            latency: float,
+            overloaded: bool = False,
+            headers: Mapping[str, str] | None = None,
+    ) -> None:
+        """Record the outcome of a call started with `acquire` and adjust the limit."""
+        with self._condition:
+            self.in_flight -= 1
+            ratio = remaining_ratio(headers)
+            if overloaded or (ratio is not None and ratio < self.remaining_threshold):
+                self._decrease()
+            elif self._latency_rising(latency):
+                self._decrease()
+            else:
+                self.limit = min(self.max_limit, self.limit + self.increase / self.limit)
+            self._condition.notify_all()
+
+    def cancel(self) -> None:
+        """Give back the slot of a call that ended without an outcome; the limit is left as it is."""
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def _latency_rising(self, latency: float) -> bool:
+        self._latencies.append(latency)
+        if len(self._latencies) < self._latencies.maxlen:
+            return False
+        p95 = _percentile(list(self._latencies), 0.95)
+        self._latencies.clear()
+        if self._best_p95 is None or p95 < self._best_p95:
+            self._best_p95 = p95
+            return False
+        return p95 > self._best_p95 * self.latency_tolerance
+
+    def _decrease(self) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+        self.decreases += 1
+
+    def snapshot(self) -> dict:
+        with self._condition:
+            return {
+                "limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "best_p95": self._best_p95,
+                "decreases": self.decreases,
+            }
+
+
+class ConcurrencyRegistry:
+    """One AdaptiveLimiter per deployment; keyword arguments are passed to every new limiter."""
+
+    def __init__(self, **limiter_options):
+        self._options = limiter_options
+        self._limiters: dict[str, AdaptiveLimiter] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> AdaptiveLimiter:
+        with self._lock:
+            limiter = self._limiters.get(name)
+            if limiter is None:
+                limiter = AdaptiveLimiter(name, **self._options)
+                self._limiters[name] = limiter
+            return limiter
+
+    def limits(self) -> dict[str, dict]:
+        """Current limit and in-flight count of every deployment."""
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {name: limiter.snapshot() for name, limiter in limiters.items()}
+
+
+ADAPTIVE_CONCURRENCY = ConcurrencyRegistry()
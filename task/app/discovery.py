@@ -0,0 +1,191 @@
+import json
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+from task.app.cache import key_fingerprint
+from task.app.errors import DialHTTPError
+from task.app.transport import POOLS
+from task.constants import DIAL_ENDPOINT
+
+DEFAULT_CATALOG_PATH = os.path.join(".dial_cache", "models.json")
+CATALOG_VERSION = 2
+
+
+def models_url(endpoint: str = DIAL_ENDPOINT) -> str:
+    """`https://host/openai/models` for a `https://host/openai/deployments/{model}/chat/completions` endpoint."""
+    parts = urlsplit(endpoint)
+    prefix = parts.path.split("/openai/", 1)[0]
+    return f"{parts.scheme}://{parts.netloc}{prefix}/openai/models"
+
+
+class ModelCatalog:
+    """
+    Deployment listing from `/openai/models`, cached in memory and on disk.
+
+    `models()` answers from memory, or from the cache file on first use, without touching
+    the network. Once the listing is older than `ttl` it is still returned, and a refresh
+    starts on a background thread; the refresh sends the stored `ETag` / `Last-Modified`
+    back so an unchanged listing costs a 304 with no body. Only an empty cache makes
+    `models()` wait for the network. `start()` keeps the listing fresh on a timer.
+
+    The cache entry records the listing URL and a fingerprint of the API key it was
+    fetched with; an entry of another endpoint or key is ignored (and replaced).
+    """
+
+    def __init__(
+            self,
+            path: str = DEFAULT_CATALOG_PATH,
+            ttl: float = 3600,
+            endpoint: str = DIAL_ENDPOINT,
+            timeout: float = 30,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.url = models_url(endpoint)
+        self.timeout = timeout
+        self._entry: dict | None = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._refreshing: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._timer: threading.Thread | None = None
+        self.fetches = 0
+        self.not_modified = 0
+
+    def models(self) -> list[dict]:
+        """Every deployment's metadata; a stale listing is returned at once and refreshed in the background."""
+        entry = self._current()
+        if entry is None:
+            entry = self.refresh()
+        elif time.time() - entry["fetched_at"] > self.ttl:
+            self.refresh_in_background()
+        return entry["data"]
+
+    def names(self) -> list[str]:
+        return [model["id"] for model in self.models() if model.get("id")]
+
+    def chat_models(self) -> list[str]:
+        """Deployments that serve chat completions (everything the listing does not mark otherwise)."""
+        return [
+            model["id"] for model in self.models()
+            if model.get("id") and (model.get("capabilities") or {}).get("chat_completion", True)
+        ]
+
+    def get(self, name: str) -> dict | None:
+        return next((model for model in self.models() if model.get("id") == name), None)
+
+    def refresh(self) -> dict:
+        """Revalidate the listing now (blocking) and return the cache entry."""
+        api_key = os.getenv("DIAL_API_KEY", "")
+        if not api_key.strip():
+            raise ValueError("API key cannot be null or empty")
+        current = self._current()
+        headers = {"api-key": api_key}
+        if current is not None:
+            if current.get("etag"):
+                headers["If-None-Match"] = current["etag"]
+            if current.get("last_modified"):
+                headers["If-Modified-Since"] = current["last_modified"]
+
+        pool = POOLS.acquire(self.url)
+        try:
+            response = pool.session().get(self.url, headers=headers, timeout=self.timeout)
+        finally:
+            POOLS.release(pool)
+        if response.status_code == 304 and current is not None:
+            entry = {**current, "fetched_at": time.time()}
+            self.not_modified += 1
+        elif response.status_code == 200:
+            entry = {
+                "version": CATALOG_VERSION,
+                "url": self.url,
+                "key": key_fingerprint(api_key),
+                "fetched_at": time.time(),
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "data": response.json().get("data", []),
+            }
+            self.fetches += 1
+        else:
+            raise DialHTTPError.from_response(response)
+        self._store(entry)
+        return entry
+
+    def refresh_in_background(self) -> None:
+        """Start a refresh unless one is already running; errors keep the stale listing."""
+        with self._lock:
+            if self._refreshing is not None and self._refreshing.is_alive():
+                return
+            self._refreshing = threading.Thread(target=self._refresh_quietly, name="model-catalog", daemon=True)
+            self._refreshing.start()
+
+    def _refresh_quietly(self) -> None:
+        try:
+            self.refresh()
+        except (requests.RequestException, DialHTTPError, ValueError):
+            pass
+
+    def start(self, interval: float | None = None) -> None:
+        """Refresh every `interval` seconds (half the TTL by default) on a daemon thread."""
+        interval = interval or self.ttl / 2
+
+        def _loop():
+            while not self._stop.wait(interval):
+                self._refresh_quietly()
+
+        self._stop.clear()
+        self._timer = threading.Thread(target=_loop, name="model-catalog-timer", daemon=True)
+        self._timer.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def wait_for_refresh(self, timeout: float | None = None) -> None:
+        refreshing = self._refreshing
+        if refreshing is not None:
+            refreshing.join(timeout)
+
+    def _current(self) -> dict | None:
+        """The cached entry, unless it was fetched from another endpoint or with another API key."""
+        with self._lock:
+            if not self._loaded:
+                self._entry = self._read()
+                self._loaded = True
+            entry = self._entry
+        if entry is None or entry.get("url") != self.url:
+            return None
+        if entry.get("key") != key_fingerprint(os.getenv("DIAL_API_KEY", "")):
+            return None
+        return entry
+
+    def _read(self) -> dict | None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get("version") == CATALOG_VERSION else None
+
+    def _store(self, entry: dict) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, self.path)
+        with self._lock:
+            self._entry = entry
+            self._loaded = True
+
+    def stats(self) -> dict:
+        entry = self._current()
+        return {
+            "models": len(entry["data"]) if entry else 0,
+            "age": round(time.time() - entry["fetched_at"], 1) if entry else None,
+            "fetches": self.fetches,
+            "not_modified": self.not_modified,
+        }
@@ -0,0 +1,21 @@
+import requests
+
+
+class DialError(Exception):
+    """Base class for errors raised by the DIAL clients."""
+
+
+class DialHTTPError(DialError):
+    """DIAL API answered with a non-200 status."""
+
+    def __init__(self, status_code: int, text: str, headers: dict | None = None):
+        super().__init__(f"HTTP {status_code}: {text}")
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+    @classmethod
+    def from_response(cls, response: requests.Response) -> "DialHTTPError":
+        error = cls(response.status_code, response.text, dict(response.headers))
+        response.close()
+        return error
@@ -0,0 +1,255 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+import requests
+
+from task.app.client import DialClient
+from task.app.errors import DialError
+from task.app.transport import CancelScope, RequestCancelled
+from task.models.completion import Choice, CompletionResult
+from task.models.message import Message
+from task.models.role import Role
+
+DEFAULT_HEDGE_DELAY = 2.0
+MIN_LATENCY_SAMPLES = 10
+# options of DialClient.get_completions that configure the client side of the call, not the request body
+CLIENT_OPTIONS = ("print_request", "print_only_content", "stream")
+
+
+class AttemptCancelled(DialError):
+    """The attempt lost the race (or ran past its deadline) and its stream was closed."""
+
+
+class AttemptDeadlineExceeded(DialError):
+    def __init__(self, deployment_name: str, deadline: float):
+        super().__init__(f"'{deployment_name}' did not answer within {deadline:.1f}s")
+        self.deployment_name = deployment_name
+        self.deadline = deadline
+
+
+class FallbackExhaustedError(DialError):
+    """Every deployment of the chain failed; `errors` maps each deployment to its error."""
+
+    def __init__(self, errors: dict[str, Exception]):
+        details = "; ".join(f"{name}: {error}" for name, error in errors.items())
+        super().__init__(f"All deployments failed: {details}")
+        self.errors = errors
+
+
+class _Attempt:
+    def __init__(self, deployment_name: str, future: Future, scope: CancelScope, started: float):
+        self.deployment_name = deployment_name
+        self.future = future
+        self.scope = scope
+        self.started = started
+
+
+class HedgedClient:
+    """
+    Sends a completion to an ordered chain of equivalent deployments and returns the first answer.
+
+    The first deployment is tried first. If it has not answered after `hedge_delay`
+    seconds - by default the p95 latency observed for it, once enough calls were made -
+    the same request is sent to the next deployment as well (at most `max_hedges` extra
+    requests in flight), and whichever answers first wins. When an attempt fails, or runs
+    longer than `attempt_deadline`, the next deployment of the chain is tried at once.
+
+    Attempts are streamed internally so that the losers can be cancelled: as soon as the
+    winner is known their connections are shut down from the calling thread, even when
+    they are still waiting for the response headers, which also stops generation on the
+    server.
+    """
+
+    def __init__(
+            self,
+            endpoint: str,
+            deployment_names: list[str],
+            hedge_delay: float | None = None,
+            max_hedges: int = 1,
+            attempt_deadline: float | None = None,
+            **client_options,
+    ):
+        """
+        Args:
+            endpoint (str): Completion URL template with a `{model}` placeholder
+            deployment_names (list[str]): Equivalent deployments, in order of preference
+            hedge_delay (float | None): Seconds to wait before sending a duplicate request to the next
+                deployment. None uses the observed p95 latency of the preferred deployment
+            max_hedges (int): Speculative duplicates allowed in flight besides the first attempt
+            attempt_deadline (float | None): Give up on an attempt after this many seconds and fall back
+            **client_options: Passed to every DialClient (timeout, breakers, rate_limits, ...)
+        """
+        if not deployment_names:
+            raise ValueError("At least one deployment is required")
+        self._deployment_names = list(deployment_names)
+        self._clients = {
+            name: DialClient(endpoint=endpoint, deployment_name=name, **client_options) for name in deployment_names
+        }
+        self._hedge_delay = hedge_delay
+        self._max_hedges = max_hedges
+        self._attempt_deadline = attempt_deadline
+        self._executor = ThreadPoolExecutor(max_workers=4 * len(deployment_names), thread_name_prefix="hedge")
+        self._latencies = {name: deque(maxlen=100) for name in deployment_names}
+        self._lock = threading.Lock()
+        self._wins = {name: 0 for name in deployment_names}
+        self._hedges = 0
+        self._fallbacks = 0
+        self._cancelled = 0
+
+    def hedge_delay(self) -> float:
+        """
+        Current delay before a duplicate request is sent.
+
+        Attempts that were cancelled (they lost the race or missed their deadline) count
+        with the time they had run for, a lower bound of their latency, so a slow primary
+        that keeps losing to hedges still pushes the p95 up instead of leaving only the
+        fast calls in the samples.
+        """
+        if self._hedge_delay is not None:
+            return self._hedge_delay
+        with self._lock:
+            samples = sorted(self._latencies[self._deployment_names[0]])
+        if len(samples) < MIN_LATENCY_SAMPLES:
+            return DEFAULT_HEDGE_DELAY
+        return samples[min(len(samples) - 1, int(0.95 * len(samples)))]
+
+    def get_completion(self, messages: list[Message], **kwargs) -> Message:
+        return self.get_completions(messages, **kwargs).message
+
+    def get_completions(self, messages: list[Message], **kwargs) -> CompletionResult:
+        """
+        Return the first successful answer of the chain; `result.model` names the deployment that won.
+
+        Accepts the same parameters as `DialClient.get_completions`. Raises
+        FallbackExhaustedError when every deployment failed. Nothing is printed.
+        """
+        params = {key: value for key, value in kwargs.items() if key not in CLIENT_OPTIONS}
+        chain = iter(self._deployment_names)
+        pending: dict[Future, _Attempt] = {}
+        errors: dict[str, Exception] = {}
+        hedges_left = self._max_hedges
+        delay = self.hedge_delay()
+
+        def launch() -> bool:
+            name = next(chain, None)
+            if name is None:
+                return False
+            scope = CancelScope()
+            future = self._executor.submit(self._attempt, name, messages, scope, params)
+            pending[future] = _Attempt(name, future, scope, time.monotonic())
+            return True
+
+        launch()
+        next_hedge_at = time.monotonic() + delay
+        try:
+            while pending:
+                now = time.monotonic()
+                timeouts = [next_hedge_at - now] if hedges_left else []
+                if self._attempt_deadline is not None:
+                    timeouts += [a.started + self._attempt_deadline - now for a in pending.values()]
+                done, _ = wait(pending, timeout=max(0.0, min(timeouts)) if timeouts else None,
+                               return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    attempt = pending.pop(future)
+                    error = future.exception()
+                    if error is None:
+                        return self._won(attempt, future.result())
+                    errors[attempt.deployment_name] = error
+                    self._count("_fallbacks", launch())
+
+                now = time.monotonic()
+                if self._attempt_deadline is not None:
+                    for future, attempt in list(pending.items()):
+                        if now - attempt.started >= self._attempt_deadline:
+                            del pending[future]
+                            attempt.scope.cancel()
+                            self._record_latency(attempt.deployment_name, now - attempt.started)
+                            errors[attempt.deployment_name] = AttemptDeadlineExceeded(
+                                attempt.deployment_name, self._attempt_deadline
+                            )
+                            self._count("_fallbacks", launch())
+
+                if hedges_left and pending and now >= next_hedge_at:
+                    if launch():
+                        hedges_left -= 1
+                        self._count("_hedges", True)
+                    else:
+                        hedges_left = 0
+                    next_hedge_at = now + delay
+            raise FallbackExhaustedError(errors)
+        finally:
+            now = time.monotonic()
+            for attempt in pending.values():
+                attempt.future.cancel()
+                attempt.scope.cancel()
+                self._record_latency(attempt.deployment_name, now - attempt.started)
+                self._count("_cancelled", True)
+
+    def _attempt(
+            self, deployment_name: str, messages: list[Message], scope: CancelScope, params: dict
+    ) -> CompletionResult:
+        if scope.cancelled:
+            raise AttemptCancelled(f"'{deployment_name}' was cancelled before it started")
+        started = time.perf_counter()
+        with scope:
+            try:
+                with self._clients[deployment_name].stream_completion(messages, **params) as stream:
+                    for _ in stream:
+                        pass
+            except (RequestCancelled, requests.RequestException) as e:
+                if scope.cancelled:
+                    raise AttemptCancelled(f"'{deployment_name}' lost the race") from e
+                raise
+        if scope.cancelled:
+            raise AttemptCancelled(f"'{deployment_name}' lost the race")
+        self._record_latency(deployment_name, time.perf_counter() - started)
+        contents = stream.contents()
+        indices = sorted(set(range(len(contents))) | set(stream.finish_reasons))
+        return CompletionResult(
+            choices=[
+                Choice(i, Message(Role.AI, contents[i] if i < len(contents) else ""), stream.finish_reasons.get(i))
+                for i in indices
+            ],
+            usage=stream.usage or {},
+            model=deployment_name,
+        )
+
+    def _record_latency(self, deployment_name: str, latency: float) -> None:
+        with self._lock:
+            self._latencies[deployment_name].append(latency)
+
+    def _won(self, attempt: _Attempt, result: CompletionResult) -> CompletionResult:
+        with self._lock:
+            self._wins[attempt.deployment_name] += 1
+        return result
+
+    def _count(self, counter: str, happened: bool) -> None:
+        if happened:
+            with self._lock:
+                setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self) -> dict:
+        """Wins per deployment, duplicates sent, fallbacks taken and losers cancelled."""
+        delay = self.hedge_delay()
+        with self._lock:
+            return {
+                "wins": dict(self._wins),
+                "hedges": self._hedges,
+                "fallbacks": self._fallbacks,
+                "cancelled": self._cancelled,
+                "hedge_delay": round(delay, 3),
+            }
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        for client in self._clients.values():
+            client.close()
+
+    def __enter__(self) -> "HedgedClient":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
@@ -0,0 +1,395 @@
+"""
+Open-loop load generator for DIAL deployments.
+
+    python -m task.app.loadgen --rps 20 --duration 60 --mix gpt-4o=3,gemini-2.0-flash=1 [--output run.json]
+
+Requests start on a Poisson schedule at the target rate no matter how fast earlier ones
+finish, so a saturated client or proxy shows up as growing latency rather than as a
+lower request rate. Latency is measured from the scheduled start and therefore includes
+time queued behind the client's own limits; service time is measured from the moment
+the call was made. `--mix` can also be a JSON file with a list of
+{"deployment", "weight", "params", "stream"} entries. `--standin` runs against a local
+stand-in server started with the given latency model instead of DIAL.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+from task.app.bench import standin_process
+from task.app.client import DialClient
+from task.app.errors import DialHTTPError
+from task.app.retry import NO_RETRY
+from task.app.scheduler import SCHEDULER, Scheduler
+from task.constants import DIAL_ENDPOINT
+from task.models.message import Message
+from task.models.role import Role
+
+PERCENTILES = (50, 90, 99, 99.9)
+DEFAULT_PROMPT = "Explain in one sentence what a token is."
+
+
+class LatencyHistogram:
+    """
+    Log-linear (HDR style) histogram of durations.
+
+    Values are counted in microsecond buckets whose width grows with the value, so every
+    recorded duration keeps `significant_digits` of precision while memory stays bounded
+    by the range rather than the number of samples. Histograms of several workers or runs
+    can be merged.
+    """
+
+    def __init__(self, significant_digits: int = 3):
+        self.significant_digits = significant_digits
+        self._sub_bits = math.ceil(math.log2(2 * 10 ** significant_digits))
+        self.counts: dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def _index(self, micros: int) -> int:
+        shift = max(0, micros.bit_length() - self._sub_bits)
+        return (shift << self._sub_bits) | (micros >> shift)
+
+    def _highest_equivalent(self, index: int) -> float:
+        shift = index >> self._sub_bits
+        sub = index & ((1 << self._sub_bits) - 1)
+        return (((sub + 1) << shift) - 1) / 1e6
+
+    def record(self, seconds: float) -> None:
+        index = self._index(max(0, round(seconds * 1e6)))
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        if other.significant_digits != self.significant_digits:
+            raise ValueError("Cannot merge histograms of different precision")
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentile(self, p: float) -> float | None:
+        """Smallest value that `p` percent of the recorded values are at or below (None when empty)."""
+        if not self.count:
+            return None
+        target = max(1, math.ceil(p / 100 * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(max(self._highest_equivalent(index), self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float | None:
+        return self.total / self.count if self.count else None
+
+    def summary(self) -> dict:
+        """Count, mean, min, max and PERCENTILES, in milliseconds."""
+        def ms(value: float | None) -> float | None:
+            return None if value is None else round(value * 1000, 3)
+
+        summary = {"count": self.count, "mean": ms(self.mean), "min": ms(self.min if self.count else None)}
+        summary.update({f"p{p:g}": ms(self.percentile(p)) for p in PERCENTILES})
+        summary["max"] = ms(self.max if self.count else None)
+        return summary
+
+    def to_dict(self) -> dict:
+        return {
+            "significant_digits": self.significant_digits,
+            "count": self.count,
+            "total": self.total,
+            "min": self.min if self.count else None,
+            "max": self.max,
+            "counts": {str(index): count for index, count in sorted(self.counts.items())},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LatencyHistogram":
+        histogram = cls(data["significant_digits"])
+        histogram.counts = {int(index): count for index, count in data["counts"].items()}
+        histogram.count = data["count"]
+        histogram.total = data["total"]
+        histogram.min = data["min"] if data["min"] is not None else math.inf
+        histogram.max = data["max"]
+        return histogram
+
+
+@dataclass
+class WorkItem:
+    deployment: str
+    weight: float = 1.0
+    params: dict[str, Any] = field(default_factory=dict)
+    stream: bool = False
+
+
+def parse_mix(spec: str, stream: bool = False) -> list[WorkItem]:
+    """`gpt-4o=3,gemini-2.0-flash=1` (weights default to 1), or the path of a JSON list of WorkItem fields."""
+    if os.path.isfile(spec):
+        with open(spec, "r", encoding="utf-8") as f:
+            return [WorkItem(**entry) for entry in json.load(f)]
+    items = []
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        deployment, _, weight = part.partition("=")
+        items.append(WorkItem(deployment, float(weight or 1), stream=stream))
+    return items
+
+
+def poisson_arrivals(rps: float, duration: float, rng: random.Random) -> list[float]:
+    """Start offsets (seconds) of a Poisson process with rate `rps` over `duration`."""
+    arrivals, t = [], rng.expovariate(rps)
+    while t < duration:
+        arrivals.append(t)
+        t += rng.expovariate(rps)
+    return arrivals
+
+
+def error_kind(error: Exception) -> str:
+    if isinstance(error, DialHTTPError):
+        return f"HTTP {error.status_code}"
+    return type(error).__name__
+
+
+class LoadGenerator:
+    """
+    Sends the requests of `mix` at `rps` for `duration` seconds and collects latency histograms.
+
+    Args:
+        mix (list[WorkItem]): Deployments and param sets to pick from, by weight
+        rps (float): Target arrival rate
+        duration (float): Seconds to send for; requests in flight at the end are awaited
+        endpoint (str): Completion URL template with a `{model}` placeholder
+        messages (list[Message] | None): Conversation sent with every request
+        max_in_flight (int): Worker threads; arrivals beyond it queue (and count in latency)
+        seed (int | None): Seed of the arrival times and mix choices, for repeatable schedules
+        scheduler (Scheduler | None): Priority scheduler of the clients; the process-wide default caps the
+            requests in flight at its `max_concurrency` (32). None sends every request at once
+        **client_options: Passed to every DialClient (e.g. `retry_policy`); clients have no
+            observers (so print nothing) unless `observers` is given
+    """
+
+    def __init__(
+            self,
+            mix: list[WorkItem],
+            rps: float,
+            duration: float,
+            endpoint: str = DIAL_ENDPOINT,
+            messages: list[Message] | None = None,
+            max_in_flight: int = 256,
+            seed: int | None = None,
+            scheduler: Scheduler | None = SCHEDULER,
+            **client_options,
+    ):
+        if not mix:
+            raise ValueError("The mix needs at least one deployment")
+        self.mix = mix
+        self.rps = rps
+        self.duration = duration
+        self.messages = messages or [Message(Role.USER, DEFAULT_PROMPT)]
+        self.max_in_flight = max_in_flight
+        self._rng = random.Random(seed)
+        client_options.setdefault("single_flight", None)
+        client_options["scheduler"] = scheduler
+        client_options.setdefault("observers", [])
+        self._clients = {
+            item.deployment: DialClient(endpoint=endpoint, deployment_name=item.deployment, **client_options)
+            for item in mix
+        }
+        self._lock = threading.Lock()
+        self.latency = LatencyHistogram()
+        self.service_time = LatencyHistogram()
+        self.ttft = LatencyHistogram()
+        self.by_deployment: dict[str, LatencyHistogram] = {}
+        self.errors: Counter = Counter()
+        self.sent = 0
+        self.completion_tokens = 0
+        self.max_dispatch_lag = 0.0
+        self.elapsed = 0.0
+
+    def run(self) -> dict:
+        """Send the whole schedule, wait for the stragglers and return the report."""
+        arrivals = poisson_arrivals(self.rps, self.duration, self._rng)
+        weights = [item.weight for item in self.mix]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="dial-load") as executor:
+            for offset in arrivals:
+                scheduled = started + offset
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    self.max_dispatch_lag = max(self.max_dispatch_lag, -delay)
+                item = self._rng.choices(self.mix, weights)[0]
+                executor.submit(self._fire, item, scheduled)
+        self.elapsed = time.perf_counter() - started
+        for client in self._clients.values():
+            client.close()
+        return self.report()
+
+    def _fire(self, item: WorkItem, scheduled: float) -> None:
+        started = time.perf_counter()
+        ttft, tokens, error = None, 0, None
+        try:
+            client = self._clients[item.deployment]
+            if item.stream:
+                with client.stream_completion(self.messages, **item.params) as stream:
+                    for _ in stream:
+                        pass
+                if stream.ttft is not None:
+                    ttft = started - scheduled + stream.ttft
+                tokens = (stream.usage or {}).get("completion_tokens") or stream.tokens
+            else:
+                result = client.get_completions(self.messages, **item.params)
+                tokens = (result.usage or {}).get("completion_tokens") or 0
+        except Exception as e:
+            error = e
+        finished = time.perf_counter()
+        with self._lock:
+            self.sent += 1
+            if error is not None:
+                self.errors[error_kind(error)] += 1
+                return
+            self.latency.record(finished - scheduled)
+            self.service_time.record(finished - started)
+            self.by_deployment.setdefault(item.deployment, LatencyHistogram()).record(finished - scheduled)
+            if ttft is not None:
+                self.ttft.record(ttft)
+            self.completion_tokens += tokens
+
+    def report(self) -> dict:
+        with self._lock:
+            succeeded = self.latency.count
+            return {
+                "config": {
+                    "rps": self.rps,
+                    "duration": self.duration,
+                    "max_in_flight": self.max_in_flight,
+                    "mix": [asdict(item) for item in self.mix],
+                },
+                "summary": {
+                    "sent": self.sent,
+                    "succeeded": succeeded,
+                    "failed": self.sent - succeeded,
+                    "errors": dict(self.errors.most_common()),
+                    "elapsed": round(self.elapsed, 3),
+                    "offered_rps": round(self.sent / self.duration, 2),
+                    "achieved_rps": round(succeeded / self.elapsed, 2) if self.elapsed else None,
+                    "completion_tokens_per_second": (
+                        round(self.completion_tokens / self.elapsed, 1) if self.elapsed else None
+                    ),
+                    "max_dispatch_lag_ms": round(self.max_dispatch_lag * 1000, 3),
+                    "latency_ms": self.latency.summary(),
+                    "service_time_ms": self.service_time.summary(),
+                    "ttft_ms": self.ttft.summary(),
+                    "by_deployment_ms": {name: h.summary() for name, h in sorted(self.by_deployment.items())},
+                },
+                "histograms": {
+                    "latency": self.latency.to_dict(),
+                    "service_time": self.service_time.to_dict(),
+                    "ttft": self.ttft.to_dict(),
+                    **{f"deployment:{name}": h.to_dict() for name, h in sorted(self.by_deployment.items())},
+                },
+            }
+
+
+def compare(report: dict, previous: dict) -> list[str]:
+    """Percentile and throughput changes of `report` against the report of an earlier run."""
+    lines = []
+    for metric in ("latency_ms", "ttft_ms"):
+        for key in [f"p{p:g}" for p in PERCENTILES]:
+            old, new = previous["summary"][metric].get(key), report["summary"][metric].get(key)
+            if old and new is not None:
+                lines.append(f"{metric} {key}: {old} -> {new} ({(new / old - 1) * 100:+.0f}%)")
+    old, new = previous["summary"]["achieved_rps"], report["summary"]["achieved_rps"]
+    if old and new is not None:
+        lines.append(f"achieved_rps: {old} -> {new} ({(new / old - 1) * 100:+.0f}%)")
+    return lines
+
+
+def format_report(report: dict) -> str:
+    summary = report["summary"]
+    keys = ["count", "mean"] + [f"p{p:g}" for p in PERCENTILES] + ["max"]
+    rows = [("latency", summary["latency_ms"]), ("service time", summary["service_time_ms"]),
+            ("ttft", summary["ttft_ms"])]
+    rows += [(name, histogram) for name, histogram in summary["by_deployment_ms"].items()]
+    width = max(len(name) for name, _ in rows)
+    lines = [f"{'(ms)':<{width}}  " + "  ".join(f"{k:>10}" for k in keys)]
+    for name, histogram in rows:
+        lines.append(f"{name:<{width}}  " + "  ".join(f"{str(histogram[k]):>10}" for k in keys))
+    lines.append(
+        f"sent {summary['sent']}, succeeded {summary['succeeded']}, failed {summary['failed']} "
+        f"{summary['errors'] or ''}".rstrip()
+    )
+    lines.append(
+        f"offered {summary['offered_rps']} rps, achieved {summary['achieved_rps']} rps, "
+        f"{summary['completion_tokens_per_second']} completion tokens/s, "
+        f"max dispatch lag {summary['max_dispatch_lag_ms']}ms"
+    )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rps", type=float, required=True, help="Target arrival rate (requests per second)")
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--mix", default="gpt-4o", help="deployment=weight,... or a JSON file of WorkItems")
+    parser.add_argument("--stream", action="store_true", help="Stream every request of a --mix given inline")
+    parser.add_argument("--prompt", default=DEFAULT_PROMPT)
+    parser.add_argument("--max-in-flight", type=int, default=256)
+    parser.add_argument("--no-retry", action="store_true", help="Report throttling instead of retrying it")
+    parser.add_argument(
+        "--no-scheduler", action="store_true", help="Do not queue requests behind the process-wide priority scheduler"
+    )
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--standin", metavar="LATENCY", help="Run against a local stand-in with this latency model")
+    parser.add_argument("--output", help="Write the report (with histograms) to this JSON file")
+    parser.add_argument("--compare", metavar="REPORT", help="Show the changes against an earlier --output")
+    args = parser.parse_args()
+
+    options = {"retry_policy": NO_RETRY} if args.no_retry else {}
+    if args.no_scheduler:
+        options["scheduler"] = None
+    generator_args = dict(
+        mix=parse_mix(args.mix, args.stream),
+        rps=args.rps,
+        duration=args.duration,
+        messages=[Message(Role.USER, args.prompt)],
+        max_in_flight=args.max_in_flight,
+        seed=args.seed,
+        **options,
+    )
+    if args.standin:
+        os.environ.setdefault("DIAL_API_KEY", "standin-key-0123456789")
+        with standin_process("--latency", args.standin) as endpoint:
+            report = LoadGenerator(endpoint=endpoint, **generator_args).run()
+    else:
+        report = LoadGenerator(**generator_args).run()
+
+    print(format_report(report))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        for line in compare(report, previous):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,23 @@
 from task.app.client import DialClient
+from task.app.router import Router
+from task.app.scheduler import Priority
+from task.constants import DEFAULT_SYSTEM_PROMPT, DIAL_ENDPOINT
 from task.models.conversation import Conversation
 from task.models.message import Message
 from task.models.role import Role
 
-DEFAULT_SYSTEM_PROMPT = "You are an assistant who answers concisely and informatively."
-DIAL_ENDPOINT = "https://ai-proxy.lab.epam.com/openai/deployments/{model}/chat/completions"
-
 
 def run(
-        deployment_name: str,
+        deployment_name: str | Router,
         print_request: bool = True,
         print_only_content: bool = False,
+        stream: bool = True,
         **kwargs
 ) -> None:
     client = DialClient(
         endpoint=DIAL_ENDPOINT,
         deployment_name=deployment_name,
+        priority=Priority.INTERACTIVE,
     )
     conversation = Conversation()
     conversation.add_message(Message(Role.SYSTEM, DEFAULT_SYSTEM_PROMPT))
@@ -35,6 +37,7 @@ def run(
             messages=conversation.get_messages(),
             print_request=print_request,
             print_only_content=print_only_content,
+            stream=stream,
             **kwargs
         )
         conversation.add_message(ai_message)
@@ -0,0 +1,195 @@
+import json
+from dataclasses import dataclass
+from functools import cached_property
+from typing import TYPE_CHECKING, Iterable
+
+from task.models.completion import CompletionResult
+
+if TYPE_CHECKING:
+    from task.app.streaming import CompletionStream
+
+
+@dataclass
+class RequestEvent:
+    """A completion call is about to be sent (after capability checks, before cache, queueing and retries)."""
+    deployment: str
+    endpoint: str
+    request_data: dict
+    headers: dict
+    stream: bool
+
+    @property
+    def messages(self) -> int:
+        return len(self.request_data.get("messages", []))
+
+    @cached_property
+    def request_bytes(self) -> int:
+        """Size of the JSON request body (encoded on first access)."""
+        return len(json.dumps(self.request_data).encode("utf-8"))
+
+
+@dataclass
+class ResponseEvent:
+    """
+    A completion call succeeded. `latency` is measured from the call, so it includes queueing and retries;
+    for streams the event is sent after the last chunk.
+    """
+    deployment: str
+    latency: float
+    result: CompletionResult | None = None
+    stream: "CompletionStream | None" = None
+
+    @cached_property
+    def response_bytes(self) -> int:
+        """Bytes of server-sent events received for a stream; size of the response JSON otherwise."""
+        if self.stream is not None:
+            return self.stream.bytes_received
+        return len(json.dumps(self.result.raw).encode("utf-8"))
+
+
+@dataclass
+class RetryEvent:
+    """An attempt failed with `reason` ("HTTP 429", "ConnectionError", ...) and is re-sent after `delay` seconds."""
+    deployment: str
+    attempt: int
+    reason: str
+    latency: float
+    delay: float
+
+
+@dataclass
+class ErrorEvent:
+    """A completion call (or a stream while it was read) failed for good."""
+    deployment: str
+    error: Exception
+    latency: float
+
+
+@dataclass
+class StreamChunkEvent:
+    """A content delta of choice 0; `index` counts the deltas of the stream from 0."""
+    deployment: str
+    index: int
+    delta: str
+    elapsed: float
+
+
+class ClientObserver:
+    """
+    Receives the events of DialClient calls; override the hooks you need.
+
+    Hooks run synchronously on the calling thread (on_stream_chunk on the one reading the
+    stream), so they should be quick; exceptions they raise propagate to the caller.
+    """
+
+    def on_request(self, event: RequestEvent) -> None:
+        pass
+
+    def on_response(self, event: ResponseEvent) -> None:
+        pass
+
+    def on_retry(self, event: RetryEvent) -> None:
+        pass
+
+    def on_error(self, event: ErrorEvent) -> None:
+        pass
+
+    def on_stream_chunk(self, event: StreamChunkEvent) -> None:
+        pass
+
+
+def notify(observers: Iterable[ClientObserver], hook: str, event) -> None:
+    for observer in observers:
+        getattr(observer, hook)(event)
+
+
+class ConsoleObserver(ClientObserver):
+    """
+    Prints requests and responses to stdout.
+
+    Args:
+        print_request (bool): Print the endpoint, headers (API key masked), messages and params
+        print_only_content (bool): Print only the content of the response instead of its whole JSON
+            (for streams: without the finish reason, usage and timings)
+        all_choices (bool): Print the content of every choice rather than the first one
+        print_response (bool): Print responses at all; streams are printed delta by delta as they are read
+    """
+
+    def __init__(
+            self,
+            print_request: bool = False,
+            print_only_content: bool = True,
+            all_choices: bool = True,
+            print_response: bool = True,
+    ):
+        self.print_request = print_request
+        self.print_only_content = print_only_content
+        self.all_choices = all_choices
+        self.print_response = print_response
+
+    def on_request(self, event: RequestEvent) -> None:
+        if not self.print_request:
+            return
+        print("\n" + "="*50 + " REQUEST " + "="*50)
+        print(f"Endpoint: {event.endpoint}")
+
+        print("\nHeaders:")
+        safe_headers = event.headers.copy()
+        if "api-key" in safe_headers:
+            api_key = safe_headers["api-key"]
+            safe_headers["api-key"] = f"{api_key[:8]}...{api_key[-4:]}" if len(api_key) > 12 else "***"
+
+        for key, value in safe_headers.items():
+            print(f"  {key}: {value}")
+
+        print("\nRequest Body:")
+        messages = event.request_data.get("messages", [])
+        other_params = {k: v for k, v in event.request_data.items() if k != "messages"}
+
+        if messages:
+            print("  Messages:")
+            for i, msg in enumerate(messages):
+                role = msg.get("role", "unknown")
+                content = msg.get("content", "")
+                content_preview = content[:100] + "..." if len(content) > 100 else content
+                print(f"    [{i+1}] {role.upper()}: {content_preview}")
+
+        if other_params:
+            print("\n  Parameters:")
+            for key, value in sorted(other_params.items()):
+                print(f"    {key}: {value}")
+
+        print("="*107)
+
+    def on_stream_chunk(self, event: StreamChunkEvent) -> None:
+        if not self.print_response:
+            return
+        if event.index == 0:
+            print("\n" + "="*50 + " RESPONSE " + "="*50)
+        print(event.delta, end="", flush=True)
+
+    def on_response(self, event: ResponseEvent) -> None:
+        if not self.print_response:
+            return
+        if event.stream is not None:
+            self._print_stream_end(event.stream)
+            return
+        print("\n" + "="*50 + " RESPONSE " + "="*50)
+        if self.print_only_content:
+            for choice in event.result.choices if self.all_choices else event.result.choices[:1]:
+                print(choice.message.content)
+        else:
+            print(json.dumps(event.result.raw, indent=2, sort_keys=True))
+        print("="*108)
+
+    def _print_stream_end(self, stream: "CompletionStream") -> None:
+        if stream.deltas == 0:
+            print("\n" + "="*50 + " RESPONSE " + "="*50)
+        print()
+        if not self.print_only_content:
+            print(json.dumps({
+                "finish_reason": stream.finish_reason,
+                "usage": stream.usage,
+                "timings": stream.timings(),
+            }, indent=2, sort_keys=True))
+        print("="*108)
@@ -0,0 +1,156 @@
+"""
+Find out which params every deployment accepts and save the capability matrix.
+
+    python -m task.app.probe [--models gpt-4o,gemini-2.0-flash] [--output capabilities.json]
+
+Every probe is a one-token completion with a single param set; a 400/422 answer means
+the deployment rejects that value. All deployments and params are probed concurrently.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import requests
+
+from task.app.capabilities import DEFAULT_MATRIX_PATH, CapabilityMatrix, ParamCapability
+from task.app.retry import RetryPolicy
+from task.app.transport import POOLS
+from task.constants import DIAL_ENDPOINT
+
+PROBES: dict[str, list[Any]] = {
+    "temperature": [0.0, 1.0, 2.0],
+    "top_p": [0.0, 0.5, 1.0],
+    "frequency_penalty": [-2.0, 0.0, 2.0],
+    "presence_penalty": [-2.0, 0.0, 2.0],
+    "n": [2],
+    "seed": [42],
+    "stop": [["\n"]],
+    "max_tokens": [1],
+    "logprobs": [True],
+    "reasoning_effort": ["low"],
+}
+REJECTED_STATUSES = frozenset({400, 422})
+PROBE_MESSAGES = [{"role": "user", "content": "Reply with OK."}]
+
+
+def _post(
+        session: requests.Session, endpoint: str, api_key: str, request_data: dict, policy: RetryPolicy
+) -> requests.Response | None:
+    """POST one probe, retrying throttling; None when the deployment could not be reached."""
+    for attempt in range(policy.max_attempts):
+        try:
+            response = session.post(endpoint, headers={"api-key": api_key}, json=request_data, timeout=60)
+        except requests.RequestException:
+            response = None
+        if response is not None and response.status_code not in policy.retry_statuses:
+            return response
+        delay = policy.delay(attempt, response.headers if response is not None else None)
+        if delay is None:
+            break
+        time.sleep(delay)
+    return None
+
+
+def probe_value(
+        session: requests.Session, endpoint: str, api_key: str, param: str, value: Any, policy: RetryPolicy
+) -> dict | None:
+    """Send one probe; returns {"accepted": bool, "choices": int}, or None when the outcome is unknown."""
+    request_data = {"messages": PROBE_MESSAGES, "max_tokens": 1, param: value}
+    response = _post(session, endpoint, api_key, request_data, policy)
+    if response is None:
+        return None
+    if response.status_code in REJECTED_STATUSES:
+        return {"accepted": False, "choices": 0}
+    if response.status_code != 200:
+        return None
+    return {"accepted": True, "choices": len(response.json().get("choices", []))}
+
+
+def summarize(param: str, outcomes: list[tuple[Any, dict]]) -> ParamCapability | None:
+    """Turn the (value, outcome) probes of one param into its capability (None if no probe got an answer)."""
+    if not outcomes:
+        return None
+    accepted = [(value, outcome) for value, outcome in outcomes if outcome["accepted"]]
+    if not accepted:
+        return ParamCapability(supported=False)
+    capability = ParamCapability(supported=True)
+    if param == "n":
+        capability.native = all(outcome["choices"] >= value for value, outcome in accepted)
+        return capability
+    numeric = [v for v, _ in accepted if isinstance(v, (int, float)) and not isinstance(v, bool)]
+    if len(numeric) > 1:
+        capability.minimum, capability.maximum = min(numeric), max(numeric)
+    return capability
+
+
+def probe(
+        models: list[str],
+        endpoint: str = DIAL_ENDPOINT,
+        probes: dict[str, list[Any]] | None = None,
+        max_workers: int = 16,
+        policy: RetryPolicy | None = None,
+) -> CapabilityMatrix:
+    """Probe every (model, param, value) concurrently and build the capability matrix."""
+    api_key = os.getenv("DIAL_API_KEY", "")
+    if not api_key.strip():
+        raise ValueError("API key cannot be null or empty")
+    probes = probes if probes is not None else PROBES
+    policy = policy or RetryPolicy()
+    jobs = [(model, param, value) for model in models for param, values in probes.items() for value in values]
+    pool = POOLS.acquire(endpoint.format(model=models[0]), pool_maxsize=max_workers)
+
+    def _run(job: tuple[str, str, Any]) -> dict | None:
+        model, param, value = job
+        return probe_value(pool.session(), endpoint.format(model=model), api_key, param, value, policy)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="probe") as executor:
+            outcomes = list(executor.map(_run, jobs))
+    finally:
+        POOLS.release(pool)
+
+    found: dict[tuple[str, str], list[tuple[Any, dict]]] = {}
+    for (model, param, value), outcome in zip(jobs, outcomes):
+        if outcome is not None:
+            found.setdefault((model, param), []).append((value, outcome))
+    matrix = CapabilityMatrix(probed_at=time.time())
+    for model in models:
+        params = {param: summarize(param, found.get((model, param), [])) for param in probes}
+        matrix.deployments[model] = {param: cap for param, cap in params.items() if cap is not None}
+    return matrix
+
+
+def available_models() -> list[str]:
+    """Chat deployments from the models API, or from `available_models.txt` when the API is unavailable."""
+    from get_available_models import get_available_models
+
+    data = get_available_models()
+    if data:
+        names = [model["id"] for model in data.get("data", []) if model.get("id")]
+    else:
+        with open("available_models.txt", "r", encoding="utf-8") as f:
+            names = [line.strip() for line in f if line.strip()]
+    return [name for name in names if "embedding" not in name]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--models", help="Comma separated deployments (default: every available model)")
+    parser.add_argument("--output", default=DEFAULT_MATRIX_PATH)
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    models = args.models.split(",") if args.models else available_models()
+    started = time.perf_counter()
+    matrix = probe(models, max_workers=args.workers)
+    matrix.save(args.output)
+    print(f"Probed {len(models)} deployments in {time.perf_counter() - started:.1f}s, saved to {args.output}")
+    for model, params in matrix.deployments.items():
+        rejected = sorted(param for param, capability in params.items() if not capability.supported)
+        print(f"- {model}: rejects {', '.join(rejected) or 'nothing'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+import asyncio
+import hashlib
+import threading
+import time
+
+from task.app.tokens import estimate_tokens
+
+DEFAULT_COMPLETION_TOKENS = 256
+
+
+class TokenBucket:
+    """
+    Token bucket that hands out reservations.
+
+    `reserve` always succeeds and returns how long the caller must wait before using the
+    reservation; the bucket may go into debt, so requests larger than the capacity still
+    get through once enough has refilled, and callers are served in arrival order.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        self._refill(now)
+        self._tokens -= amount
+        if self._tokens >= 0:
+            return 0.0
+        return -self._tokens / self.refill_per_second
+
+    def give_back(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self._tokens = min(self.capacity, self._tokens + amount)
+
+    @property
+    def available(self) -> float:
+        self._refill(time.monotonic())
+        return self._tokens
+
+
+class Reservation:
+    """Capacity taken from one or more limiters for a single request."""
+
+    def __init__(self, limiters: list["RateLimiter"], tokens: int, wait: float):
+        self.limiters = limiters
+        self.tokens = tokens
+        self.wait = wait
+
+    def reconcile(self, actual_tokens: int | None) -> None:
+        """Correct the token estimate with the `usage.total_tokens` the server reported."""
+        if actual_tokens is None:
+            return
+        for limiter in self.limiters:
+            limiter.adjust_tokens(self.tokens - actual_tokens)
+        self.tokens = actual_tokens
+
+    def cancel(self) -> None:
+        """Return the capacity of a request that was rejected before it used any (e.g. a 429)."""
+        for limiter in self.limiters:
+            limiter.release(self.tokens)
+        self.tokens = 0
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limits, safe to share between threads and asyncio tasks.
+
+    By default a whole minute's quota may be spent in a burst, like the server allows;
+    `burst` (a fraction of the per-minute limit) smooths the traffic instead.
+    """
+
+    def __init__(
+            self,
+            requests_per_minute: float | None = None,
+            tokens_per_minute: float | None = None,
+            burst: float = 1.0,
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = None
+        self._tokens = None
+        if requests_per_minute:
+            self._requests = TokenBucket(max(1.0, requests_per_minute * burst), requests_per_minute / 60)
+        if tokens_per_minute:
+            self._tokens = TokenBucket(max(1.0, tokens_per_minute * burst), tokens_per_minute / 60)
+        self._lock = threading.Lock()
+        self.waited = 0.0
+
+    def reserve(self, tokens: int) -> float:
+        """Take capacity for one request of `tokens` estimated tokens and return the seconds to wait."""
+        now = time.monotonic()
+        with self._lock:
+            wait = 0.0
+            if self._requests is not None:
+                wait = max(wait, self._requests.reserve(1, now))
+            if self._tokens is not None:
+                wait = max(wait, self._tokens.reserve(tokens, now))
+            self.waited += wait
+            return wait
+
+    def adjust_tokens(self, delta: float) -> None:
+        if self._tokens is None or not delta:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if delta > 0:
+                self._tokens.give_back(delta, now)
+            else:
+                self._tokens.reserve(-delta, now)
+
+    def release(self, tokens: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if self._requests is not None:
+                self._requests.give_back(1, now)
+            if self._tokens is not None:
+                self._tokens.give_back(tokens, now)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests_per_minute": self.requests_per_minute,
+                "tokens_per_minute": self.tokens_per_minute,
+                "requests_available": round(self._requests.available, 2) if self._requests else None,
+                "tokens_available": round(self._tokens.available, 2) if self._tokens else None,
+                "seconds_waited": round(self.waited, 3),
+            }
+
+
+def estimate_prompt_tokens(request_data: dict) -> int:
+    return sum(estimate_tokens(m.get("content") or "") for m in request_data.get("messages", []))
+
+
+def estimate_request_tokens(request_data: dict) -> int:
+    """Prompt size plus the completion budget (`max_tokens`, or a default) for every choice."""
+    prompt = estimate_prompt_tokens(request_data)
+    completion = request_data.get("max_tokens") or DEFAULT_COMPLETION_TOKENS
+    return prompt + completion * (request_data.get("n") or 1)
+
+
+def _key_id(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+class RateLimitRegistry:
+    """
+    Limits configured per API key, optionally narrowed to a deployment.
+
+    A key-wide limit applies to the sum of all deployments used with that key; a
+    deployment limit applies to that deployment only. A request waits for both.
+    Nothing is limited until `configure` is called.
+    """
+
+    def __init__(self):
+        self._limiters: dict[tuple[str, str | None], RateLimiter] = {}
+        self._lock = threading.Lock()
+
+    def configure(
+            self,
+            api_key: str,
+            requests_per_minute: float | None = None,
+            tokens_per_minute: float | None = None,
+            deployment_name: str | None = None,
+            burst: float = 1.0,
+    ) -> RateLimiter:
+        limiter = RateLimiter(requests_per_minute, tokens_per_minute, burst)
+        with self._lock:
+            self._limiters[(_key_id(api_key), deployment_name)] = limiter
+        return limiter
+
+    def limiters_for(self, api_key: str, deployment_name: str) -> list[RateLimiter]:
+        key_id = _key_id(api_key)
+        with self._lock:
+            return [
+                limiter for limiter in (self._limiters.get((key_id, None)), self._limiters.get((key_id, deployment_name)))
+                if limiter is not None
+            ]
+
+    def reserve(self, api_key: str, deployment_name: str, tokens: int) -> Reservation | None:
+        limiters = self.limiters_for(api_key, deployment_name)
+        if not limiters:
+            return None
+        return Reservation(limiters, tokens, max(limiter.reserve(tokens) for limiter in limiters))
+
+    def acquire(self, api_key: str, deployment_name: str, tokens: int) -> Reservation | None:
+        """Block until the request may be sent."""
+        reservation = self.reserve(api_key, deployment_name, tokens)
+        if reservation is not None and reservation.wait > 0:
+            time.sleep(reservation.wait)
+        return reservation
+
+    async def acquire_async(self, api_key: str, deployment_name: str, tokens: int) -> Reservation | None:
+        """Await until the request may be sent, without blocking the event loop."""
+        reservation = self.reserve(api_key, deployment_name, tokens)
+        if reservation is not None and reservation.wait > 0:
+            await asyncio.sleep(reservation.wait)
+        return reservation
+
+    def clear(self) -> None:
+        with self._lock:
+            self._limiters.clear()
+
+    def stats(self) -> dict[str, dict]:
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {
+            f"{key_id}/{deployment or '*'}": limiter.stats() for (key_id, deployment), limiter in limiters.items()
+        }
+
+
+RATE_LIMITS = RateLimitRegistry()
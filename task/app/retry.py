@@ -0,0 +1,126 @@
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Mapping
+
+RETRYABLE_STATUSES = frozenset({408, 429, 502, 503, 504})
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+def _parse_duration(value: str) -> float | None:
+    """Parse `1.5`, `200ms`, `6m0s` style durations into seconds."""
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts or "".join(n + u for n, u in parts) != value:
+        return None
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> float | None:
+    """
+    Seconds the server asks us to wait, from `Retry-After` or rate-limit reset headers.
+
+    Understands `Retry-After` as seconds or an HTTP date, and the OpenAI-style
+    `x-ratelimit-reset-requests` / `x-ratelimit-reset-tokens` durations (the longer wins).
+    """
+    headers = {k.lower(): v for k, v in headers.items()}
+    retry_after = headers.get("retry-after")
+    if retry_after:
+        seconds = _parse_duration(retry_after)
+        if seconds is not None:
+            return seconds
+        try:
+            return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+        except (TypeError, ValueError):
+            pass
+    resets = [
+        _parse_duration(headers[name])
+        for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens", "x-ratelimit-reset")
+        if name in headers
+    ]
+    resets = [r for r in resets if r is not None]
+    return max(resets) if resets else None
+
+
+@dataclass
+class RetryPolicy:
+    """
+    When and how long to wait before re-sending a failed request.
+
+    Only statuses that mean "try again later" are retried (408, 429, 502, 503, 504) plus
+    connection failures; 4xx errors caused by the request itself and 500 are not.
+    Delays use exponential backoff with full jitter, unless the server said how long to
+    wait - a hint longer than `max_retry_after` ends the retries instead.
+    """
+    max_attempts: int = 4
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+    max_retry_after: float = 60.0
+    retry_statuses: frozenset[int] = RETRYABLE_STATUSES
+    retry_connection_errors: bool = True
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def delay(self, attempt: int, headers: Mapping[str, str] | None = None) -> float | None:
+        """Seconds to wait before the next attempt, or None if the server hint is too long to wait."""
+        hint = parse_retry_after(headers) if headers else None
+        if hint is None:
+            return self.backoff(attempt)
+        if hint > self.max_retry_after:
+            return None
+        return hint + random.uniform(0, self.base_delay)
+
+
+NO_RETRY = RetryPolicy(max_attempts=1)
+
+
+class RetryBudget:
+    """
+    Caps retries to a fraction of the traffic so they cannot multiply load during an outage.
+
+    Every request deposits `ratio` tokens and every retry spends one; a retry is only
+    allowed while at least one token is available. The budget starts with (and never
+    holds more than) `max_tokens`, which lets a quiet client retry a short burst of errors.
+    """
+
+    def __init__(self, ratio: float = 0.2, max_tokens: float = 10.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.exhausted = 0
+
+    def on_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                self.exhausted += 1
+                return False
+            self._tokens -= 1
+            self.retries += 1
+            return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "budget_exhausted": self.exhausted,
+                "tokens": round(self._tokens, 2),
+            }
@@ -0,0 +1,197 @@
+import random
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+
+from task.app.breaker import BREAKERS, BreakerRegistry, BreakerState
+from task.app.capabilities import OPENAI_ONLY_PARAMS, CapabilityMatrix, model_family, supports_param, vendor
+from task.app.discovery import ModelCatalog
+from task.app.errors import DialError
+from task.app.ratelimit import DEFAULT_COMPLETION_TOKENS
+from task.constants import DIAL_ENDPOINT
+
+
+class NoRouteError(DialError):
+    """No candidate deployment satisfies the routing constraints."""
+
+
+@dataclass
+class RouteConstraints:
+    """
+    required_params: params the deployment must honour natively (params of the request are added)
+    max_latency: skip deployments whose observed p95 latency is above this many seconds
+    family: only route to this model family (`gpt-4o`) or vendor (`anthropic`)
+    """
+    required_params: frozenset[str] = field(default_factory=frozenset)
+    max_latency: float | None = None
+    family: str | None = None
+
+
+class DeploymentStats:
+    """Rolling latency, error-rate and throughput statistics of one deployment."""
+
+    def __init__(self, window: int = 50):
+        self._calls: deque[tuple[bool, float]] = deque(maxlen=window)
+        self._throughput: deque[tuple[int, float]] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record_call(self, success: bool, latency: float) -> None:
+        with self._lock:
+            self._calls.append((success, latency))
+
+    def record_throughput(self, completion_tokens: int, seconds: float) -> None:
+        if completion_tokens and seconds > 0:
+            with self._lock:
+                self._throughput.append((completion_tokens, seconds))
+
+    @property
+    def calls(self) -> int:
+        return len(self._calls)
+
+    def error_rate(self) -> float:
+        with self._lock:
+            calls = list(self._calls)
+        return sum(1 for success, _ in calls if not success) / len(calls) if calls else 0.0
+
+    def latency(self, q: float = 0.5) -> float | None:
+        with self._lock:
+            latencies = sorted(latency for success, latency in self._calls if success)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+    def tokens_per_second(self) -> float | None:
+        with self._lock:
+            tokens = sum(t for t, _ in self._throughput)
+            seconds = sum(s for _, s in self._throughput)
+        return tokens / seconds if seconds else None
+
+    def snapshot(self) -> dict:
+        tps = self.tokens_per_second()
+        p50, p95 = self.latency(0.5), self.latency(0.95)
+        return {
+            "calls": self.calls,
+            "error_rate": round(self.error_rate(), 3),
+            "latency_p50": round(p50, 3) if p50 is not None else None,
+            "latency_p95": round(p95, 3) if p95 is not None else None,
+            "tokens_per_second": round(tps, 1) if tps is not None else None,
+        }
+
+
+class Router:
+    """
+    Picks the deployment expected to answer a request fastest.
+
+    Candidates that miss a constraint, or whose circuit breaker is open, are skipped. The
+    rest are ranked by the time they are expected to need for the request - the
+    completion tokens it may produce divided by the observed tokens/second, or the p50
+    latency while no throughput is known - divided by their success rate, so a fast
+    deployment that keeps failing loses to a slower reliable one. Deployments with fewer
+    than `min_samples` calls are tried first, and `explore` is the chance of picking a
+    random eligible deployment to keep everyone's statistics fresh.
+
+    Probed capabilities, when given, take precedence over the built-in per-vendor rules.
+    Pass a Router as the `deployment_name` of a DialClient to route every call.
+    """
+
+    def __init__(
+            self,
+            candidates: list[str],
+            constraints: RouteConstraints | None = None,
+            min_samples: int = 3,
+            explore: float = 0.05,
+            window: int = 50,
+            breakers: BreakerRegistry | None = BREAKERS,
+            capabilities: CapabilityMatrix | None = None,
+    ):
+        if not candidates:
+            raise ValueError("At least one candidate deployment is required")
+        self.candidates = list(candidates)
+        self.constraints = constraints or RouteConstraints()
+        self.min_samples = min_samples
+        self.explore = explore
+        self._breakers = breakers
+        self._capabilities = capabilities
+        self._stats = {name: DeploymentStats(window) for name in candidates}
+
+    @classmethod
+    def from_catalog(cls, catalog: ModelCatalog, **kwargs) -> "Router":
+        """Route between every chat deployment of the cached model listing (no network call while it is cached)."""
+        return cls(catalog.chat_models(), **kwargs)
+
+    def eligible(
+            self,
+            request_data: dict | None = None,
+            constraints: RouteConstraints | None = None,
+            endpoint: str | None = None,
+    ) -> list[str]:
+        """
+        Candidates that satisfy the constraints, in order.
+
+        `endpoint` is the completion URL template the request goes to, whose circuit
+        breakers are checked (DIAL_ENDPOINT when None).
+        """
+        endpoint = endpoint or DIAL_ENDPOINT
+        constraints = constraints or self.constraints
+        params = request_data or {}
+        required = set(constraints.required_params) | {p for p in OPENAI_ONLY_PARAMS - {"n"} if p in params}
+        eligible = []
+        for name in self.candidates:
+            if constraints.family and constraints.family.lower() not in (model_family(name), vendor(name)):
+                continue
+            if not all(self._supports(name, param) for param in required):
+                continue
+            if constraints.max_latency is not None:
+                p95 = self._stats[name].latency(0.95)
+                if p95 is not None and p95 > constraints.max_latency:
+                    continue
+            if self._breakers is not None and self._circuit_open(name, endpoint.format(model=name)):
+                continue
+            eligible.append(name)
+        return eligible
+
+    def _supports(self, name: str, param: str) -> bool:
+        probed = self._capabilities.supports(name, param) if self._capabilities is not None else None
+        return supports_param(name, param) if probed is None else probed
+
+    def _circuit_open(self, name: str, endpoint: str) -> bool:
+        snapshot = self._breakers.get(name, endpoint).snapshot()
+        return snapshot["state"] == BreakerState.OPEN and snapshot["retry_in"] > 0
+
+    def select(
+            self,
+            request_data: dict | None = None,
+            constraints: RouteConstraints | None = None,
+            endpoint: str | None = None,
+    ) -> str:
+        """Name of the deployment to send `request_data` to; raises NoRouteError if none qualifies."""
+        eligible = self.eligible(request_data, constraints, endpoint)
+        if not eligible:
+            raise NoRouteError(f"No deployment among {self.candidates} satisfies {constraints or self.constraints}")
+        unexplored = [name for name in eligible if self._stats[name].calls < self.min_samples]
+        if unexplored:
+            return unexplored[0]
+        if random.random() < self.explore:
+            return random.choice(eligible)
+        return min(eligible, key=lambda name: self.expected_seconds(name, request_data or {}))
+
+    def expected_seconds(self, name: str, request_data: dict) -> float:
+        stats = self._stats[name]
+        completion_tokens = (request_data.get("max_tokens") or DEFAULT_COMPLETION_TOKENS) * (request_data.get("n") or 1)
+        tps = stats.tokens_per_second()
+        seconds = completion_tokens / tps if tps else stats.latency(0.5)
+        if seconds is None:
+            # only failures so far
+            return float("inf")
+        return seconds / max(0.05, 1 - stats.error_rate())
+
+    def record_call(self, name: str, success: bool, latency: float) -> None:
+        if name in self._stats:
+            self._stats[name].record_call(success, latency)
+
+    def record_throughput(self, name: str, completion_tokens: int | None, seconds: float) -> None:
+        if name in self._stats and completion_tokens:
+            self._stats[name].record_throughput(completion_tokens, seconds)
+
+    def stats(self) -> dict[str, dict]:
+        return {name: stats.snapshot() for name, stats in self._stats.items()}
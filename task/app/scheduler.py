@@ -0,0 +1,133 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import Iterator
+
+
+class Priority(StrEnum):
+    INTERACTIVE = "interactive"
+    DEFAULT = "default"
+    BATCH = "batch"
+
+
+@dataclass
+class ClassConfig:
+    """
+    weight: share of the slots the class gets while every class has requests waiting
+    max_concurrency: requests of this class in flight at once (None: only the scheduler total applies)
+    """
+    weight: float = 1.0
+    max_concurrency: int | None = None
+
+
+DEFAULT_CLASSES = {
+    Priority.INTERACTIVE: ClassConfig(weight=8.0),
+    Priority.DEFAULT: ClassConfig(weight=4.0),
+    Priority.BATCH: ClassConfig(weight=1.0, max_concurrency=24),
+}
+
+
+class _Ticket:
+    __slots__ = ("start", "finish", "granted", "enqueued")
+
+    def __init__(self, start: float, finish: float):
+        self.start = start
+        self.finish = finish
+        self.granted = threading.Event()
+        self.enqueued = time.perf_counter()
+
+
+class _Class:
+    def __init__(self, config: ClassConfig):
+        self.config = config
+        self.queue: deque[_Ticket] = deque()
+        self.in_flight = 0
+        self.last_finish = 0.0
+        self.dispatched = 0
+        self.waited = 0.0
+        self.max_wait = 0.0
+
+    def has_capacity(self) -> bool:
+        return self.config.max_concurrency is None or self.in_flight < self.config.max_concurrency
+
+
+class Scheduler:
+    """
+    Weighted fair queuing of requests over a fixed number of concurrent slots.
+
+    A request waits in the queue of its priority class until a slot is free. Queued
+    requests are tagged with a virtual finish time that advances by `1 / weight` per
+    request of their class, and the free slot goes to the smallest tag among classes below
+    their own `max_concurrency` - so when everything is busy interactive requests get 8
+    slots for every 4 default and 1 batch request, and a backlog of batch calls never
+    delays an interactive call by more than one slot. With the default classes batch work
+    can never take more than 24 of the 32 slots, which keeps room for interactive calls.
+    """
+
+    def __init__(self, max_concurrency: int = 32, classes: dict[Priority, ClassConfig] | None = None):
+        self.max_concurrency = max_concurrency
+        self._classes = {priority: _Class(config) for priority, config in (classes or DEFAULT_CLASSES).items()}
+        self._in_flight = 0
+        self._virtual_time = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, priority: Priority = Priority.DEFAULT) -> None:
+        """Block until a slot is granted to a request of class `priority`."""
+        cls = self._classes[priority]
+        with self._lock:
+            start = max(self._virtual_time, cls.last_finish)
+            ticket = _Ticket(start, start + 1.0 / cls.config.weight)
+            cls.last_finish = ticket.finish
+            cls.queue.append(ticket)
+            self._dispatch()
+        ticket.granted.wait()
+
+    def release(self, priority: Priority = Priority.DEFAULT) -> None:
+        with self._lock:
+            self._classes[priority].in_flight -= 1
+            self._in_flight -= 1
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, priority: Priority = Priority.DEFAULT) -> Iterator[None]:
+        self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    def _dispatch(self) -> None:
+        while self._in_flight < self.max_concurrency:
+            ready = [cls for cls in self._classes.values() if cls.queue and cls.has_capacity()]
+            if not ready:
+                return
+            cls = min(ready, key=lambda c: c.queue[0].finish)
+            ticket = cls.queue.popleft()
+            self._virtual_time = max(self._virtual_time, ticket.start)
+            cls.in_flight += 1
+            self._in_flight += 1
+            waited = time.perf_counter() - ticket.enqueued
+            cls.dispatched += 1
+            cls.waited += waited
+            cls.max_wait = max(cls.max_wait, waited)
+            ticket.granted.set()
+
+    def stats(self) -> dict[str, dict]:
+        """Queue length, slots in use and queueing delay of every class."""
+        with self._lock:
+            return {
+                priority.value: {
+                    "waiting": len(cls.queue),
+                    "in_flight": cls.in_flight,
+                    "dispatched": cls.dispatched,
+                    "wait_avg": round(cls.waited / cls.dispatched, 4) if cls.dispatched else 0.0,
+                    "wait_max": round(cls.max_wait, 4),
+                }
+                for priority, cls in self._classes.items()
+            }
+
+
+SCHEDULER = Scheduler()
@@ -0,0 +1,436 @@
+"""
+Local stand-in for the DIAL API, for offline tests, benchmarks and load tests.
+
+    python -m task.app.standin --port 8080 --latency lognormal:0.4:0.5 --rate-429 0.05
+
+Serves `/openai/deployments/{model}/chat/completions` (JSON and SSE streaming, `n`,
+`max_tokens`, `stop`, `seed`, `usage`, `finish_reason`) and `/openai/models`, and can
+inject latency, 429 / 5xx errors, slow-drip streams and connection resets. Point the
+tasks at it with `DIAL_ENDPOINT=http://127.0.0.1:8080/openai/deployments/{model}/chat/completions`.
+"""
+import argparse
+import hashlib
+import json
+import random
+import socket
+import struct
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from enum import StrEnum
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+from task.app.capabilities import supports_n
+from task.app.tokens import estimate_tokens
+
+WORDS = (
+    "the model answers with short plain sentences about language models tokens sampling temperature "
+    "context prompts and responses while the proxy routes every request to a deployment that streams "
+    "text back one chunk at a time until it reaches a stop sequence or the token limit"
+).split()
+
+DEFAULT_MODELS = [
+    "gpt-4o",
+    "gpt-4o-2024-08-06",
+    "gpt-4o-2024-11-20",
+    "gpt-4o-mini-2024-07-18",
+    "claude-3-5-haiku@20241022",
+    "claude-3-7-sonnet@20250219",
+    "gemini-2.0-flash",
+    "gemini-2.0-flash-lite",
+]
+
+
+class Distribution(StrEnum):
+    CONSTANT = "constant"
+    UNIFORM = "uniform"
+    LOGNORMAL = "lognormal"
+    EXPONENTIAL = "exponential"
+
+
+@dataclass
+class LatencyModel:
+    """
+    distribution: shape of the delay
+    mean: constant value, centre of the uniform range, median of the lognormal or mean of the exponential
+    spread: half-width of the uniform range or sigma of the lognormal
+    """
+    distribution: Distribution = Distribution.CONSTANT
+    mean: float = 0.0
+    spread: float = 0.0
+
+    def sample(self, rng: random.Random) -> float:
+        if self.distribution == Distribution.UNIFORM:
+            return max(0.0, rng.uniform(self.mean - self.spread, self.mean + self.spread))
+        if self.distribution == Distribution.LOGNORMAL:
+            return self.mean * rng.lognormvariate(0, self.spread) if self.mean else 0.0
+        if self.distribution == Distribution.EXPONENTIAL:
+            return rng.expovariate(1 / self.mean) if self.mean else 0.0
+        return self.mean
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        """`0.2`, `uniform:0.5:0.1`, `lognormal:0.4:0.6` or `exponential:0.3`."""
+        parts = spec.split(":")
+        if len(parts) == 1:
+            return cls(Distribution.CONSTANT, float(parts[0]))
+        return cls(Distribution(parts[0]), *(float(p) for p in parts[1:]))
+
+
+@dataclass
+class StandInConfig:
+    """
+    latency: delay before the response headers (time to first byte)
+    token_interval: delay between streamed chunks
+    rate_429 / rate_5xx: share of completion requests answered with 429 / 500, 502 or 503
+    retry_after: `Retry-After` seconds sent with 429s (None: no header)
+    slow_drip_rate: share of streams whose chunks are sent `slow_drip_interval` seconds apart
+    reset_rate: share of completion requests whose connection is reset before the response is complete
+    words: (min, max) words generated per choice when `max_tokens` does not cut it short
+    """
+    latency: LatencyModel = field(default_factory=LatencyModel)
+    token_interval: float = 0.0
+    rate_429: float = 0.0
+    rate_5xx: float = 0.0
+    retry_after: float | None = 1.0
+    slow_drip_rate: float = 0.0
+    slow_drip_interval: float = 0.5
+    reset_rate: float = 0.0
+    words: tuple[int, int] = (20, 60)
+
+
+def generate(model: str, request_data: dict, index: int, words: tuple[int, int] = (20, 60)) -> tuple[str, str, int]:
+    """
+    Text, finish_reason and completion tokens of one choice.
+
+    With a `seed` or `temperature=0` the text depends only on the request, like a
+    deterministic deployment; otherwise every call differs.
+    """
+    if request_data.get("seed") is not None or request_data.get("temperature") == 0:
+        digest = hashlib.sha256(json.dumps(
+            [model, request_data.get("messages"), request_data.get("seed"), index], sort_keys=True
+        ).encode()).digest()
+        rng = random.Random(digest)
+    else:
+        rng = random.Random()
+    count = rng.randint(*words)
+    finish_reason = "stop"
+    max_tokens = request_data.get("max_tokens")
+    if max_tokens is not None and max_tokens < count:
+        count, finish_reason = max_tokens, "length"
+    text = " ".join(rng.choice(WORDS) for _ in range(count)).capitalize() + ("." if finish_reason == "stop" else "")
+    stop = request_data.get("stop")
+    stops = [stop] if isinstance(stop, str) else [s for s in (stop or []) if s]
+    hits = [i for i in (text.find(s) for s in stops) if i != -1]
+    if hits:
+        text, finish_reason = text[:min(hits)], "stop"
+    return text, finish_reason, len(text.split())
+
+
+def completion(model: str, request_data: dict, words: tuple[int, int] = (20, 60)) -> dict:
+    """OpenAI-shaped chat completion; deployments without native `n` return a single choice."""
+    n = request_data.get("n") or 1
+    if not supports_n(model):
+        n = 1
+    choices, completion_tokens = [], 0
+    for i in range(n):
+        text, finish_reason, tokens = generate(model, request_data, i, words)
+        completion_tokens += tokens
+        choices.append({"index": i, "finish_reason": finish_reason, "message": {"role": "assistant", "content": text}})
+    prompt_tokens = sum(estimate_tokens(m.get("content") or "") for m in request_data.get("messages", []))
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": choices,
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def stream_events(data: dict) -> list[bytes]:
+    """Split a completion into `chat.completion.chunk` server-sent events, one word per chunk and choice."""
+    base = {"id": data["id"], "object": "chat.completion.chunk", "created": data["created"], "model": data["model"]}
+    events = [{**base, "choices": [{"index": c["index"], "delta": {"role": "assistant"}} for c in data["choices"]]}]
+    pieces = {c["index"]: _pieces(c["message"]["content"]) for c in data["choices"]}
+    for step in range(max((len(p) for p in pieces.values()), default=0)):
+        deltas = [
+            {"index": index, "delta": {"content": p[step]}}
+            for index, p in pieces.items() if step < len(p)
+        ]
+        events.append({**base, "choices": deltas})
+    events.append({
+        **base,
+        "choices": [{"index": c["index"], "delta": {}, "finish_reason": c["finish_reason"]} for c in data["choices"]],
+        "usage": data["usage"],
+    })
+    return [f"data: {json.dumps(event)}\n\n".encode() for event in events] + [b"data: [DONE]\n\n"]
+
+
+def _pieces(text: str) -> list[str]:
+    words = text.split(" ")
+    return [words[0]] + [" " + word for word in words[1:]] if text else []
+
+
+Handler = Callable[[str, dict], tuple[int, dict, dict | bytes | list]]
+
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    Keep-alive HTTP/1.1 server answering like the DIAL API.
+
+    Set `handler` to take over routing: it receives (path, request_data) - the request
+    headers for GETs - and returns (status, headers, body) where body is a dict (sent as
+    JSON), bytes, or a list of bytes chunks sent with chunked transfer encoding (a float
+    in the list sleeps that many seconds). `requests` records every (path, data) received.
+    """
+    daemon_threads = True
+    # socketserver listens with a backlog of 5; a burst of new connections beyond it waits for a SYN retransmit
+    request_queue_size = 128
+
+    def __init__(
+            self,
+            host: str = "127.0.0.1",
+            port: int = 0,
+            config: StandInConfig | None = None,
+            models: list[str] | None = None,
+            handler: Handler | None = None,
+            seed: int | None = None,
+    ):
+        super().__init__((host, port), _StandInHandler)
+        self.config = config or StandInConfig()
+        self.models = list(models or DEFAULT_MODELS)
+        self.handler = handler
+        self.requests: list[tuple[str, dict]] = []
+        self.connections = 0
+        self.faults = {"429": 0, "5xx": 0, "reset": 0, "slow_drip": 0}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def endpoint(self) -> str:
+        return f"{self.base_url}/openai/deployments/{{model}}/chat/completions"
+
+    def start(self) -> "StandInServer":
+        """Serve on a daemon thread and return at once."""
+        self._thread = threading.Thread(target=self.serve_forever, name="dial-standin", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+    def chance(self, rate: float) -> bool:
+        if rate <= 0:
+            return False
+        with self._lock:
+            return self._rng.random() < rate
+
+    def sample_latency(self) -> float:
+        with self._lock:
+            return self.config.latency.sample(self._rng)
+
+    def count_fault(self, kind: str) -> None:
+        with self._lock:
+            self.faults[kind] += 1
+
+    def models_listing(self) -> dict:
+        return {"data": [
+            {
+                "id": name,
+                "model": name,
+                "object": "model",
+                "owner": "organization-owner",
+                "lifecycle_status": "generally-available",
+                "capabilities": {"chat_completion": True, "embeddings": False},
+            }
+            for name in self.models
+        ]}
+
+    def route(self, method: str, path: str, data: dict) -> tuple[int, dict, dict | bytes | list] | None:
+        """Built-in DIAL behaviour; None means the connection must be reset."""
+        if method == "GET":
+            if path.rstrip("/") != "/openai/models":
+                return 404, {}, {"error": {"message": f"Unknown path {path}"}}
+            listing = self.models_listing()
+            etag = '"' + hashlib.sha256(json.dumps(listing).encode()).hexdigest()[:16] + '"'
+            if data.get("If-None-Match") == etag:
+                return 304, {"ETag": etag}, b""
+            return 200, {"ETag": etag}, listing
+
+        parts = path.strip("/").split("/")
+        if len(parts) != 5 or parts[:2] != ["openai", "deployments"] or parts[3:] != ["chat", "completions"]:
+            return 404, {}, {"error": {"message": f"Unknown path {path}"}}
+        model = parts[2]
+        if model not in self.models:
+            return 404, {}, {"error": {"message": f"Deployment {model} not found"}}
+        if not data.get("messages"):
+            return 400, {}, {"error": {"message": "messages is required"}}
+
+        config = self.config
+        time.sleep(self.sample_latency())
+        if self.chance(config.rate_429):
+            self.count_fault("429")
+            headers = {"Retry-After": f"{config.retry_after:g}"} if config.retry_after is not None else {}
+            return 429, headers, {"error": {"message": "Rate limit exceeded", "code": "429"}}
+        if self.chance(config.rate_5xx):
+            self.count_fault("5xx")
+            with self._lock:
+                status = self._rng.choice([500, 502, 503])
+            return status, {}, {"error": {"message": "Upstream failure"}}
+        if self.chance(config.reset_rate):
+            self.count_fault("reset")
+            return None
+
+        body = completion(model, data, config.words)
+        if not data.get("stream"):
+            return 200, {}, body
+        interval = config.token_interval
+        if self.chance(config.slow_drip_rate):
+            self.count_fault("slow_drip")
+            interval = config.slow_drip_interval
+        chunks: list = []
+        for event in stream_events(body):
+            if interval and chunks:
+                chunks.append(float(interval))
+            chunks.append(event)
+        return 200, {"Content-Type": "text/event-stream"}, chunks
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body are separate writes; with Nagle on, the body waits ~40ms for the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server._lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        self._respond("GET", dict(self.headers))
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            data = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send(400, {}, {"error": {"message": "Invalid JSON"}})
+            return
+        self._respond("POST", data)
+
+    def _respond(self, method: str, data: dict):
+        with self.server._lock:
+            self.server.requests.append((self.path, data))
+        if self.server.handler is not None:
+            result = self.server.handler(self.path, data)
+        elif not self.headers.get("api-key"):
+            result = 401, {}, {"error": {"message": "Missing api-key header"}}
+        else:
+            result = self.server.route(method, self.path, data)
+        if result is None:
+            self._reset()
+            return
+        self._send(*result)
+
+    def _send(self, status: int, headers: dict, body):
+        if isinstance(body, list):
+            self._send_chunked(status, headers, body)
+            return
+        payload = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", headers.pop("Content-Type", "application/json"))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_chunked(self, status, headers, chunks):
+        self.send_response(status)
+        self.send_header("Content-Type", headers.pop("Content-Type", "text/event-stream"))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, float):
+                    time.sleep(chunk)
+                    continue
+                self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def _reset(self):
+        """Close the socket with a TCP RST instead of a response."""
+        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+        self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", default="0", help="0.2, uniform:0.5:0.1, lognormal:0.4:0.6 or exponential:0.3")
+    parser.add_argument("--token-interval", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--rate-5xx", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--slow-drip-rate", type=float, default=0.0)
+    parser.add_argument("--slow-drip-interval", type=float, default=0.5)
+    parser.add_argument("--reset-rate", type=float, default=0.0)
+    parser.add_argument("--models", help="File with one deployment name per line (default: a built-in list)")
+    parser.add_argument("--seed", type=int, help="Seed of the fault injection, for repeatable runs")
+    args = parser.parse_args()
+
+    models = None
+    if args.models:
+        with open(args.models, "r", encoding="utf-8") as f:
+            models = [line.strip() for line in f if line.strip()]
+    config = StandInConfig(
+        latency=LatencyModel.parse(args.latency),
+        token_interval=args.token_interval,
+        rate_429=args.rate_429,
+        rate_5xx=args.rate_5xx,
+        retry_after=args.retry_after,
+        slow_drip_rate=args.slow_drip_rate,
+        slow_drip_interval=args.slow_drip_interval,
+        reset_rate=args.reset_rate,
+    )
+    server = StandInServer(args.host, args.port, config=config, models=models, seed=args.seed)
+    print(f"DIAL stand-in listening on {server.endpoint}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+import json
+import time
+from typing import Callable, Iterable, Iterator
+
+import requests
+
+from task.app.observers import ClientObserver, ErrorEvent, ResponseEvent, StreamChunkEvent, notify
+from task.app.ratelimit import Reservation
+from task.app.tokens import estimate_tokens
+from task.models.message import Message
+from task.models.role import Role
+
+
+def iter_sse_data(lines: Iterable[bytes | str]) -> Iterator[str]:
+    """
+    Yield the `data:` payload of every server-sent event until `[DONE]`.
+
+    Multi-line events are joined with newlines, comments (`:`) and other fields are skipped.
+    """
+    data_lines: list[str] = []
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        if not line:
+            if data_lines:
+                payload = "\n".join(data_lines)
+                data_lines = []
+                if payload == "[DONE]":
+                    return
+                yield payload
+            continue
+        if line.startswith(":"):
+            continue
+        field, _, value = line.partition(":")
+        if field == "data":
+            data_lines.append(value[1:] if value.startswith(" ") else value)
+    if data_lines:
+        payload = "\n".join(data_lines)
+        if payload != "[DONE]":
+            yield payload
+
+
+CLIENT_STOP = "client_stop"
+CLIENT_LENGTH = "client_length"
+
+
+class CompletionStream:
+    """
+    Iterator over the content deltas of a streamed chat completion.
+
+    Iterating yields the text of choice 0 as it arrives. Once the stream is exhausted
+    `message`, `finish_reason` and `usage` describe the whole completion, and
+    `ttft` / `inter_token_latencies` hold the timings in seconds.
+
+    `stop` and `token_budget` are enforced on the client side, for providers that ignore
+    them: when choice 0 produces a stop sequence, or its estimated token count reaches
+    the budget, the connection is closed at once so the server stops generating, the
+    content is trimmed and `finish_reason` becomes `client_stop` / `client_length`.
+    Text that could be the beginning of a stop sequence is held back until it is known
+    not to be one, so a stop sequence is never yielded even when it spans two chunks.
+
+    `observers` get on_stream_chunk for every delta yielded, then on_response once the
+    stream is exhausted or on_error if reading it failed. A rate-limit `reservation` is
+    reconciled when the stream is closed, with the `usage` the server reported or else
+    `prompt_tokens` plus the tokens received, and `release` is called once then (the client
+    uses it to give back the concurrency and scheduler slots the stream held while it was read).
+
+    Reading the stream to the end closes it. Use it as a context manager when it may be
+    left early, so the connection, reservation and slots are given back at once:
+
+        with client.stream_completion(messages) as stream:
+            first = next(iter(stream))
+
+    A stream that is never closed is closed when it is garbage-collected.
+    """
+
+    def __init__(
+            self,
+            response: requests.Response,
+            started: float,
+            stop: str | list[str] | None = None,
+            token_budget: int | None = None,
+            observers: tuple[ClientObserver, ...] = (),
+            deployment: str | None = None,
+            reservation: Reservation | None = None,
+            prompt_tokens: int = 0,
+            release: Callable[[], None] | None = None,
+    ):
+        self._response = response
+        self._reservation = reservation
+        self._prompt_tokens = prompt_tokens
+        self._release = release
+        self._started = started
+        self._observers = observers
+        self._deployment = deployment
+        self._stop = [stop] if isinstance(stop, str) else [s for s in (stop or []) if s]
+        self._holdback = max((len(s) for s in self._stop), default=1) - 1
+        self._token_budget = token_budget
+        self._pending = ""
+        self.tokens = 0
+        self._last_delta_at: float | None = None
+        self._parts: dict[int, list[str]] = {}
+        self.finish_reasons: dict[int, str | None] = {}
+        self.usage: dict | None = None
+        self.ttft: float | None = None
+        self.inter_token_latencies: list[float] = []
+        self.chunks = 0
+        self.deltas = 0
+        self.bytes_received = 0
+        self.done = False
+
+    def __iter__(self) -> Iterator[str]:
+        try:
+            for text in self._deltas():
+                if self._observers:
+                    notify(self._observers, "on_stream_chunk", StreamChunkEvent(
+                        self._deployment, self.deltas, text, time.perf_counter() - self._started
+                    ))
+                self.deltas += 1
+                yield text
+        except Exception as e:
+            if self._observers:
+                latency = time.perf_counter() - self._started
+                notify(self._observers, "on_error", ErrorEvent(self._deployment, e, latency))
+            raise
+        else:
+            if self._observers:
+                notify(self._observers, "on_response", ResponseEvent(
+                    self._deployment, time.perf_counter() - self._started, stream=self
+                ))
+        finally:
+            self.close()
+
+    def __enter__(self) -> "CompletionStream":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def __del__(self):
+        # `done` is set last in __init__; a stream that failed to initialise has nothing to give back
+        if hasattr(self, "done"):
+            self.close()
+
+    def _lines(self) -> Iterator[bytes]:
+        for line in self._response.iter_lines():
+            self.bytes_received += len(line) + 1
+            yield line
+
+    def _deltas(self) -> Iterator[str]:
+        for payload in iter_sse_data(self._lines()):
+            chunk = json.loads(payload)
+            self.chunks += 1
+            if chunk.get("usage"):
+                self.usage = chunk["usage"]
+            for choice in chunk.get("choices", []):
+                index = choice.get("index", 0)
+                delta = (choice.get("delta") or {}).get("content")
+                if choice.get("finish_reason"):
+                    self.finish_reasons[index] = choice["finish_reason"]
+                if not delta:
+                    continue
+                if index != 0:
+                    self._parts.setdefault(index, []).append(delta)
+                    continue
+                self._record_delta(time.perf_counter())
+                self.tokens += estimate_tokens(delta)
+                text, finish_reason = self._check_client_limits(delta)
+                if text:
+                    self._parts.setdefault(0, []).append(text)
+                    yield text
+                if finish_reason:
+                    self.finish_reasons[0] = finish_reason
+                    self.done = True
+                    return
+        if self._pending:
+            self._parts.setdefault(0, []).append(self._pending)
+            yield self._pending
+            self._pending = ""
+        self.done = True
+
+    def _check_client_limits(self, delta: str) -> tuple[str, str | None]:
+        """Return the text that is safe to emit and, if generation must end, the client finish reason."""
+        if not self._stop and self._token_budget is None:
+            return delta, None
+        pending = self._pending + delta
+        if self._stop:
+            hits = [i for i in (pending.find(s) for s in self._stop) if i != -1]
+            if hits:
+                self._pending = ""
+                return pending[:min(hits)], CLIENT_STOP
+        if self._token_budget is not None and self.tokens >= self._token_budget:
+            self._pending = ""
+            return pending, CLIENT_LENGTH
+        safe = max(0, len(pending) - self._holdback)
+        self._pending = pending[safe:]
+        return pending[:safe], None
+
+    def _record_delta(self, now: float) -> None:
+        if self.ttft is None:
+            self.ttft = now - self._started
+        else:
+            self.inter_token_latencies.append(now - self._last_delta_at)
+        self._last_delta_at = now
+
+    def close(self) -> None:
+        """Stop reading and give the connection back to (or drop it from) the pool."""
+        self._response.close()
+        reservation, self._reservation = self._reservation, None
+        if reservation is not None:
+            usage = self.usage or {}
+            reservation.reconcile(usage.get("total_tokens") or self._prompt_tokens + self._received_tokens())
+        release, self._release = self._release, None
+        if release is not None:
+            release()
+
+    def _received_tokens(self) -> int:
+        """Tokens of choice 0 counted while reading plus an estimate for the other choices."""
+        others = sum(estimate_tokens(part) for index, parts in self._parts.items() if index != 0 for part in parts)
+        return self.tokens + others
+
+    @property
+    def content(self) -> str:
+        return "".join(self._parts.get(0, []))
+
+    @property
+    def finish_reason(self) -> str | None:
+        return self.finish_reasons.get(0)
+
+    @property
+    def message(self) -> Message:
+        return Message(Role.AI, self.content)
+
+    def contents(self) -> list[str]:
+        """Content of every streamed choice, ordered by choice index."""
+        return ["".join(self._parts[i]) for i in sorted(self._parts)]
+
+    def timings(self) -> dict:
+        itl = self.inter_token_latencies
+        return {
+            "ttft": self.ttft,
+            "inter_token_latency_avg": sum(itl) / len(itl) if itl else None,
+            "inter_token_latency_max": max(itl) if itl else None,
+            "chunks": self.chunks,
+        }
@@ -0,0 +1,177 @@
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Iterator
+
+from task.app.batching import RequestBatcher
+from task.app.client import DialClient
+from task.app.scheduler import SCHEDULER, Priority, Scheduler
+from task.constants import DEFAULT_SYSTEM_PROMPT, DIAL_ENDPOINT
+from task.models.message import Message
+from task.models.role import Role
+
+
+@dataclass
+class SweepPoint:
+    deployment_name: str
+    prompt: str
+    params: dict[str, Any] = field(default_factory=dict)
+    repeat: int = 0
+
+
+@dataclass
+class SweepResult:
+    point: SweepPoint
+    message: Message | None
+    error: Exception | None
+    latency: float
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def cartesian_grid(
+        deployments: Iterable[str],
+        prompts: Iterable[str],
+        params: dict[str, Iterable[Any]] | None = None,
+        repeats: int = 1,
+) -> list[SweepPoint]:
+    """
+    Build every combination of deployment × prompt × parameter values × repeat.
+
+    A `None` parameter value means "leave the parameter out", e.g. `{"seed": [42, None]}`
+    sweeps a seeded and an unseeded request.
+    """
+    params = params or {}
+    names = list(params)
+    points = []
+    for deployment, prompt, values in itertools.product(
+            deployments, prompts, itertools.product(*(list(params[n]) for n in names))
+    ):
+        kwargs = {name: value for name, value in zip(names, values) if value is not None}
+        for repeat in range(repeats):
+            points.append(SweepPoint(deployment, prompt, dict(kwargs), repeat))
+    return points
+
+
+class SweepResults:
+    """Results of a sweep, in completion order, with simple grouping helpers."""
+
+    def __init__(self):
+        self.results: list[SweepResult] = []
+        self._lock = threading.Lock()
+
+    def add(self, result: SweepResult) -> None:
+        with self._lock:
+            self.results.append(result)
+
+    def __iter__(self) -> Iterator[SweepResult]:
+        return iter(list(self.results))
+
+    def __len__(self) -> int:
+        return len(self.results)
+
+    def errors(self) -> list[SweepResult]:
+        return [r for r in self.results if not r.ok]
+
+    def by_deployment(self) -> dict[str, list[SweepResult]]:
+        grouped: dict[str, list[SweepResult]] = {}
+        for result in self.results:
+            grouped.setdefault(result.point.deployment_name, []).append(result)
+        return grouped
+
+    def by_param(self, name: str) -> dict[Any, list[SweepResult]]:
+        grouped: dict[Any, list[SweepResult]] = {}
+        for result in self.results:
+            grouped.setdefault(result.point.params.get(name), []).append(result)
+        return grouped
+
+    def to_rows(self) -> list[dict]:
+        """Flatten the results into JSON-serializable rows."""
+        return [
+            {
+                "deployment": r.point.deployment_name,
+                "prompt": r.point.prompt,
+                "repeat": r.point.repeat,
+                **r.point.params,
+                "content": r.message.content if r.message else None,
+                "error": str(r.error) if r.error else None,
+                "latency": round(r.latency, 4),
+            }
+            for r in self.results
+        ]
+
+
+def iter_sweep(
+        points: Iterable[SweepPoint],
+        max_concurrency: int = 16,
+        endpoint: str = DIAL_ENDPOINT,
+        system_prompt: str | None = DEFAULT_SYSTEM_PROMPT,
+        batcher: RequestBatcher | None = None,
+        scheduler: Scheduler | None = SCHEDULER,
+) -> Iterator[SweepResult]:
+    """
+    Run sweep points concurrently and yield each result as soon as it finishes.
+
+    At most `max_concurrency` requests are in flight across all deployments, and no more
+    than the `scheduler` grants its BATCH class: the process-wide default scheduler lets 24
+    batch requests run at once, so interactive calls in the same process go first. Pass
+    `scheduler=None` to run a sweep that has the process to itself at full `max_concurrency`.
+    Clients for every deployment share the keep-alive pool of the endpoint's host. Failures
+    are returned as results with `error` set instead of stopping the sweep. With a `batcher`,
+    repeats of the same random request are merged into one `n=k` call where supported.
+    Nothing is printed per call.
+    """
+    points = list(points)
+    clients: dict[str, DialClient] = {}
+    for point in points:
+        if point.deployment_name not in clients:
+            clients[point.deployment_name] = DialClient(
+                endpoint=endpoint,
+                deployment_name=point.deployment_name,
+                pool_maxsize=max_concurrency,
+                batcher=batcher,
+                priority=Priority.BATCH,
+                scheduler=scheduler,
+                observers=[],
+            )
+
+    def _run(point: SweepPoint) -> SweepResult:
+        messages = [Message(Role.USER, point.prompt)]
+        if system_prompt:
+            messages.insert(0, Message(Role.SYSTEM, system_prompt))
+        started = time.perf_counter()
+        try:
+            message = clients[point.deployment_name].get_completion(
+                messages, print_request=False, print_only_content=True, **point.params
+            )
+            return SweepResult(point, message, None, time.perf_counter() - started)
+        except Exception as e:
+            return SweepResult(point, None, e, time.perf_counter() - started)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix="sweep") as executor:
+            futures = [executor.submit(_run, point) for point in points]
+            for future in as_completed(futures):
+                yield future.result()
+    finally:
+        for client in clients.values():
+            client.close()
+
+
+def run_sweep(
+        points: Iterable[SweepPoint],
+        max_concurrency: int = 16,
+        endpoint: str = DIAL_ENDPOINT,
+        system_prompt: str | None = DEFAULT_SYSTEM_PROMPT,
+        batcher: RequestBatcher | None = None,
+        scheduler: Scheduler | None = SCHEDULER,
+) -> SweepResults:
+    """Run a whole sweep and collect the results. See `iter_sweep`."""
+    results = SweepResults()
+    for result in iter_sweep(points, max_concurrency, endpoint, system_prompt, batcher, scheduler):
+        results.add(result)
+    return results
@@ -0,0 +1,13 @@
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count for budgeting, assuming ~4 characters per token.
+
+    Good enough to stop a stream or reserve rate-limit capacity; the `usage` block of a
+    response is the only exact count.
+    """
+    if not text:
+        return 0
+    return max(1, round(len(text) / CHARS_PER_TOKEN))
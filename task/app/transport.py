@@ -0,0 +1,262 @@
+import atexit
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from task.app.errors import DialError
+
+DEFAULT_POOL_MAXSIZE = 32
+DEFAULT_IDLE_TIMEOUT = 90.0
+
+_local = threading.local()
+
+
+class RequestCancelled(DialError):
+    """The request was aborted through its CancelScope."""
+
+
+class CancelScope:
+    """
+    Lets another thread abort the requests the current thread sends inside `with scope:`.
+
+    The connections those requests use are tracked until they go back to the pool, so
+    `cancel()` can shut their sockets down whether the request is still waiting for the
+    response headers or its body is being read. Requests of a cancelled scope raise
+    RequestCancelled (not a requests exception, so it is neither retried nor counted
+    against the circuit breaker). Only HostPool sessions are tracked.
+    """
+
+    def __init__(self):
+        self.cancelled = False
+        self._lock = threading.Lock()
+        self._connections = set()
+
+    def __enter__(self) -> "CancelScope":
+        _local.scope = self
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        _local.scope = None
+        with self._lock:
+            self._connections.clear()
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.cancelled = True
+            connections = list(self._connections)
+        for connection in connections:
+            _shutdown(connection)
+
+    def _attach(self, connection) -> None:
+        with self._lock:
+            if not self.cancelled:
+                self._connections.add(connection)
+                return
+        raise RequestCancelled("The request was cancelled")
+
+    def _detach(self, connection) -> None:
+        with self._lock:
+            self._connections.discard(connection)
+
+
+def _shutdown(connection) -> None:
+    sock = connection.sock
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+class _ScopedPoolMixin:
+    """Attributes the connections of a request to the CancelScope of the thread sending it."""
+
+    def _make_request(self, conn, *args, **kwargs):
+        scope = getattr(_local, "scope", None)
+        if scope is None:
+            return super()._make_request(conn, *args, **kwargs)
+        if conn.sock is None:
+            conn.connect()
+        scope._attach(conn)
+        try:
+            return super()._make_request(conn, *args, **kwargs)
+        except Exception as e:
+            if scope.cancelled:
+                raise RequestCancelled("The request was cancelled") from e
+            raise
+
+    def _put_conn(self, conn):
+        scope = getattr(_local, "scope", None)
+        if scope is not None and conn is not None:
+            scope._detach(conn)
+        return super()._put_conn(conn)
+
+
+class _ScopedHTTPConnectionPool(_ScopedPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class _ScopedHTTPSConnectionPool(_ScopedPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class _ScopedAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _ScopedHTTPConnectionPool,
+            "https": _ScopedHTTPSConnectionPool,
+        }
+
+
+def host_key(endpoint: str) -> str:
+    """Return the `scheme://host[:port]` part of an endpoint, used to share pools between deployments."""
+    parts = urlsplit(endpoint)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+class HostPool:
+    """
+    Long-lived keep-alive session for a single host.
+
+    Every DialClient that targets the same host shares one HostPool, so the TCP/TLS
+    handshake is paid once per connection instead of once per completion.
+    Connections left idle for longer than `idle_timeout` seconds are dropped before the
+    next request, because the proxy usually closes them on its side anyway.
+    """
+
+    def __init__(self, host: str, pool_maxsize: int, idle_timeout: float):
+        self.host = host
+        self.pool_maxsize = pool_maxsize
+        self.idle_timeout = idle_timeout
+        self.evictions = 0
+        self._refs = 0
+        self._lock = threading.Lock()
+        self._session = self._new_session()
+        self._last_used = time.monotonic()
+
+    def _new_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = _ScopedAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize)
+        session.mount(self.host, adapter)
+        return session
+
+    def session(self) -> requests.Session:
+        """Return the shared session, evicting idle connections first."""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_used > self.idle_timeout:
+                self._session.close()
+                self._session = self._new_session()
+                self.evictions += 1
+            self._last_used = now
+            return self._session
+
+    def resize(self, pool_maxsize: int) -> None:
+        """Change the number of keep-alive connections kept for this host."""
+        with self._lock:
+            if pool_maxsize == self.pool_maxsize:
+                return
+            self.pool_maxsize = pool_maxsize
+            old_session = self._session
+            self._session = self._new_session()
+        old_session.close()
+
+    def evict_if_idle(self, now: float) -> bool:
+        with self._lock:
+            if now - self._last_used <= self.idle_timeout:
+                return False
+            self._session.close()
+            self._session = self._new_session()
+            self._last_used = now
+            self.evictions += 1
+            return True
+
+    def close(self) -> None:
+        with self._lock:
+            self._session.close()
+
+
+class ConnectionPoolRegistry:
+    """Process-wide registry of HostPool objects keyed by `scheme://host[:port]`."""
+
+    def __init__(self):
+        self._pools: dict[str, HostPool] = {}
+        self._lock = threading.Lock()
+
+    def acquire(
+            self,
+            endpoint: str,
+            pool_maxsize: int | None = None,
+            idle_timeout: float | None = None,
+    ) -> HostPool:
+        """
+        Return the pool for the endpoint's host, creating it on first use.
+
+        Args:
+            endpoint (str): Any URL on the host
+            pool_maxsize (int | None): Keep-alive connections per host. Grows an existing pool if larger
+            idle_timeout (float | None): Seconds a connection may stay idle before it is dropped
+        """
+        key = host_key(endpoint)
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = HostPool(
+                    key,
+                    pool_maxsize=pool_maxsize or DEFAULT_POOL_MAXSIZE,
+                    idle_timeout=DEFAULT_IDLE_TIMEOUT if idle_timeout is None else idle_timeout,
+                )
+                self._pools[key] = pool
+            else:
+                if pool_maxsize and pool_maxsize > pool.pool_maxsize:
+                    pool.resize(pool_maxsize)
+                if idle_timeout is not None:
+                    pool.idle_timeout = idle_timeout
+            pool._refs += 1
+            return pool
+
+    def release(self, pool: HostPool) -> None:
+        """
+        Drop a client's reference to a pool.
+
+        The connections stay warm for the next client; they are only closed by idle
+        eviction or `close_all()`.
+        """
+        with self._lock:
+            pool._refs = max(0, pool._refs - 1)
+
+    def evict_idle(self) -> int:
+        """Close connections of every pool that has been idle for longer than its timeout."""
+        now = time.monotonic()
+        with self._lock:
+            pools = list(self._pools.values())
+        return sum(1 for pool in pools if pool.evict_if_idle(now))
+
+    def stats(self) -> dict[str, dict]:
+        with self._lock:
+            return {
+                key: {
+                    "pool_maxsize": pool.pool_maxsize,
+                    "idle_timeout": pool.idle_timeout,
+                    "clients": pool._refs,
+                    "evictions": pool.evictions,
+                }
+                for key, pool in self._pools.items()
+            }
+
+    def close_all(self) -> None:
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+        for pool in pools:
+            pool.close()
+
+
+POOLS = ConnectionPoolRegistry()
+atexit.register(POOLS.close_all)
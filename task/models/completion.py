@@ -0,0 +1,49 @@
+from dataclasses import dataclass, field
+
+from task.models.message import Message
+from task.models.role import Role
+
+
+@dataclass
+class Choice:
+    index: int
+    message: Message
+    finish_reason: str | None = None
+
+
+@dataclass
+class CompletionResult:
+    choices: list[Choice]
+    usage: dict[str, int] = field(default_factory=dict)
+    model: str | None = None
+    id: str | None = None
+    created: int | None = None
+    raw: dict = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def from_response(cls, data: dict) -> "CompletionResult":
+        choices = [
+            Choice(
+                index=choice.get("index", i),
+                message=Message(Role.AI, choice.get("message", {}).get("content")),
+                finish_reason=choice.get("finish_reason"),
+            )
+            for i, choice in enumerate(data.get("choices", []))
+        ]
+        choices.sort(key=lambda c: c.index)
+        return cls(
+            choices=choices,
+            usage=data.get("usage") or {},
+            model=data.get("model"),
+            id=data.get("id"),
+            created=data.get("created"),
+            raw=data,
+        )
+
+    @property
+    def message(self) -> Message:
+        return self.choices[0].message
+
+    @property
+    def messages(self) -> list[Message]:
+        return [choice.message for choice in self.choices]
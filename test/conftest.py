@@ -1,3 +1,11 @@
+import json
+
+import pytest
+
+from task.app.breaker import BREAKERS
+from task.app.standin import StandInServer
+
+
 def Param(param_list):
     """Parameterized decorator to run function with different parameters."""
     def decorator(func):
@@ -7,4 +15,56 @@ def Param(param_list):
             return func(*args, **kwargs)
         wrapper.param_list = param_list
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
+
+
+def completion_body(request_data: dict, content: str = "Hello from the fake DIAL") -> dict:
+    """Build an OpenAI-shaped completion for a request, one choice per `n`."""
+    n = request_data.get("n", 1)
+    return {
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "fake",
+        "choices": [
+            {
+                "index": i,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": f"{content} #{i}" if n > 1 else content},
+            }
+            for i in range(n)
+        ],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 5 * n, "total_tokens": 10 + 5 * n},
+    }
+
+
+def sse_chunks(deltas: list[str], finish_reason: str = "stop") -> list[bytes]:
+    """Encode content deltas as OpenAI-style `chat.completion.chunk` server-sent events."""
+    events = [{"choices": [{"index": 0, "delta": {"role": "assistant"}}]}]
+    events += [{"choices": [{"index": 0, "delta": {"content": delta}}]} for delta in deltas]
+    events.append({
+        "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}],
+        "usage": {"prompt_tokens": 10, "completion_tokens": len(deltas), "total_tokens": 10 + len(deltas)},
+    })
+    return [f"data: {json.dumps(event)}\n\n".encode() for event in events] + [b"data: [DONE]\n\n"]
+
+
+class FakeDialServer(StandInServer):
+    """
+    StandInServer whose `handler` answers every request with `completion_body`.
+
+    Tests replace `handler` to script responses; set it to None to get the stand-in's
+    generated completions, streaming and fault injection instead.
+    """
+
+    def __init__(self):
+        super().__init__(handler=lambda path, data: (200, {}, completion_body(data)))
+
+
+@pytest.fixture
+def dial_server(monkeypatch):
+    """Start a FakeDialServer and point DIAL_API_KEY at a dummy key."""
+    monkeypatch.setenv("DIAL_API_KEY", "test-key-0123456789")
+    BREAKERS.reset()
+    with FakeDialServer() as server:
+        yield server
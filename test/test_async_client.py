@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+"""
+Test for task/app/async_client.py
+"""
+import asyncio
+import time
+
+import pytest
+
+from conftest import completion_body
+from task.app.async_client import AsyncDialClient, CompletionRequest
+from task.models.message import Message
+from task.models.role import Role
+
+
+def test_gather_completions_runs_concurrently_in_order(dial_server):
+    def slow_handler(path, data):
+        time.sleep(0.2)
+        return 200, {}, completion_body(data, content=data["messages"][0]["content"])
+
+    dial_server.handler = slow_handler
+    requests = [CompletionRequest([Message(Role.USER, f"prompt {i}")], {"top_p": i / 10}) for i in range(10)]
+
+    async def main():
+        async with AsyncDialClient(endpoint=dial_server.endpoint, deployment_name="gpt-4o") as client:
+            return await client.gather_completions(requests, max_concurrency=10)
+
+    started = time.monotonic()
+    results = asyncio.run(main())
+    elapsed = time.monotonic() - started
+
+    assert [r.content for r in results] == [f"prompt {i}" for i in range(10)]
+    assert elapsed < 1.0
+
+
+def test_gather_completions_return_exceptions(dial_server):
+    dial_server.handler = lambda path, data: (500, {}, {"error": "boom"})
+
+    async def main(return_exceptions):
+        async with AsyncDialClient(endpoint=dial_server.endpoint, deployment_name="gpt-4o") as client:
+            return await client.gather_completions(
+                [CompletionRequest([Message(Role.USER, "Hi")])],
+                return_exceptions=return_exceptions,
+            )
+
+    results = asyncio.run(main(True))
+    assert isinstance(results[0], Exception)
+    with pytest.raises(Exception, match="HTTP 500"):
+        asyncio.run(main(False))
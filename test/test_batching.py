@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+"""
+Test for task/app/batching.py
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from conftest import completion_body
+from task.app.batching import RequestBatcher, merge_choices, split_choices
+from task.app.client import DialClient
+from task.app.coalescing import SingleFlight
+from task.models.message import Message
+from task.models.role import Role
+
+MESSAGES = [Message(Role.USER, "Name a random animal")]
+
+
+def test_split_choices_reindexes_and_shares_usage():
+    data = {
+        "choices": [{"index": i, "message": {"content": str(i)}} for i in range(4)],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 40, "total_tokens": 50},
+    }
+    first, second = split_choices(data, [1, 3])
+
+    assert [c["index"] for c in second["choices"]] == [0, 1, 2]
+    assert [c["message"]["content"] for c in second["choices"]] == ["1", "2", "3"]
+    assert first["usage"] == {"prompt_tokens": 10, "completion_tokens": 10, "total_tokens": 20}
+    assert second["usage"]["completion_tokens"] == 30
+
+
+def _concurrent_calls(client, count, **params):
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        futures = [executor.submit(client.get_completion, MESSAGES, False, True, **params) for _ in range(count)]
+        return [f.result() for f in futures]
+
+
+def test_concurrent_random_requests_become_one_n_call(dial_server):
+    batcher = RequestBatcher(window=0.2)
+    client = DialClient(endpoint=dial_server.endpoint, deployment_name="gpt-4o", batcher=batcher)
+
+    results = _concurrent_calls(client, 3, temperature=1.0)
+
+    assert len(dial_server.requests) == 1
+    assert dial_server.requests[0][1]["n"] == 3
+    assert sorted(m.content for m in results) == ["Hello from the fake DIAL #0", "Hello from the fake DIAL #1",
+                                                  "Hello from the fake DIAL #2"]
+    assert client.batching_stats() == {"requests": 3, "batches": 1, "saved_requests": 2}
+
+
+def test_batch_is_sent_early_when_full(dial_server):
+    client = DialClient(
+        endpoint=dial_server.endpoint, deployment_name="gpt-4o", batcher=RequestBatcher(window=5, max_batch=4),
+    )
+    _concurrent_calls(client, 2, n=2)
+
+    assert [data["n"] for _, data in dial_server.requests] == [4]
+
+
+def test_batching_skips_deterministic_and_non_n_deployments(dial_server):
+    client = DialClient(
+        endpoint=dial_server.endpoint, deployment_name="gpt-4o",
+        batcher=RequestBatcher(window=0.1), single_flight=SingleFlight(),
+    )
+    _concurrent_calls(client, 3, seed=1)
+    assert len(dial_server.requests) == 1
+    assert "n" not in dial_server.requests[0][1]
+
+    claude = DialClient(
+        endpoint=dial_server.endpoint, deployment_name="claude-3-5-haiku@20241022", batcher=RequestBatcher(),
+    )
+    assert claude.batching_stats() is None
+
+
+def test_merge_choices_sums_usage():
+    responses = [
+        {"id": f"r{i}", "choices": [{"index": 0, "finish_reason": "stop", "message": {"content": str(i)}}],
+         "usage": {"prompt_tokens": 10, "completion_tokens": i, "total_tokens": 10 + i}}
+        for i in range(3)
+    ]
+    merged = merge_choices(responses)
+
+    assert merged["id"] == "r0"
+    assert [(c["index"], c["message"]["content"]) for c in merged["choices"]] == [(0, "0"), (1, "1"), (2, "2")]
+    assert merged["usage"] == {"prompt_tokens": 30, "completion_tokens": 3, "total_tokens": 33}
+
+
+def test_n_is_emulated_for_deployments_without_native_support(dial_server):
+    def slow_single_choice(path, data):
+        time.sleep(0.2)
+        return 200, {}, completion_body({}, content=f"answer {len(dial_server.requests)}")
+
+    dial_server.handler = slow_single_choice
+    client = DialClient(endpoint=dial_server.endpoint, deployment_name="gemini-2.0-flash")
+
+    started = time.monotonic()
+    result = client.get_completions(MESSAGES, n=3)
+    elapsed = time.monotonic() - started
+
+    assert len(dial_server.requests) == 3
+    assert all("n" not in request for _, request in dial_server.requests)
+    assert [c.index for c in result.choices] == [0, 1, 2]
+    assert result.usage["completion_tokens"] == 15
+    assert elapsed < 0.5
+
+
+def test_native_n_is_sent_as_is(dial_server):
+    client = DialClient(endpoint=dial_server.endpoint, deployment_name="gpt-4o")
+    result = client.get_completions(MESSAGES, n=3)
+
+    assert len(dial_server.requests) == 1
+    assert len(result.choices) == 3
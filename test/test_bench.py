@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+"""
+Test for task/app/bench.py
+"""
+from task.app.bench import Scenario, compare, conversation, default_scenarios, run
+from task.app.standin import StandInServer
+
+
+def test_scenarios_cover_payload_sizes_and_n():
+    scenarios = default_scenarios()
+    assert {s.messages for s in scenarios} == {2, 100, 1000, 10000}
+    assert {s.n for s in scenarios} == {1, 8, 32, 128}
+    assert len(conversation(10)) == 10
+
+
+def test_run_reports_every_scenario(monkeypatch):
+    monkeypatch.setenv("DIAL_API_KEY", "test-key-0123456789")
+    scenarios = [Scenario(n=4, output="verbose"), Scenario(output="silent"), Scenario(stream=True)]
+    with StandInServer() as server:
+        report = run(server.endpoint, scenarios, min_time=0.01)
+
+    assert [result["name"] for result in report["results"]] == [s.name for s in scenarios]
+    for result in report["results"]:
+        assert result["calls"] >= 5
+        assert 0 < result["cpu_ms"] <= result["wall_ms"] * 2
+        assert result["peak_kib"] > 0 and result["allocations"] > 0
+
+
+def test_compare_flags_growth_beyond_tolerance():
+    baseline = {"results": [{"name": "a", "cpu_ms": 2.0, "peak_kib": 10.0}]}
+    report = {"results": [
+        {"name": "a", "cpu_ms": 2.4, "peak_kib": 20.0},
+        {"name": "new", "cpu_ms": 9.0, "peak_kib": 9.0},
+    ]}
+
+    regressions = compare(report, baseline, tolerance=0.25)
+    assert regressions == ["a: peak_kib 10.0 -> 20.0 (+100%)"]
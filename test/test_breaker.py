@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""
+Test for task/app/breaker.py
+"""
+import time
+
+import pytest
+
+from task.app.breaker import BreakerConfig, BreakerRegistry, BreakerState, CircuitBreaker, CircuitOpenError
+from task.app.client import DialClient
+from task.app.retry import NO_RETRY
+from task.models.message import Message
+from task.models.role import Role
+
+MESSAGES = [Message(Role.USER, "Hi")]
+CONFIG = BreakerConfig(window=4, min_calls=4, failure_rate_threshold=0.5, slow_call_threshold=0.05,
+                       slow_call_rate_threshold=0.75, open_duration=0.1)
+
+
+def test_opens_on_failure_rate_and_recovers_through_half_open():
+    breaker = CircuitBreaker("deepseek.r1-v1:0", CONFIG)
+    for success in [True, False, True, False]:
+        breaker.before_call()
+        breaker.record(success, 0.01)
+
+    assert breaker.state == BreakerState.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    time.sleep(0.11)
+    breaker.before_call()
+    assert breaker.state == BreakerState.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record(True, 0.01)
+    assert breaker.state == BreakerState.CLOSED
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker("x", CONFIG)
+    for _ in range(4):
+        breaker.record(False, 0.01)
+    time.sleep(0.11)
+    breaker.before_call()
+    breaker.record(False, 0.01)
+
+    assert breaker.state == BreakerState.OPEN
+    assert breaker.snapshot()["times_opened"] == 2
+
+
+def test_opens_on_slow_calls():
+    breaker = CircuitBreaker("x", CONFIG)
+    for latency in [0.1, 0.1, 0.1, 0.01]:
+        breaker.record(True, latency)
+    assert breaker.state == BreakerState.OPEN
+
+
+def test_client_fails_fast_when_open(dial_server):
+    dial_server.handler = lambda path, data: (503, {}, {"error": "degraded"})
+    registry = BreakerRegistry(CONFIG)
+    client = DialClient(
+        endpoint=dial_server.endpoint, deployment_name="deepseek.r1-v1:0", retry_policy=NO_RETRY, breakers=registry,
+    )
+
+    for _ in range(4):
+        with pytest.raises(Exception, match="HTTP 503"):
+            client.get_completion(MESSAGES, print_request=False, print_only_content=True)
+    with pytest.raises(CircuitOpenError):
+        client.get_completion(MESSAGES, print_request=False, print_only_content=True)
+
+    assert len(dial_server.requests) == 4
+    endpoint = dial_server.endpoint.format(model="deepseek.r1-v1:0")
+    assert registry.snapshot()[f"deepseek.r1-v1:0 @ {endpoint}"]["state"] == "open"
+    assert client.breaker_state()["rejected"] == 1
+
+
+def test_client_errors_do_not_open_the_circuit(dial_server):
+    dial_server.handler = lambda path, data: (400, {}, {"error": "bad request"})
+    client = DialClient(
+        endpoint=dial_server.endpoint, deployment_name="gpt-4o", breakers=BreakerRegistry(CONFIG),
+    )
+    for _ in range(5):
+        with pytest.raises(Exception, match="HTTP 400"):
+            client.get_completion(MESSAGES, print_request=False, print_only_content=True)
+    assert client.breaker_state()["state"] == "closed"
+
+
+def test_circuits_are_not_shared_between_endpoints(dial_server):
+    dial_server.handler = lambda path, data: (503, {}, {"error": "degraded"})
+    registry = BreakerRegistry(CONFIG)
+    failing = DialClient(
+        endpoint=dial_server.endpoint, deployment_name="gpt-4o", retry_policy=NO_RETRY, breakers=registry,
+    )
+    other = DialClient(
+        endpoint=dial_server.endpoint.replace("127.0.0.1", "localhost"), deployment_name="gpt-4o", breakers=registry,
+    )
+    for _ in range(4):
+        with pytest.raises(Exception, match="HTTP 503"):
+            failing.get_completion(MESSAGES, print_request=False, print_only_content=True)
+
+    assert failing.breaker_state()["state"] == "open"
+    assert other.breaker_state()["state"] == "closed"
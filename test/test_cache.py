@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+"""
+Test for task/app/cache.py
+"""
+import multiprocessing
+import threading
+import time
+
+from conftest import completion_body
+from task.app.cache import DiskCache, MemoryCache, ResponseCache, SQLiteCache, cache_key, is_deterministic
+from task.app.client import DialClient
+from task.models.message import Message
+from task.models.role import Role
+
+MESSAGES = [Message(Role.USER, "Name a random animal")]
+
+
+def test_cache_key_is_canonical():
+    messages = [m.to_dict() for m in MESSAGES]
+    assert cache_key("gpt-4o", messages, {"seed": 1, "n": 2}) == cache_key("gpt-4o", messages, {"n": 2, "seed": 1})
+    assert cache_key("gpt-4o", messages, {"seed": 1}) != cache_key("gpt-4o-mini", messages, {"seed": 1})
+    assert cache_key("gpt-4o", messages, {}, "https://a", "key-1") != cache_key("gpt-4o", messages, {}, "https://b", "key-1")
+    assert cache_key("gpt-4o", messages, {}, "https://a", "key-1") != cache_key("gpt-4o", messages, {}, "https://a", "key-2")
+
+
+def test_is_deterministic():
+    assert is_deterministic({"seed": 0})
+    assert is_deterministic({"temperature": 0})
+    assert not is_deterministic({"temperature": 0.7})
+    assert not is_deterministic({})
+
+
+def test_memory_cache_lru_and_ttl():
+    cache = MemoryCache(max_entries=2, ttl=0.05)
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+    cache.get("a")
+    cache.set("c", {"v": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+    time.sleep(0.06)
+    assert cache.get("a") is None
+
+
+def test_disk_cache_size_limit_and_ttl(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=300, ttl=None)
+    for i in range(10):
+        cache.set(f"k{i}", {"content": "x" * 50})
+        time.sleep(0.01)
+
+    assert cache.get("k0") is None
+    assert cache.get("k9")[1] == {"content": "x" * 50}
+    assert sum(p.stat().st_size for p in tmp_path.iterdir()) <= 300
+
+    expiring = DiskCache(str(tmp_path / "ttl"), ttl=0)
+    expiring.set("a", {"v": 1})
+    time.sleep(0.01)
+    assert expiring.get("a") is None
+
+
+def test_client_serves_deterministic_requests_from_cache(dial_server, tmp_path):
+    cache = ResponseCache(disk=DiskCache(str(tmp_path)))
+    client = DialClient(endpoint=dial_server.endpoint, deployment_name="gpt-4o", cache=cache)
+
+    first = client.get_completion(MESSAGES, print_request=False, print_only_content=True, seed=42)
+    second = client.get_completion(MESSAGES, print_request=False, print_only_content=True, seed=42)
+    client.get_completion(MESSAGES, print_request=False, print_only_content=True, temperature=0.7)
+    client.get_completion(MESSAGES, print_request=False, print_only_content=True, temperature=0.7)
+
+    assert first == second
+    assert len(dial_server.requests) == 3
+    assert client.cache_stats() == {
+        "hits": 1, "misses": 1, "bypasses": 2, "shared_waits": 0, "hit_rate": 0.5, "memory_entries": 1,
+    }
+
+    cold = DialClient(
+        endpoint=dial_server.endpoint,
+        deployment_name="gpt-4o",
+        cache=ResponseCache(disk=DiskCache(str(tmp_path))),
+    )
+    assert cold.get_completion(MESSAGES, print_request=False, print_only_content=True, seed=42) == first
+    assert len(dial_server.requests) == 3
+
+
+def test_cache_is_not_shared_between_api_keys(dial_server, monkeypatch):
+    cache = ResponseCache()
+    first = DialClient(endpoint=dial_server.endpoint, deployment_name="gpt-4o", cache=cache)
+    monkeypatch.setenv("DIAL_API_KEY", "other-key-0123456789")
+    second = DialClient(endpoint=dial_server.endpoint, deployment_name="gpt-4o", cache=cache)
+
+    for client in (first, second, first):
+        client.get_completion(MESSAGES, print_request=False, print_only_content=True, seed=42)
+
+    assert len(dial_server.requests) == 2
+    assert cache.hits == 1
+
+
+def test_nondeterministic_opt_in(dial_server):
+    cache = ResponseCache(cache_nondeterministic=True)
+    client = DialClient(endpoint=dial_server.endpoint, deployment_name="gpt-4o", cache=cache)
+
+    client.get_completion(MESSAGES, print_request=False, print_only_content=True)
+    client.get_completion(MESSAGES, print_request=False, print_only_content=True)
+
+    assert len(dial_server.requests) == 1
+    assert cache.hits == 1
+
+
+def _cached_completion(endpoint, db_path, start, results):
+    client = DialClient(
+        endpoint=endpoint,
+        deployment_name="gpt-4o",
+        cache=ResponseCache(disk=SQLiteCache(db_path)),
+    )
+    start.wait(timeout=30)
+    results.put(client.get_completion(MESSAGES, print_request=False, print_only_content=True, seed=7).content)
+
+
+def test_sqlite_cache_shared_across_processes(dial_server, tmp_path):
+    def slow_handler(path, data):
+        time.sleep(0.5)
+        return 200, {}, completion_body(data)
+
+    dial_server.handler = slow_handler
+    db_path = str(tmp_path / "cache.sqlite")
+    # spawned rather than forked: forking the threaded test process can copy a lock some thread holds
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    start = ctx.Barrier(5)
+    workers = [
+        ctx.Process(target=_cached_completion, args=(dial_server.endpoint, db_path, start, results)) for _ in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    # the workers send the same request at once, after their (slow) interpreter start-up
+    start.wait(timeout=30)
+
+    assert [results.get(timeout=1) for _ in workers] == ["Hello from the fake DIAL"] * 4
+    for worker in workers:
+        worker.join(timeout=10)
+    assert len(dial_server.requests) == 1
+
+
+def test_sqlite_cache_claim_and_release(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite"), inflight_timeout=0.2)
+
+    assert cache.claim("k")
+    assert not cache.claim("k")
+    cache.release("k")
+    assert cache.claim("k")
+    time.sleep(0.25)
+    assert cache.claim("k")
+
+    cache.set("k", {"v": 1})
+    cache.set("k", {"v": 2})
+    assert cache.get("k")[1] == {"v": 1}
+
+
+def test_waiters_of_an_abandoned_claim_load_only_once(tmp_path):
+    cache = ResponseCache(disk=SQLiteCache(str(tmp_path / "cache.sqlite"), inflight_timeout=0.3, poll_interval=0.01))
+    loads = []
+
+    def load():
+        loads.append(1)
+        time.sleep(0.1)
+        return {"v": 1}
+
+    # the owner never stores a result nor releases its marker; the waiters time out together
+    cache.disk.claim("k")
+    waiters = [threading.Thread(target=cache.get_or_load, args=("k", load)) for _ in range(3)]
+    for waiter in waiters:
+        waiter.start()
+    for waiter in waiters:
+        waiter.join(timeout=5)
+
+    assert len(loads) == 1
+    assert cache.disk.get("k")[1] == {"v": 1}
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""
+Test for task/app/capabilities.py and task/app/probe.py
+"""
+import json
+
+import pytest
+
+from conftest import completion_body
+from task.app.capabilities import (
+    CapabilityMatrix,
+    CapabilityPolicy,
+    ParamCapability,
+    UnsupportedParameterError,
+)
+from task.app.client import DialClient
+from task.app.probe import probe
+from task.app.retry import NO_RETRY
+from task.models.message import Message
+from task.models.role import Role
+
+MESSAGES = [Message(Role.USER, "Hi")]
+
+
+def _matrix() -> CapabilityMatrix:
+    return CapabilityMatrix(deployments={
+        "gemini-2.0-flash": {
+            "seed": ParamCapability(supported=False),
+            "stop": ParamCapability(supported=False),
+            "n": ParamCapability(supported=True, native=False),
+            "temperature": ParamCapability(supported=True, minimum=0.0, maximum=1.0),
+        },
+    })
+
+
+def test_matrix_round_trip(tmp_path):
+    path = str(tmp_path / "capabilities.json")
+    _matrix().save(path)
+
+    assert CapabilityMatrix.load(path).deployments == _matrix().deployments
+    with open(path, "w") as f:
+        json.dump({"version": 0, "deployments": {"x": {}}}, f)
+    assert CapabilityMatrix.load(path).deployments == {}
+    assert CapabilityMatrix.load(str(tmp_path / "missing.json")).deployments == {}
+
+
+def test_adapt_drops_and_clamps():
+    request = {"messages": [], "seed": 1, "temperature": 1.7, "top_p": 0.5, "n": 3}
+    adapted, fixed = _matrix().adapt("gemini-2.0-flash", request)
+
+    assert adapted == {"messages": [], "temperature": 1.0, "top_p": 0.5, "n": 3}
+    assert {v.param: v.fix for v in fixed} == {"seed": "drop", "temperature": "clamp"}
+    assert _matrix().violations("gpt-4o", request) == []
+
+
+def test_fail_fast_without_network_call(dial_server):
+    client = DialClient(
+        endpoint=dial_server.endpoint,
+        deployment_name="gemini-2.0-flash",
+        capabilities=_matrix(),
+        on_unsupported=CapabilityPolicy.FAIL,
+    )
+    with pytest.raises(UnsupportedParameterError):
+        client.get_completion(MESSAGES, False, True, seed=5)
+    assert dial_server.requests == []
+
+
+def test_adapt_emulates_stop(dial_server):
+    dial_server.handler = lambda path, data: (200, {}, completion_body(data, content="one. two. three."))
+    client = DialClient(endpoint=dial_server.endpoint, deployment_name="gemini-2.0-flash", capabilities=_matrix())
+
+    result = client.get_completions(MESSAGES, seed=5, stop=[" two"])
+
+    assert "seed" not in dial_server.requests[0][1] and "stop" not in dial_server.requests[0][1]
+    assert result.message.content == "one."
+    assert result.choices[0].finish_reason == "client_stop"
+
+
+def test_unsupported_n_is_emulated_but_not_streamed(dial_server):
+    matrix = CapabilityMatrix(deployments={"gemini-2.0-flash": {"n": ParamCapability(supported=False)}})
+    client = DialClient(endpoint=dial_server.endpoint, deployment_name="gemini-2.0-flash", capabilities=matrix)
+
+    with pytest.raises(UnsupportedParameterError) as error:
+        client.stream_completion(MESSAGES, n=2)
+    assert [v.param for v in error.value.violations] == ["n"]
+    assert dial_server.requests == []
+
+    assert len(client.get_completions(MESSAGES, n=2).choices) == 2
+    assert [data.get("n") for _, data in dial_server.requests] == [None, None]
+
+
+def test_probe_builds_matrix(dial_server):
+    def handler(path, data):
+        if "gemini" in path and ("seed" in data or data.get("temperature", 0) > 1):
+            return 400, {}, {"error": "unsupported"}
+        return 200, {}, completion_body({} if "gemini" in path else data)
+
+    dial_server.handler = handler
+    matrix = probe(
+        ["gpt-4o", "gemini-2.0-flash"],
+        endpoint=dial_server.endpoint,
+        probes={"seed": [1], "temperature": [0.0, 1.0, 2.0], "n": [2]},
+        policy=NO_RETRY,
+    )
+
+    assert matrix.supports("gpt-4o", "seed") is True
+    assert matrix.supports("gemini-2.0-flash", "seed") is False
+    assert matrix.get("gemini-2.0-flash", "temperature").maximum == 1.0
+    assert matrix.native_n("gpt-4o") is True
+    assert matrix.native_n("gemini-2.0-flash") is False
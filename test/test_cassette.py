@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""
+Test for task/app/cassette.py
+"""
+import time
+
+import pytest
+
+from task.app.cassette import Cassette, CassetteMissError, CassetteMode, MatchMode
+from task.app.client import DialClient
+from task.app.standin import StandInConfig, StandInServer
+from task.models.message import Message
+from task.models.role import Role
+
+MESSAGES = [Message(Role.USER, "Tell me about tokens")]
+
+
+def _record(path: str, monkeypatch) -> tuple[str, list[str], str]:
+    """Record one JSON call (twice) and one stream against the stand-in; return what was seen."""
+    monkeypatch.setenv("DIAL_API_KEY", "test-key-0123456789")
+    config = StandInConfig(token_interval=0.01, words=(8, 8))
+    with StandInServer(config=config) as server:
+        cassette = Cassette(path, mode=CassetteMode.RECORD)
+        client = DialClient(endpoint=server.endpoint, deployment_name="gpt-4o", cassette=cassette, single_flight=None)
+        answers = [client.get_completions(MESSAGES, temperature=0.9).message.content for _ in range(2)]
+        streamed = "".join(client.stream_completion(MESSAGES))
+        endpoint = server.endpoint
+    monkeypatch.delenv("DIAL_API_KEY")
+    return endpoint, answers, streamed
+
+
+def test_replay_without_server_or_api_key(tmp_path, monkeypatch):
+    path = str(tmp_path / "calls.jsonl")
+    endpoint, answers, streamed = _record(path, monkeypatch)
+
+    cassette = Cassette(path)
+    client = DialClient(endpoint=endpoint, deployment_name="gpt-4o", cassette=cassette, single_flight=None)
+    started = time.perf_counter()
+    replayed = [client.get_completions(MESSAGES, temperature=0.9).message.content for _ in range(2)]
+    stream = client.stream_completion(MESSAGES)
+
+    assert replayed == answers
+    assert "".join(stream) == streamed
+    assert stream.finish_reason == "stop"
+    assert time.perf_counter() - started < 0.05
+    assert cassette.stats()["hits"] == 3
+
+
+def test_replay_latency(tmp_path, monkeypatch):
+    path = str(tmp_path / "calls.jsonl")
+    endpoint, _, _ = _record(path, monkeypatch)
+
+    client = DialClient(
+        endpoint=endpoint, deployment_name="gpt-4o", cassette=Cassette(path, replay_latency=True)
+    )
+    started = time.perf_counter()
+    list(client.stream_completion(MESSAGES))
+    assert time.perf_counter() - started >= 0.08
+
+
+def test_fuzzy_match_and_miss(tmp_path, monkeypatch):
+    path = str(tmp_path / "calls.jsonl")
+    endpoint, answers, _ = _record(path, monkeypatch)
+
+    fuzzy = DialClient(endpoint=endpoint, deployment_name="gpt-4o", cassette=Cassette(path, match=MatchMode.FUZZY))
+    messages = [Message(Role.USER, "  tell me ABOUT tokens ")]
+    assert fuzzy.get_completions(messages, temperature=0.2).message.content in answers
+
+    exact = DialClient(endpoint=endpoint, deployment_name="gpt-4o", cassette=Cassette(path))
+    with pytest.raises(CassetteMissError):
+        exact.get_completions(messages, temperature=0.2)
+
+
+def test_env_configured_cassette(tmp_path, monkeypatch):
+    path = str(tmp_path / "calls.jsonl")
+    endpoint, answers, _ = _record(path, monkeypatch)
+    monkeypatch.setenv("DIAL_CASSETTE", path)
+
+    client = DialClient(endpoint=endpoint, deployment_name="gpt-4o", single_flight=None)
+    assert client.get_completions(MESSAGES, temperature=0.9).message.content == answers[0]
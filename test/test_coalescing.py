@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""
+Test for task/app/coalescing.py
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from conftest import completion_body
+from task.app.client import DialClient
+from task.app.coalescing import SingleFlight
+from task.models.message import Message
+from task.models.role import Role
+
+MESSAGES = [Message(Role.USER, "Name a random animal")]
+
+
+def test_single_flight_shares_result_and_errors():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(1)
+        return "result"
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        futures = [executor.submit(flight.do, "k", slow) for _ in range(5)]
+        time.sleep(0.1)
+        release.set()
+        assert [f.result() for f in futures] == ["result"] * 5
+
+    assert len(calls) == 1
+    assert flight.stats()["coalesced"] == 4
+
+    def boom():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        flight.do("k", boom)
+    assert flight.in_flight() == 0
+
+
+def _burst(dial_server, single_flight, **params):
+    def slow_handler(path, data):
+        time.sleep(0.2)
+        return 200, {}, completion_body(data)
+
+    dial_server.handler = slow_handler
+    client = DialClient(endpoint=dial_server.endpoint, deployment_name="gpt-4o", single_flight=single_flight)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = [
+            executor.submit(client.get_completion, MESSAGES, False, True, **params) for _ in range(8)
+        ]
+        return [f.result() for f in futures], client
+
+
+def test_client_coalesces_identical_deterministic_requests(dial_server):
+    results, client = _burst(dial_server, SingleFlight(), seed=42)
+
+    assert len(set(m.content for m in results)) == 1
+    assert len(dial_server.requests) == 1
+    assert client.coalescing_stats()["coalesced"] == 7
+
+
+def test_client_does_not_coalesce_random_requests(dial_server):
+    _burst(dial_server, SingleFlight(), temperature=1.0)
+    assert len(dial_server.requests) == 8
+
+
+def test_coalescing_can_be_disabled(dial_server):
+    results, client = _burst(dial_server, None, seed=42)
+    assert len(dial_server.requests) == 8
+    assert client.coalescing_stats() is None
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""
+Test for task/models/completion.py and DialClient.get_completions
+"""
+import importlib.util
+
+import pytest
+
+from task.app.client import DialClient
+from task.models.completion import CompletionResult
+from task.models.message import Message
+from task.models.role import Role
+
+spec = importlib.util.spec_from_file_location(
+    "task_2_n",
+    "task/2-task-n.py"
+)
+task_2_n = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(task_2_n)
+
+MESSAGES = [Message(Role.USER, "Why is the snow white?")]
+
+
+def test_from_response_keeps_every_choice():
+    result = CompletionResult.from_response({
+        "id": "chatcmpl-1",
+        "model": "gpt-4o",
+        "created": 1,
+        "choices": [
+            {"index": 1, "finish_reason": "length", "message": {"content": "b"}},
+            {"index": 0, "finish_reason": "stop", "message": {"content": "a"}},
+        ],
+        "usage": {"total_tokens": 3},
+    })
+
+    assert result.message == Message(Role.AI, "a")
+    assert [c.finish_reason for c in result.choices] == ["stop", "length"]
+    assert result.messages == [Message(Role.AI, "a"), Message(Role.AI, "b")]
+    assert result.usage == {"total_tokens": 3}
+    assert result.id == "chatcmpl-1"
+
+
+def test_get_completions_returns_all_choices_in_one_request(dial_server, capsys):
+    client = DialClient(endpoint=dial_server.endpoint, deployment_name="gpt-4o")
+
+    result = client.get_completions(MESSAGES, n=3)
+
+    assert len(dial_server.requests) == 1
+    assert len(result.choices) == 3
+    assert result.usage["completion_tokens"] == 15
+    assert capsys.readouterr().out.count("Hello from the fake DIAL #") == 3
+
+
+def test_get_completions_rejects_stream(dial_server):
+    client = DialClient(endpoint=dial_server.endpoint, deployment_name="gpt-4o")
+
+    with pytest.raises(ValueError, match="stream_completion"):
+        client.get_completions(MESSAGES, stream=True)
+    assert dial_server.requests == []
+
+
+def test_task_2_uses_client(dial_server, monkeypatch):
+    monkeypatch.setattr(task_2_n, "DIAL_ENDPOINT", dial_server.endpoint)
+
+    result = task_2_n.run(deployment_name="claude-3-5-haiku@20241022", n=2, print_only_content=True)
+
+    assert result["n"] == 2
+    assert [c["index"] for c in result["choices"]] == [0, 1]
+    assert result["choices"][0]["finish_reason"] == "stop"
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+"""
+Test for task/app/concurrency.py
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from conftest import completion_body, sse_chunks
+from task.app.breaker import BreakerConfig, BreakerRegistry
+from task.app.cassette import Cassette, CassetteMissError
+from task.app.client import DialClient
+from task.app.concurrency import AdaptiveLimiter, ConcurrencyRegistry, remaining_ratio
+from task.app.retry import NO_RETRY
+from task.models.message import Message
+from task.models.role import Role
+
+MESSAGES = [Message(Role.USER, "Hi")]
+
+
+def test_additive_increase_on_healthy_calls():
+    limiter = AdaptiveLimiter("gpt-4o", initial_limit=2, latency_window=1000)
+    for _ in range(10):
+        limiter.acquire()
+        limiter.release(0.1)
+
+    assert limiter.snapshot()["limit"] >= 4
+
+
+def test_multiplicative_decrease_on_throttling_once_per_cooldown():
+    limiter = AdaptiveLimiter("gpt-4o", initial_limit=16, cooldown=60)
+    for _ in range(3):
+        limiter.acquire()
+        limiter.release(0.1, overloaded=True)
+
+    assert limiter.snapshot() == {"limit": 8, "in_flight": 0, "best_p95": None, "decreases": 1}
+
+
+def test_decrease_on_rising_p95_latency():
+    limiter = AdaptiveLimiter("gpt-4o", initial_limit=8, latency_window=5, cooldown=0)
+    for latency in [0.1] * 5 + [1.0] * 5:
+        limiter.acquire()
+        limiter.release(latency)
+
+    assert limiter.decreases == 1
+    assert limiter.snapshot()["limit"] < 8
+
+
+def test_decrease_on_low_remaining_quota():
+    headers = {"x-ratelimit-remaining-requests": "5", "x-ratelimit-limit-requests": "100"}
+    assert remaining_ratio(headers) == 0.05
+    assert remaining_ratio({"x-ratelimit-remaining-tokens": "5"}) is None
+
+    limiter = AdaptiveLimiter("gpt-4o", initial_limit=8, cooldown=0)
+    limiter.acquire()
+    limiter.release(0.1, headers=headers)
+    assert limiter.snapshot()["limit"] == 4
+
+
+def test_acquire_blocks_at_limit():
+    limiter = AdaptiveLimiter("gpt-4o", initial_limit=1)
+    limiter.acquire()
+    acquired = threading.Event()
+    waiter = threading.Thread(target=lambda: (limiter.acquire(), acquired.set()))
+    waiter.start()
+
+    assert not acquired.wait(0.1)
+    limiter.release(0.1)
+    assert acquired.wait(1)
+    waiter.join()
+
+
+def test_client_shrinks_limit_on_429(dial_server):
+    dial_server.handler = lambda path, data: (429, {"Retry-After": "0"}, {"error": "slow down"})
+    registry = ConcurrencyRegistry(initial_limit=8)
+    client = DialClient(
+        endpoint=dial_server.endpoint, deployment_name="gpt-4o", concurrency=registry, retry_policy=NO_RETRY
+    )
+
+    try:
+        client.get_completion(MESSAGES, False, True)
+    except Exception:
+        pass
+
+    assert registry.limits()["gpt-4o"]["limit"] == 4
+    assert client.concurrency_limit()["in_flight"] == 0
+
+
+def test_client_respects_limit(dial_server):
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def handler(path, data):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        threading.Event().wait(0.02)
+        with lock:
+            active[0] -= 1
+        return 200, {}, completion_body(data)
+
+    dial_server.handler = handler
+    registry = ConcurrencyRegistry(initial_limit=2, max_limit=2)
+    client = DialClient(
+        endpoint=dial_server.endpoint, deployment_name="gpt-4o", concurrency=registry, single_flight=None
+    )
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: client.get_completion(MESSAGES, False, True), range(12)))
+
+    assert peak[0] <= 2
+    assert len(dial_server.requests) == 12
+
+
+def test_attempt_without_outcome_gives_back_its_slot(tmp_path, monkeypatch):
+    monkeypatch.delenv("DIAL_API_KEY", raising=False)
+    registry = ConcurrencyRegistry(initial_limit=2)
+    breakers = BreakerRegistry(BreakerConfig(window=1, min_calls=1, open_duration=0))
+    client = DialClient(
+        endpoint="http://127.0.0.1:9/openai/deployments/{model}/chat/completions",
+        deployment_name="gpt-4o",
+        concurrency=registry,
+        breakers=breakers,
+        cassette=Cassette(str(tmp_path / "empty.jsonl")),
+    )
+    breakers.get("gpt-4o", "http://127.0.0.1:9/openai/deployments/gpt-4o/chat/completions").record(False, 0.01)
+
+    for _ in range(3):
+        with pytest.raises(CassetteMissError):
+            client.get_completion(MESSAGES, False, True)
+
+    assert client.concurrency_limit()["in_flight"] == 0
+    assert client.breaker_state()["state"] == "half_open"
+
+
+def test_streams_hold_their_slot_until_closed(dial_server):
+    dial_server.handler = lambda path, data: (200, {}, sse_chunks(["a", "b"]))
+    registry = ConcurrencyRegistry(initial_limit=1, max_limit=1)
+    client = DialClient(endpoint=dial_server.endpoint, deployment_name="gpt-4o", concurrency=registry, observers=[])
+
+    stream = client.stream_completion(MESSAGES)
+    assert client.concurrency_limit()["in_flight"] == 1
+    assert "".join(stream) == "ab"
+    assert client.concurrency_limit()["in_flight"] == 0
+
+    stream = client.stream_completion(MESSAGES)
+    next(iter(stream))
+    stream.close()
+    stream.close()
+    assert client.concurrency_limit()["in_flight"] == 0
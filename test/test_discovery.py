@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""
+Test for task/app/discovery.py
+"""
+import json
+import time
+
+from task.app.cache import key_fingerprint
+from task.app.discovery import CATALOG_VERSION, ModelCatalog, models_url
+from task.app.router import Router
+
+LISTING = {"data": [
+    {"id": "gpt-4o", "capabilities": {"chat_completion": True}},
+    {"id": "text-embedding-3-small-1", "capabilities": {"chat_completion": False, "embeddings": True}},
+    {"id": "gemini-2.0-flash"},
+]}
+
+
+def _listing_handler(path, headers):
+    if headers.get("If-None-Match") == '"v1"':
+        return 304, {}, b""
+    return 200, {"ETag": '"v1"'}, LISTING
+
+
+def _entry(url: str, fetched_at: float) -> dict:
+    return {
+        "version": CATALOG_VERSION,
+        "url": url,
+        "key": key_fingerprint("test-key-0123456789"),
+        "fetched_at": fetched_at,
+        "etag": '"v1"',
+        "data": LISTING["data"],
+    }
+
+
+def test_models_url_is_derived_from_the_completion_endpoint():
+    endpoint = "https://ai-proxy.lab.epam.com/openai/deployments/{model}/chat/completions"
+    assert models_url(endpoint) == "https://ai-proxy.lab.epam.com/openai/models"
+
+
+def test_first_call_fetches_then_serves_from_disk(dial_server, tmp_path):
+    dial_server.handler = _listing_handler
+    path = str(tmp_path / "models.json")
+
+    catalog = ModelCatalog(path, endpoint=dial_server.endpoint)
+    assert catalog.chat_models() == ["gpt-4o", "gemini-2.0-flash"]
+
+    restarted = ModelCatalog(path, endpoint=dial_server.endpoint)
+    assert restarted.get("gpt-4o") == LISTING["data"][0]
+    assert Router.from_catalog(restarted, breakers=None).candidates == ["gpt-4o", "gemini-2.0-flash"]
+    assert len(dial_server.requests) == 1
+
+
+def test_stale_listing_is_served_and_revalidated_in_background(dial_server, tmp_path):
+    dial_server.handler = _listing_handler
+    path = str(tmp_path / "models.json")
+    catalog = ModelCatalog(path, ttl=3600, endpoint=dial_server.endpoint)
+    with open(path, "w") as f:
+        json.dump(_entry(catalog.url, time.time() - 7200), f)
+
+    assert catalog.names() == ["gpt-4o", "text-embedding-3-small-1", "gemini-2.0-flash"]
+    catalog.wait_for_refresh(5)
+
+    assert dial_server.requests[0][1]["If-None-Match"] == '"v1"'
+    assert catalog.stats()["not_modified"] == 1
+    assert catalog.stats()["age"] < 5
+
+
+def test_listing_of_another_endpoint_or_key_is_ignored(dial_server, tmp_path, monkeypatch):
+    dial_server.handler = _listing_handler
+    path = str(tmp_path / "models.json")
+    with open(path, "w") as f:
+        json.dump(_entry("https://other-proxy/openai/models", time.time()), f)
+
+    assert ModelCatalog(path, endpoint=dial_server.endpoint).names()[0] == "gpt-4o"
+    assert len(dial_server.requests) == 1
+    assert "If-None-Match" not in dial_server.requests[0][1]
+
+    monkeypatch.setenv("DIAL_API_KEY", "other-key-0123456789")
+    ModelCatalog(path, endpoint=dial_server.endpoint).names()
+    assert len(dial_server.requests) == 2
+    assert "If-None-Match" not in dial_server.requests[1][1]
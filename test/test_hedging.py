@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+"""
+Test for task/app/hedging.py
+"""
+import time
+
+import pytest
+
+from conftest import sse_chunks
+from task.app import hedging
+from task.app.hedging import FallbackExhaustedError, HedgedClient
+from task.app.observers import ClientObserver
+from task.app.retry import NO_RETRY
+from task.app.transport import RequestCancelled
+from task.models.message import Message
+from task.models.role import Role
+
+MESSAGES = [Message(Role.USER, "Hi")]
+CHAIN = ["gpt-4o", "gpt-4o-2024-08-06", "gpt-4o-2024-11-20"]
+
+
+def _slow_on(slow: str, seconds: float):
+    def handler(path, data):
+        chunks = sse_chunks([path.split("/")[3], " done"])
+        if slow in path:
+            chunks.insert(1, seconds)
+        return 200, {}, chunks
+    return handler
+
+
+def test_hedge_wins_when_primary_is_slow(dial_server):
+    dial_server.handler = _slow_on("/gpt-4o/", 1.0)
+    with HedgedClient(dial_server.endpoint, CHAIN, hedge_delay=0.1) as client:
+        started = time.monotonic()
+        result = client.get_completions(MESSAGES)
+
+        assert time.monotonic() - started < 0.8
+        assert result.model == "gpt-4o-2024-08-06"
+        assert result.message.content == "gpt-4o-2024-08-06 done"
+        assert client.stats()["hedges"] == 1
+        assert client.stats()["cancelled"] == 1
+    assert len(dial_server.requests) == 2
+
+
+def test_primary_answers_before_hedge_delay(dial_server):
+    dial_server.handler = _slow_on("nothing", 0)
+    with HedgedClient(dial_server.endpoint, CHAIN, hedge_delay=1.0) as client:
+        assert client.get_completions(MESSAGES).model == "gpt-4o"
+        assert client.stats()["hedges"] == 0
+    assert len(dial_server.requests) == 1
+
+
+def test_fallback_chain_on_failure(dial_server):
+    def handler(path, data):
+        if "2024-11-20" not in path:
+            return 500, {}, {"error": "boom"}
+        return 200, {}, sse_chunks(["ok"])
+
+    dial_server.handler = handler
+    with HedgedClient(dial_server.endpoint, CHAIN, hedge_delay=5, retry_policy=NO_RETRY) as client:
+        result = client.get_completions(MESSAGES)
+
+        assert result.model == "gpt-4o-2024-11-20"
+        assert client.stats()["fallbacks"] == 2
+
+
+def test_fallback_on_missed_deadline(dial_server):
+    dial_server.handler = _slow_on("/gpt-4o/", 1.0)
+    with HedgedClient(dial_server.endpoint, CHAIN[:2], max_hedges=0, attempt_deadline=0.2) as client:
+        assert client.get_completions(MESSAGES).model == "gpt-4o-2024-08-06"
+
+
+def test_all_deployments_failing(dial_server):
+    dial_server.handler = lambda path, data: (500, {}, {"error": "boom"})
+    with HedgedClient(dial_server.endpoint, CHAIN[:2], retry_policy=NO_RETRY) as client:
+        with pytest.raises(FallbackExhaustedError) as error:
+            client.get_completions(MESSAGES)
+    assert set(error.value.errors) == set(CHAIN[:2])
+
+
+def test_hedge_delay_follows_observed_p95(dial_server):
+    with HedgedClient(dial_server.endpoint, CHAIN[:1]) as client:
+        assert client.hedge_delay() == 2.0
+        for _ in range(10):
+            client.get_completions(MESSAGES)
+        assert client.hedge_delay() < 1.0
+
+
+def test_cancelled_primaries_keep_the_hedge_delay_up(dial_server, monkeypatch):
+    monkeypatch.setattr(hedging, "MIN_LATENCY_SAMPLES", 1)
+    primary_latency = [0.02]
+
+    def handler(path, data):
+        time.sleep(primary_latency[0] if "/gpt-4o/" in path else 0.1)
+        return 200, {}, sse_chunks(["ok"])
+
+    dial_server.handler = handler
+    with HedgedClient(dial_server.endpoint, CHAIN[:2]) as client:
+        client.get_completions(MESSAGES)
+        assert client.hedge_delay() < 0.1
+
+        # the primary slows down and loses to the hedge, but its cancelled attempts still count
+        primary_latency[0] = 0.4
+        for _ in range(6):
+            client.get_completions(MESSAGES)
+        assert client.hedge_delay() >= 0.4
+
+
+def test_losers_waiting_for_headers_are_cancelled_at_once(dial_server):
+    def handler(path, data):
+        if "/gpt-4o/" in path:
+            time.sleep(1.0)
+        return 200, {}, sse_chunks(["ok"])
+
+    class Errors(ClientObserver):
+        def __init__(self):
+            self.errors = []
+
+        def on_error(self, event):
+            self.errors.append((event.deployment, event.error, time.monotonic()))
+
+    errors = Errors()
+    dial_server.handler = handler
+    with HedgedClient(dial_server.endpoint, CHAIN[:2], hedge_delay=0.1, observers=[errors]) as client:
+        assert client.get_completions(MESSAGES).model == "gpt-4o-2024-08-06"
+        won = time.monotonic()
+        time.sleep(0.3)
+
+    [(deployment, error, at)] = errors.errors
+    assert deployment == "gpt-4o" and isinstance(error, RequestCancelled)
+    assert at - won < 0.2
+
+
+def test_client_options_stay_out_of_the_requests(dial_server, capsys):
+    dial_server.handler = lambda path, data: (200, {}, sse_chunks(["ok"]))
+    with HedgedClient(dial_server.endpoint, CHAIN[:1]) as client:
+        client.get_completions(MESSAGES, print_request=True, print_only_content=False, stream=True, seed=1)
+
+    assert [data for _, data in dial_server.requests] == [
+        {"messages": [{"role": "user", "content": "Hi"}], "seed": 1, "stream": True}
+    ]
+    assert " REQUEST " not in capsys.readouterr().out
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+"""
+Test for task/app/loadgen.py
+"""
+import json
+import random
+
+from task.app.loadgen import LatencyHistogram, LoadGenerator, WorkItem, compare, parse_mix, poisson_arrivals
+from task.app.retry import NO_RETRY
+from task.app.standin import LatencyModel, StandInConfig, StandInServer
+
+
+def test_histogram_percentiles_keep_three_significant_digits():
+    histogram = LatencyHistogram()
+    for ms in range(1, 10001):
+        histogram.record(ms / 1000)
+
+    assert histogram.count == 10000
+    for p, expected in ((50, 5.0), (90, 9.0), (99, 9.9), (99.9, 9.99)):
+        assert abs(histogram.percentile(p) - expected) / expected < 0.001
+    assert histogram.percentile(100) == 10.0
+    assert len(histogram.counts) < 10000
+
+
+def test_histogram_merge_and_round_trip():
+    first, second = LatencyHistogram(), LatencyHistogram()
+    for value in (0.01, 0.02, 0.03):
+        first.record(value)
+    second.record(2.5)
+    first.merge(second)
+
+    restored = LatencyHistogram.from_dict(json.loads(json.dumps(first.to_dict())))
+    assert restored.count == 4
+    assert restored.summary() == first.summary()
+    assert restored.percentile(99) == 2.5
+
+
+def test_poisson_arrivals_match_the_rate():
+    arrivals = poisson_arrivals(200, 50, random.Random(1))
+    assert abs(len(arrivals) - 10000) < 300
+    assert arrivals == sorted(arrivals) and arrivals[-1] < 50
+
+
+def test_parse_mix(tmp_path):
+    assert parse_mix("gpt-4o=3,gemini-2.0-flash") == [WorkItem("gpt-4o", 3.0), WorkItem("gemini-2.0-flash", 1.0)]
+    path = tmp_path / "mix.json"
+    path.write_text(json.dumps([{"deployment": "gpt-4o", "params": {"temperature": 0}, "stream": True}]))
+    assert parse_mix(str(path)) == [WorkItem("gpt-4o", params={"temperature": 0}, stream=True)]
+
+
+def test_open_loop_run_reports_latency_ttft_and_errors(monkeypatch):
+    monkeypatch.setenv("DIAL_API_KEY", "test-key-0123456789")
+    config = StandInConfig(latency=LatencyModel.parse("0.02"), rate_5xx=0.2, words=(5, 5))
+    mix = [WorkItem("gpt-4o", 3, {"max_tokens": 3}), WorkItem("gemini-2.0-flash", 1, stream=True)]
+    with StandInServer(config=config, seed=1) as server:
+        generator = LoadGenerator(
+            mix, rps=100, duration=1, endpoint=server.endpoint, seed=3, retry_policy=NO_RETRY, breakers=None
+        )
+        report = generator.run()
+
+    summary = report["summary"]
+    assert summary["sent"] == summary["succeeded"] + summary["failed"]
+    assert 60 < summary["sent"] < 140
+    assert set(summary["errors"]) <= {"HTTP 500", "HTTP 502", "HTTP 503", "HTTP 504"} and summary["failed"] > 0
+    latency = summary["latency_ms"]
+    assert 20 <= latency["p50"] <= latency["p90"] <= latency["p99"] <= latency["p99.9"] <= latency["max"]
+    assert 0 < summary["ttft_ms"]["count"] < summary["succeeded"]
+    assert set(summary["by_deployment_ms"]) == {"gpt-4o", "gemini-2.0-flash"}
+    assert LatencyHistogram.from_dict(report["histograms"]["latency"]).count == summary["succeeded"]
+    assert any(line.startswith("latency_ms p99:") for line in compare(report, report))
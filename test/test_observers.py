@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+"""
+Test for task/app/observers.py
+"""
+import pytest
+
+from task.app.client import DialClient
+from task.app.errors import DialHTTPError
+from task.app.observers import ClientObserver, ConsoleObserver
+from task.app.retry import NO_RETRY, RetryPolicy
+from task.app.standin import StandInConfig, StandInServer
+from task.models.message import Message
+from task.models.role import Role
+
+MESSAGES = [Message(Role.USER, "Hi")]
+
+
+class Recorder(ClientObserver):
+    def __init__(self):
+        self.events = []
+
+    def on_request(self, event):
+        self.events.append(("request", event))
+
+    def on_response(self, event):
+        self.events.append(("response", event))
+
+    def on_retry(self, event):
+        self.events.append(("retry", event))
+
+    def on_error(self, event):
+        self.events.append(("error", event))
+
+    def on_stream_chunk(self, event):
+        self.events.append(("chunk", event))
+
+    def kinds(self) -> list[str]:
+        return [kind for kind, _ in self.events]
+
+
+@pytest.fixture
+def standin(monkeypatch):
+    monkeypatch.setenv("DIAL_API_KEY", "test-key-0123456789")
+    with StandInServer(config=StandInConfig(words=(4, 4)), seed=1) as server:
+        yield server
+
+
+def _client(server: StandInServer, observers, **kwargs) -> DialClient:
+    return DialClient(
+        endpoint=server.endpoint, deployment_name="gpt-4o", single_flight=None, observers=observers, **kwargs
+    )
+
+
+def test_completion_events_carry_timings_and_sizes(standin, capsys):
+    recorder = Recorder()
+    _client(standin, [recorder]).get_completion(MESSAGES, True, False, n=2)
+
+    assert recorder.kinds() == ["request", "response"]
+    request, response = recorder.events[0][1], recorder.events[1][1]
+    assert request.deployment == "gpt-4o" and request.messages == 1 and not request.stream
+    assert request.request_bytes == len('{"messages": [{"role": "user", "content": "Hi"}], "n": 2}')
+    assert response.latency > 0 and response.response_bytes > 100
+    assert len(response.result.choices) == 2
+    assert capsys.readouterr().out == ""
+
+
+def test_stream_events(standin):
+    recorder = Recorder()
+    stream = _client(standin, [recorder]).stream_completion(MESSAGES)
+    text = "".join(stream)
+
+    chunks = [event for kind, event in recorder.events if kind == "chunk"]
+    assert recorder.kinds()[0] == "request" and recorder.kinds()[-1] == "response"
+    assert [chunk.index for chunk in chunks] == list(range(len(chunks)))
+    assert "".join(chunk.delta for chunk in chunks) == text
+    assert chunks[-1].elapsed >= chunks[0].elapsed
+    response = recorder.events[-1][1]
+    assert response.stream is stream and response.response_bytes == stream.bytes_received > len(text)
+
+
+def test_retry_and_error_events(standin):
+    recorder = Recorder()
+    standin.config = StandInConfig(rate_429=1.0, retry_after=0)
+    client = _client(standin, [recorder], retry_policy=RetryPolicy(max_attempts=3, base_delay=0.001), breakers=None)
+    with pytest.raises(DialHTTPError):
+        client.get_completions(MESSAGES)
+
+    assert recorder.kinds() == ["request", "retry", "retry", "error"]
+    retry = recorder.events[1][1]
+    assert retry.reason == "HTTP 429" and retry.attempt == 0 and retry.delay >= 0
+    assert isinstance(recorder.events[-1][1].error, DialHTTPError)
+
+    standin.config = StandInConfig(reset_rate=1.0)
+    with pytest.raises(Exception):
+        _client(standin, [recorder], retry_policy=NO_RETRY, breakers=None).stream_completion(MESSAGES)
+    assert recorder.kinds()[-1] == "error"
+
+
+def test_console_is_the_default_and_can_be_opted_out(standin, capsys):
+    _client(standin, None).get_completion(MESSAGES, True, True)
+    out = capsys.readouterr().out
+    assert " REQUEST " in out and " RESPONSE " in out
+
+    _client(standin, []).get_completion(MESSAGES, True, False, stream=True)
+    assert capsys.readouterr().out == ""
+
+    _client(standin, [ConsoleObserver(print_only_content=False)]).get_completion(MESSAGES, True, True)
+    out = capsys.readouterr().out
+    assert " REQUEST " not in out and '"usage"' in out
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""
+Test for task/app/ratelimit.py
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from task.app.client import DialClient
+from task.app.ratelimit import RateLimiter, RateLimitRegistry, TokenBucket, estimate_request_tokens
+from task.app.standin import StandInServer
+from task.models.message import Message
+from task.models.role import Role
+
+MESSAGES = [Message(Role.USER, "Hi")]
+
+
+def test_token_bucket_reservations_queue_in_order():
+    bucket = TokenBucket(capacity=2, refill_per_second=10)
+    now = time.monotonic()
+
+    assert bucket.reserve(1, now) == 0
+    assert bucket.reserve(1, now) == 0
+    assert abs(bucket.reserve(1, now) - 0.1) < 1e-6
+    assert abs(bucket.reserve(1, now) - 0.2) < 1e-6
+
+
+def test_estimate_request_tokens():
+    request = {"messages": [{"role": "user", "content": "x" * 40}], "max_tokens": 50, "n": 2}
+    assert estimate_request_tokens(request) == 10 + 100
+    assert estimate_request_tokens({"messages": []}) == 256
+
+
+def test_reconcile_returns_overestimated_tokens():
+    registry = RateLimitRegistry()
+    limiter = registry.configure("key", tokens_per_minute=1000)
+
+    reservation = registry.acquire("key", "gpt-4o", 600)
+    assert limiter.stats()["tokens_available"] < 401
+    reservation.reconcile(100)
+    assert 899 < limiter.stats()["tokens_available"] <= 1000
+
+
+def test_key_wide_and_deployment_limits_both_apply():
+    registry = RateLimitRegistry()
+    registry.configure("key", requests_per_minute=600)
+    registry.configure("key", requests_per_minute=60, deployment_name="gpt-4o")
+
+    assert len(registry.limiters_for("key", "gpt-4o")) == 2
+    assert len(registry.limiters_for("key", "gemini-2.0-flash")) == 1
+    assert registry.limiters_for("other-key", "gpt-4o") == []
+
+
+def test_async_acquire_does_not_block_loop():
+    registry = RateLimitRegistry()
+    registry.configure("key", requests_per_minute=3000, burst=0)
+
+    async def main():
+        return await asyncio.gather(*(registry.acquire_async("key", "gpt-4o", 1) for _ in range(12)))
+
+    started = time.monotonic()
+    asyncio.run(main())
+    assert 0.15 < time.monotonic() - started < 0.5
+
+
+def test_client_waits_for_capacity(dial_server):
+    registry = RateLimitRegistry()
+    registry.configure("test-key-0123456789", requests_per_minute=2400, deployment_name="gpt-4o", burst=0)
+    client = DialClient(endpoint=dial_server.endpoint, deployment_name="gpt-4o", rate_limits=registry)
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: client.get_completion(MESSAGES, False, True), range(30)))
+    elapsed = time.monotonic() - started
+
+    assert len(dial_server.requests) == 30
+    assert elapsed >= 0.7
+    assert RateLimiter(60).stats()["requests_available"] == 60
+
+
+def test_streams_reconcile_their_reservation(monkeypatch):
+    monkeypatch.setenv("DIAL_API_KEY", "test-key-0123456789")
+    registry = RateLimitRegistry()
+    limiter = registry.configure("test-key-0123456789", tokens_per_minute=100000)
+    with StandInServer(seed=1) as server:
+        client = DialClient(endpoint=server.endpoint, deployment_name="gpt-4o", rate_limits=registry, observers=[])
+
+        # each stream reserves 5000+ tokens; reconciled, only the few it used stay taken
+        "".join(client.stream_completion(MESSAGES, max_tokens=5000))
+        assert limiter.stats()["tokens_available"] > 99800
+
+        stream = client.stream_completion(MESSAGES, max_tokens=5000)
+        next(iter(stream))
+        stream.close()
+        assert limiter.stats()["tokens_available"] > 99800
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""
+Test for task/app/retry.py
+"""
+import time
+from email.utils import formatdate
+
+import pytest
+
+from conftest import completion_body
+from task.app.client import DialClient
+from task.app.errors import DialHTTPError
+from task.app.retry import NO_RETRY, RetryBudget, RetryPolicy, parse_retry_after
+from task.models.message import Message
+from task.models.role import Role
+
+MESSAGES = [Message(Role.USER, "Hi")]
+FAST = RetryPolicy(base_delay=0.01, max_delay=0.05)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after({"Retry-After": "2"}) == 2.0
+    assert parse_retry_after({"x-ratelimit-reset-requests": "1s", "x-ratelimit-reset-tokens": "6m0s"}) == 360.0
+    assert parse_retry_after({"x-ratelimit-reset-tokens": "250ms"}) == 0.25
+    assert 8 < parse_retry_after({"Retry-After": formatdate(time.time() + 10, usegmt=True)}) <= 10
+    assert parse_retry_after({"Retry-After": "soon"}) is None
+    assert parse_retry_after({}) is None
+
+
+def test_backoff_has_full_jitter_and_cap():
+    policy = RetryPolicy(base_delay=1, max_delay=4)
+    delays = [policy.backoff(10) for _ in range(200)]
+    assert all(0 <= d <= 4 for d in delays)
+    assert min(delays) < 1 < max(delays)
+    assert policy.delay(0, {"Retry-After": "120"}) is None
+
+
+def test_retry_budget_caps_retries():
+    budget = RetryBudget(ratio=0.5, max_tokens=2)
+    assert budget.try_spend() and budget.try_spend()
+    assert not budget.try_spend()
+    budget.on_request()
+    budget.on_request()
+    assert budget.try_spend()
+    assert budget.stats()["budget_exhausted"] == 1
+
+
+def _flaky(dial_server, failures: list[tuple[int, dict]]):
+    def handler(path, data):
+        if failures:
+            status, headers = failures.pop(0)
+            return status, dict(headers), {"error": "try later"}
+        return 200, {}, completion_body(data)
+
+    dial_server.handler = handler
+
+
+def test_retries_throttling_and_gateway_errors(dial_server):
+    _flaky(dial_server, [(429, {"Retry-After": "0"}), (503, {})])
+    client = DialClient(endpoint=dial_server.endpoint, deployment_name="gpt-4o", retry_policy=FAST)
+
+    message = client.get_completion(MESSAGES, print_request=False, print_only_content=True)
+
+    assert message.content == "Hello from the fake DIAL"
+    assert len(dial_server.requests) == 3
+    assert client.retry_stats()["retries"] == 2
+
+
+def test_does_not_retry_client_errors(dial_server):
+    _flaky(dial_server, [(400, {})])
+    client = DialClient(endpoint=dial_server.endpoint, deployment_name="gpt-4o", retry_policy=FAST)
+
+    with pytest.raises(DialHTTPError) as error:
+        client.get_completion(MESSAGES, print_request=False, print_only_content=True)
+    assert error.value.status_code == 400
+    assert len(dial_server.requests) == 1
+
+
+def test_gives_up_after_max_attempts_and_budget(dial_server):
+    _flaky(dial_server, [(502, {})] * 10)
+    budget = RetryBudget(ratio=0, max_tokens=3)
+    client = DialClient(
+        endpoint=dial_server.endpoint, deployment_name="gpt-4o", retry_policy=FAST, retry_budget=budget,
+    )
+
+    with pytest.raises(DialHTTPError, match="HTTP 502"):
+        client.get_completion(MESSAGES, print_request=False, print_only_content=True)
+    assert len(dial_server.requests) == 4
+
+    with pytest.raises(DialHTTPError):
+        client.get_completion(MESSAGES, print_request=False, print_only_content=True)
+    assert len(dial_server.requests) == 5
+    assert budget.stats()["budget_exhausted"] == 1
+
+
+def test_no_retry_policy(dial_server):
+    _flaky(dial_server, [(429, {})])
+    client = DialClient(endpoint=dial_server.endpoint, deployment_name="gpt-4o", retry_policy=NO_RETRY)
+
+    with pytest.raises(DialHTTPError):
+        client.get_completion(MESSAGES, print_request=False, print_only_content=True)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""
+Test for task/app/router.py
+"""
+import pytest
+
+from conftest import completion_body
+from task.app.breaker import BreakerRegistry
+from task.app.capabilities import model_family, supports_param
+from task.app.client import DialClient
+from task.app.retry import NO_RETRY
+from task.app.router import NoRouteError, RouteConstraints, Router
+from task.constants import DIAL_ENDPOINT
+from task.models.message import Message
+from task.models.role import Role
+
+MESSAGES = [Message(Role.USER, "Hi")]
+CANDIDATES = ["gpt-4o", "gpt-4o-2024-08-06", "gemini-2.0-flash", "claude-3-7-sonnet@20250219"]
+
+
+def _warm(router: Router, name: str, latency: float, tokens: int = 100, success: bool = True):
+    for _ in range(router.min_samples):
+        router.record_call(name, success, latency)
+        router.record_throughput(name, tokens, latency)
+
+
+def test_capability_helpers():
+    assert model_family("gpt-4o-2024-08-06") == "gpt-4o"
+    assert model_family("claude-3-7-sonnet@20250219") == "claude-3-7-sonnet"
+    assert supports_param("gpt-4o", "seed")
+    assert not supports_param("gemini-2.0-flash", "seed")
+    assert supports_param("gemini-2.0-flash", "temperature")
+
+
+def test_constraints_filter_candidates():
+    router = Router(CANDIDATES, breakers=None)
+
+    assert router.eligible({"seed": 1}) == ["gpt-4o", "gpt-4o-2024-08-06"]
+    assert router.eligible(constraints=RouteConstraints(family="google")) == ["gemini-2.0-flash"]
+    assert router.eligible(constraints=RouteConstraints(family="gpt-4o")) == ["gpt-4o", "gpt-4o-2024-08-06"]
+
+    _warm(router, "gpt-4o", 5.0)
+    assert "gpt-4o" not in router.eligible(constraints=RouteConstraints(max_latency=2.0))
+
+    with pytest.raises(NoRouteError):
+        router.select({"seed": 1}, RouteConstraints(family="anthropic"))
+
+
+def test_picks_fastest_and_avoids_failing():
+    router = Router(CANDIDATES[:3], explore=0, breakers=None)
+    assert router.select() == "gpt-4o"
+
+    _warm(router, "gpt-4o", 2.0)
+    _warm(router, "gpt-4o-2024-08-06", 1.0)
+    _warm(router, "gemini-2.0-flash", 0.5, success=False)
+    assert router.select() == "gpt-4o-2024-08-06"
+
+
+def test_skips_open_circuits():
+    breakers = BreakerRegistry()
+    router = Router(CANDIDATES[:2], explore=0, breakers=breakers)
+    for _ in range(5):
+        breakers.get("gpt-4o", DIAL_ENDPOINT.format(model="gpt-4o")).record(False, 0.1)
+
+    assert router.eligible() == ["gpt-4o-2024-08-06"]
+
+
+def test_routed_client(dial_server):
+    dial_server.handler = lambda path, data: (
+        (500, {}, {"error": "down"}) if "/gpt-4o/" in path else (200, {}, completion_body(data))
+    )
+    router = Router(["gpt-4o", "gpt-4o-2024-08-06"], min_samples=1, explore=0)
+    client = DialClient(endpoint=dial_server.endpoint, deployment_name=router, retry_policy=NO_RETRY)
+
+    with pytest.raises(Exception):
+        client.get_completion(MESSAGES, False, True)
+    for _ in range(3):
+        client.get_completion(MESSAGES, False, True)
+
+    paths = [path for path, _ in dial_server.requests]
+    assert paths[0].startswith("/openai/deployments/gpt-4o/")
+    assert all("gpt-4o-2024-08-06" in path for path in paths[1:])
+    assert client.routing_stats()["gpt-4o"]["error_rate"] == 1.0
+    assert client.routing_stats()["gpt-4o-2024-08-06"]["tokens_per_second"] > 0
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+"""
+Test for task/app/scheduler.py
+"""
+import threading
+import time
+
+from conftest import completion_body, sse_chunks
+from task.app.client import DialClient
+from task.app.ratelimit import RateLimitRegistry
+from task.app.scheduler import ClassConfig, Priority, Scheduler
+from task.models.message import Message
+from task.models.role import Role
+
+MESSAGES = [Message(Role.USER, "Hi")]
+
+
+def _queue_behind_busy_slot(scheduler: Scheduler, priorities: list[Priority]) -> list[Priority]:
+    """Queue requests while the only slot is taken, then return the order they were granted in."""
+    scheduler.acquire(Priority.DEFAULT)
+    order = []
+    lock = threading.Lock()
+
+    def worker(priority):
+        with scheduler.slot(priority):
+            with lock:
+                order.append(priority)
+
+    threads = []
+    for priority in priorities:
+        thread = threading.Thread(target=worker, args=(priority,))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.01)
+    scheduler.release(Priority.DEFAULT)
+    for thread in threads:
+        thread.join()
+    return order
+
+
+def test_interactive_overtakes_queued_batch():
+    scheduler = Scheduler(max_concurrency=1)
+    order = _queue_behind_busy_slot(scheduler, [Priority.BATCH] * 5 + [Priority.INTERACTIVE])
+
+    assert order.index(Priority.INTERACTIVE) <= 1
+
+
+def test_weighted_fair_share():
+    classes = {
+        Priority.INTERACTIVE: ClassConfig(weight=3),
+        Priority.DEFAULT: ClassConfig(weight=1),
+        Priority.BATCH: ClassConfig(weight=1),
+    }
+    scheduler = Scheduler(max_concurrency=1, classes=classes)
+    order = _queue_behind_busy_slot(scheduler, [Priority.BATCH] * 8 + [Priority.INTERACTIVE] * 8)
+
+    assert order[:8].count(Priority.INTERACTIVE) >= 5
+    assert Priority.BATCH in order[:8]
+
+
+def test_class_concurrency_limit():
+    classes = {Priority.BATCH: ClassConfig(max_concurrency=1), Priority.INTERACTIVE: ClassConfig()}
+    scheduler = Scheduler(max_concurrency=4, classes=classes)
+    scheduler.acquire(Priority.BATCH)
+
+    blocked = threading.Thread(target=scheduler.acquire, args=(Priority.BATCH,))
+    blocked.start()
+    scheduler.acquire(Priority.INTERACTIVE)
+    time.sleep(0.05)
+    assert scheduler.stats()["batch"]["waiting"] == 1
+    assert scheduler.stats()["interactive"]["in_flight"] == 1
+
+    scheduler.release(Priority.BATCH)
+    blocked.join(1)
+    assert scheduler.stats()["batch"] == {**scheduler.stats()["batch"], "waiting": 0, "in_flight": 1}
+
+
+def test_client_calls_go_through_scheduler(dial_server):
+    scheduler = Scheduler(max_concurrency=2)
+    dial_server.handler = lambda path, data: (200, {}, completion_body(data))
+    client = DialClient(
+        endpoint=dial_server.endpoint, deployment_name="gpt-4o", scheduler=scheduler, priority=Priority.BATCH
+    )
+    client.get_completion(MESSAGES, False, True)
+
+    assert scheduler.stats()["batch"]["dispatched"] == 1
+    assert scheduler.stats()["batch"]["in_flight"] == 0
+
+
+def test_requests_waiting_for_rate_limits_hold_no_slot(dial_server, monkeypatch):
+    monkeypatch.setenv("DIAL_API_KEY", "test-key-0123456789")
+    scheduler = Scheduler(max_concurrency=1)
+    rate_limits = RateLimitRegistry()
+    rate_limits.configure("test-key-0123456789", requests_per_minute=60, burst=1 / 60)
+    dial_server.handler = lambda path, data: (200, {}, completion_body(data))
+    batch = DialClient(
+        endpoint=dial_server.endpoint, deployment_name="gpt-4o", scheduler=scheduler, priority=Priority.BATCH,
+        rate_limits=rate_limits, single_flight=None,
+    )
+    interactive = DialClient(
+        endpoint=dial_server.endpoint, deployment_name="gpt-4o", scheduler=scheduler,
+        priority=Priority.INTERACTIVE, rate_limits=None, single_flight=None,
+    )
+    # the second batch call sleeps about a second waiting for rate-limit capacity
+    thread = threading.Thread(target=lambda: [batch.get_completion(MESSAGES, False, True) for _ in range(2)])
+    thread.start()
+    time.sleep(0.1)
+
+    started = time.perf_counter()
+    interactive.get_completion(MESSAGES, False, True)
+    assert time.perf_counter() - started < 0.5
+    thread.join()
+
+
+def test_streams_hold_their_batch_slot_while_read(dial_server):
+    def handler(path, data):
+        if not data.get("stream"):
+            return 200, {}, completion_body(data)
+        chunks = sse_chunks(["a", "b"])
+        chunks.insert(2, 0.2)
+        return 200, {}, chunks
+
+    dial_server.handler = handler
+    scheduler = Scheduler(max_concurrency=3, classes={
+        Priority.INTERACTIVE: ClassConfig(weight=8.0),
+        Priority.BATCH: ClassConfig(weight=1.0, max_concurrency=2),
+    })
+    batch = DialClient(
+        endpoint=dial_server.endpoint, deployment_name="gpt-4o", scheduler=scheduler, priority=Priority.BATCH,
+        observers=[],
+    )
+    interactive = DialClient(
+        endpoint=dial_server.endpoint, deployment_name="gpt-4o", scheduler=scheduler,
+        priority=Priority.INTERACTIVE, single_flight=None,
+    )
+    streams = [batch.stream_completion(MESSAGES) for _ in range(2)]
+    assert scheduler.stats()["batch"]["in_flight"] == 2
+
+    contents = []
+    third = threading.Thread(target=lambda: contents.append("".join(batch.stream_completion(MESSAGES))))
+    third.start()
+    time.sleep(0.2)
+    assert contents == [] and scheduler.stats()["batch"]["waiting"] == 1
+    interactive.get_completion(MESSAGES, False, True)
+
+    assert "".join(streams[0]) == "ab"
+    third.join(timeout=5)
+    assert contents == ["ab"]
+    streams[1].close()
+    assert scheduler.stats()["batch"]["in_flight"] == 0
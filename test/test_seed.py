@@ -5,6 +5,9 @@ Test for task/4-task-seed.py
 import pytest
 import importlib.util
 
+from task.app.batching import RequestBatcher
+from task.app.sweep import cartesian_grid, iter_sweep
+
 spec = importlib.util.spec_from_file_location(
     "task_seed",
     "task/4-task-seed.py"
@@ -77,17 +80,15 @@ def test_determinism_with_seed(model):
 
 def test_no_seed_randomness():
     """Test that without seed, results can vary"""
+    points = cartesian_grid(['gpt-4o'], [USER_MESSAGE], repeats=3)
     results = []
-    
-    # Run multiple times without seed
-    for i in range(3):
-        result = run(
-            deployment_name='gpt-4o',
-            print_request=False,
-            print_only_content=True,
-        )
-        results.append(result.content)
-    
+
+    # Concurrent repeats of the same prompt are merged into a single n=3 request
+    for result in iter_sweep(points, max_concurrency=len(points), batcher=RequestBatcher()):
+        if not result.ok:
+            raise result.error
+        results.append(result.message.content)
+
     # All should be valid responses
     for i, result in enumerate(results):
         assert result is not None
@@ -133,19 +134,16 @@ def test_seed_consistency_across_runs():
 def test_different_seeds_produce_different_results():
     """Test that different seeds can produce different results"""
     seeds = [42, 123, 1000]
+    points = cartesian_grid(['gpt-4o'], [USER_MESSAGE], {'seed': seeds, 'n': [1]})
     results = {}
-    
-    for seed in seeds:
-        result = run(
-            deployment_name='gpt-4o',
-            seed=seed,
-            n=1,
-            print_request=False,
-            print_only_content=True,
-        )
-        results[seed] = result.content
-        print(f"🎯 Seed {seed}: {result.content[:40]}...")
-    
+
+    for result in iter_sweep(points, max_concurrency=len(points)):
+        if not result.ok:
+            raise result.error
+        seed = result.point.params['seed']
+        results[seed] = result.message.content
+        print(f"🎯 Seed {seed}: {result.message.content[:40]}...")
+
     # All results should be valid
     for seed, content in results.items():
         assert content is not None
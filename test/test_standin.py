@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""
+Test for task/app/standin.py
+"""
+import random
+
+import pytest
+import requests
+
+from task.app.client import DialClient
+from task.app.discovery import ModelCatalog
+from task.app.retry import NO_RETRY, RetryPolicy
+from task.app.standin import Distribution, LatencyModel, StandInConfig, StandInServer
+from task.models.message import Message
+from task.models.role import Role
+
+MESSAGES = [Message(Role.USER, "Hi")]
+
+
+@pytest.fixture
+def standin(monkeypatch):
+    monkeypatch.setenv("DIAL_API_KEY", "test-key-0123456789")
+    with StandInServer(seed=1) as server:
+        yield server
+
+
+def _client(server: StandInServer, deployment_name: str = "gpt-4o", **kwargs) -> DialClient:
+    return DialClient(endpoint=server.endpoint, deployment_name=deployment_name, single_flight=None, **kwargs)
+
+
+def test_latency_models():
+    rng = random.Random(0)
+    assert LatencyModel.parse("0.25").sample(rng) == 0.25
+    uniform = LatencyModel.parse("uniform:1:0.5")
+    assert uniform.distribution == Distribution.UNIFORM
+    assert all(0.5 <= uniform.sample(rng) <= 1.5 for _ in range(100))
+    assert LatencyModel.parse("lognormal:0.4:0.6").sample(rng) > 0
+
+
+def test_choices_usage_and_finish_reason(standin):
+    result = _client(standin).get_completions(MESSAGES, n=3, max_tokens=5)
+
+    assert len(result.choices) == 3
+    assert all(choice.finish_reason == "length" for choice in result.choices)
+    assert all(len(choice.message.content.split()) == 5 for choice in result.choices)
+    assert result.usage["completion_tokens"] == 15
+    assert result.model == "gpt-4o"
+
+
+def test_seed_is_deterministic(standin):
+    client = _client(standin)
+    first = client.get_completions(MESSAGES, seed=7).message.content
+    assert client.get_completions(MESSAGES, seed=7).message.content == first
+    assert client.get_completions(MESSAGES, seed=8).message.content != first
+
+
+def test_deployments_without_native_n_return_one_choice(standin):
+    response = requests.post(
+        standin.endpoint.format(model="gemini-2.0-flash"),
+        headers={"api-key": "key"},
+        json={"messages": [{"role": "user", "content": "Hi"}], "n": 3},
+    )
+    assert len(response.json()["choices"]) == 1
+
+
+def test_streaming(standin):
+    stream = _client(standin).stream_completion(MESSAGES, stop=["model"], n=2)
+    text = "".join(stream)
+
+    assert text == stream.content
+    assert stream.finish_reason in ("stop", "client_stop")
+    assert len(stream.contents()) == 2
+    assert stream.usage["completion_tokens"] > 0
+
+
+def test_injected_429_is_retried(standin):
+    standin.config = StandInConfig(rate_429=0.5, retry_after=0)
+    client = _client(standin, retry_policy=RetryPolicy(max_attempts=10, base_delay=0.001), breakers=None)
+    for _ in range(5):
+        client.get_completion(MESSAGES, False, True)
+    assert standin.faults["429"] > 0
+
+
+def test_injected_errors_and_resets(standin):
+    standin.config = StandInConfig(rate_5xx=1.0)
+    with pytest.raises(Exception, match="HTTP 5"):
+        _client(standin, retry_policy=NO_RETRY, breakers=None).get_completion(MESSAGES, False, True)
+
+    standin.config = StandInConfig(reset_rate=1.0)
+    with pytest.raises(requests.ConnectionError):
+        _client(standin, retry_policy=NO_RETRY, breakers=None).get_completion(MESSAGES, False, True)
+
+
+def test_slow_drip_stream(standin):
+    standin.config = StandInConfig(slow_drip_rate=1.0, slow_drip_interval=0.02, words=(5, 5))
+    stream = _client(standin).stream_completion(MESSAGES)
+    list(stream)
+
+    assert min(stream.inter_token_latencies) >= 0.015
+    assert standin.faults["slow_drip"] == 1
+
+
+def test_models_listing_and_auth(standin, tmp_path):
+    catalog = ModelCatalog(str(tmp_path / "models.json"), endpoint=standin.endpoint)
+    assert "gemini-2.0-flash" in catalog.chat_models()
+    catalog.refresh()
+    assert catalog.stats()["not_modified"] == 1
+
+    response = requests.post(standin.endpoint.format(model="gpt-4o"), json={"messages": []})
+    assert response.status_code == 401
+    unknown = requests.post(standin.endpoint.format(model="nope"), headers={"api-key": "k"}, json={"messages": []})
+    assert unknown.status_code == 404
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+"""
+Test for task/app/streaming.py
+"""
+import asyncio
+import inspect
+
+from conftest import sse_chunks
+from task.app.async_client import AsyncDialClient
+from task.app.client import DialClient
+from task.app.concurrency import ConcurrencyRegistry
+from task.app.streaming import iter_sse_data
+from task.models.message import Message
+from task.models.role import Role
+
+MESSAGES = [Message(Role.USER, "Hi")]
+
+
+def test_iter_sse_data():
+    lines = [b": keep-alive", b"data: {\"a\": 1}", b"", b"event: x", b"data: line1", b"data: line2", b"",
+             b"data: [DONE]", b"", b"data: ignored", b""]
+    assert list(iter_sse_data(lines)) == ['{"a": 1}', "line1\nline2"]
+
+
+def test_stream_completion_yields_deltas(dial_server):
+    dial_server.handler = lambda path, data: (200, {}, sse_chunks(["Snow ", "is ", "white."]))
+    client = DialClient(endpoint=dial_server.endpoint, deployment_name="gpt-4o")
+
+    stream = client.stream_completion(MESSAGES, temperature=0)
+    assert list(stream) == ["Snow ", "is ", "white."]
+    assert stream.message == Message(Role.AI, "Snow is white.")
+    assert stream.finish_reason == "stop"
+    assert stream.usage["completion_tokens"] == 3
+    assert stream.ttft is not None
+    assert len(stream.inter_token_latencies) == 2
+    assert dial_server.requests[0][1]["stream"] is True
+
+
+def test_client_options_stay_out_of_the_request_body(dial_server):
+    dial_server.handler = lambda path, data: (200, {}, sse_chunks(["Hi"]))
+    client = DialClient(endpoint=dial_server.endpoint, deployment_name="gpt-4o")
+
+    list(client.stream_completion(MESSAGES, print_only_content=False, stream=True, token_budget=10, temperature=0))
+    assert dial_server.requests[0][1] == {
+        "messages": [{"role": "user", "content": "Hi"}], "temperature": 0, "stream": True
+    }
+
+
+def test_stream_options_stay_out_of_calls_without_streaming(dial_server):
+    client = DialClient(endpoint=dial_server.endpoint, deployment_name="gpt-4o", single_flight=None)
+
+    client.get_completion(MESSAGES, False, True, token_budget=5, client_stop=False)
+    client.get_completions(MESSAGES, token_budget=5, seed=1)
+    assert [data for _, data in dial_server.requests] == [
+        {"messages": [{"role": "user", "content": "Hi"}]},
+        {"messages": [{"role": "user", "content": "Hi"}], "seed": 1},
+    ]
+
+
+def test_get_completion_stream_returns_message(dial_server, capsys):
+    chunks = sse_chunks(["a", "b"])
+    chunks.insert(2, 0.05)
+    dial_server.handler = lambda path, data: (200, {}, chunks)
+    client = DialClient(endpoint=dial_server.endpoint, deployment_name="gpt-4o")
+
+    message = client.get_completion(MESSAGES, print_request=False, print_only_content=True, stream=True)
+    assert message.content == "ab"
+    assert "ab" in capsys.readouterr().out
+
+
+def test_async_stream_completion(dial_server):
+    dial_server.handler = lambda path, data: (200, {}, sse_chunks(["x", "y"]))
+
+    async def main():
+        async with AsyncDialClient(endpoint=dial_server.endpoint, deployment_name="gpt-4o") as client:
+            stream = await client.stream_completion(MESSAGES)
+            deltas = [delta async for delta in stream]
+            return deltas, stream.message
+
+    deltas, message = asyncio.run(main())
+    assert deltas == ["x", "y"]
+    assert message.content == "xy"
+
+
+def test_streams_left_early_give_their_slot_back(dial_server):
+    dial_server.handler = lambda path, data: (200, {}, sse_chunks(["x", "y"]))
+    client = DialClient(
+        endpoint=dial_server.endpoint, deployment_name="gpt-4o", concurrency=ConcurrencyRegistry(), observers=[]
+    )
+
+    with client.stream_completion(MESSAGES) as stream:
+        deltas = iter(stream)
+        assert next(deltas) == "x"
+        assert client.concurrency_limit()["in_flight"] == 1
+    assert client.concurrency_limit()["in_flight"] == 0
+
+    client.stream_completion(MESSAGES)
+    assert client.concurrency_limit()["in_flight"] == 0
+
+    async def main():
+        async with AsyncDialClient(endpoint=dial_server.endpoint, deployment_name="gpt-4o") as async_client:
+            async with await async_client.stream_completion(MESSAGES) as async_stream:
+                assert await async_stream.__anext__() == "x"
+            return inspect.getgeneratorstate(async_stream._deltas)
+
+    assert asyncio.run(main()) == inspect.GEN_CLOSED
+
+
+def test_client_side_stop_spanning_chunks(dial_server):
+    dial_server.handler = lambda path, data: (200, {}, sse_chunks(["The arch", "itec", "ture of LLMs", " is big"]))
+    client = DialClient(endpoint=dial_server.endpoint, deployment_name="claude-3-5-haiku@20241022")
+
+    stream = client.stream_completion(MESSAGES, stop=["\n\n", "architecture"])
+    deltas = list(stream)
+    assert "".join(deltas) == "The "
+    assert stream.finish_reason == "client_stop"
+    assert dial_server.requests[0][1]["stop"] == ["\n\n", "architecture"]
+
+
+def test_client_side_stop_can_be_disabled(dial_server):
+    dial_server.handler = lambda path, data: (200, {}, sse_chunks(["a.", "b"]))
+    client = DialClient(endpoint=dial_server.endpoint, deployment_name="gpt-4o")
+
+    stream = client.stream_completion(MESSAGES, stop=".", client_stop=False)
+    assert "".join(stream) == "a.b"
+    assert stream.finish_reason == "stop"
+
+
+def test_token_budget_closes_stream(dial_server):
+    chunks = sse_chunks(["word " for _ in range(50)])
+    dial_server.handler = lambda path, data: (200, {}, chunks)
+    client = DialClient(endpoint=dial_server.endpoint, deployment_name="gemini-2.0-flash")
+
+    message = client.get_completion(
+        MESSAGES, print_request=False, print_only_content=True, stream=True, token_budget=6,
+    )
+    assert message.content == "word " * 6
+    assert "token_budget" not in dial_server.requests[0][1]
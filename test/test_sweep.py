@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""
+Test for task/app/sweep.py
+"""
+import time
+
+from conftest import completion_body
+from task.app.batching import RequestBatcher
+from task.app.sweep import cartesian_grid, iter_sweep, run_sweep
+
+
+def test_cartesian_grid_skips_none_values():
+    points = cartesian_grid(["gpt-4o", "gemini-2.0-flash"], ["Hi"], {"seed": [42, None], "n": [1]}, repeats=2)
+
+    assert len(points) == 2 * 2 * 2
+    assert points[0].params == {"seed": 42, "n": 1}
+    assert points[2].params == {"n": 1}
+    assert [p.repeat for p in points[:2]] == [0, 1]
+
+
+def test_sweep_runs_concurrently(dial_server, capsys):
+    def slow_handler(path, data):
+        time.sleep(0.2)
+        return 200, {}, completion_body(data, content=path.split("/")[3])
+
+    dial_server.handler = slow_handler
+    points = cartesian_grid(
+        ["gpt-4o", "claude-3-5-haiku@20241022", "gemini-2.0-flash"],
+        ["Name a random animal"],
+        {"temperature": [0.0, 0.4, 0.8, 1.2, 1.6, 2.0]},
+        repeats=5,
+    )
+
+    started = time.monotonic()
+    results = run_sweep(points, max_concurrency=len(points), endpoint=dial_server.endpoint, scheduler=None)
+    elapsed = time.monotonic() - started
+
+    assert len(results) == 90
+    assert not results.errors()
+    assert elapsed < 0.8
+    assert capsys.readouterr().out == ""
+    for deployment, group in results.by_deployment().items():
+        assert len(group) == 30
+        assert all(r.message.content == deployment for r in group)
+    assert sorted(results.by_param("temperature")) == [0.0, 0.4, 0.8, 1.2, 1.6, 2.0]
+
+
+def test_sweep_reports_errors_as_results(dial_server):
+    dial_server.handler = lambda path, data: (
+        (400, {}, {"error": "bad seed"}) if data.get("seed") == -1 else (200, {}, completion_body(data))
+    )
+    points = cartesian_grid(["gpt-4o"], ["Hi"], {"seed": [0, -1, 999999]})
+
+    results = list(iter_sweep(points, max_concurrency=3, endpoint=dial_server.endpoint))
+
+    failed = [r for r in results if not r.ok]
+    assert len(results) == 3
+    assert len(failed) == 1
+    assert failed[0].point.params == {"seed": -1}
+
+
+def test_sweep_repeats_are_batched(dial_server):
+    points = cartesian_grid(["gpt-4o"], ["Name a random animal"], repeats=5)
+
+    results = run_sweep(points, max_concurrency=5, endpoint=dial_server.endpoint, batcher=RequestBatcher(window=0.2))
+
+    assert len(results) == 5
+    assert [data.get("n") for _, data in dial_server.requests] == [5]
@@ -2,12 +2,14 @@
 """
 Test for top_p parameter functionality in DIAL API
 """
+import asyncio
 import importlib.util
 import sys
 import os
 
 sys.path.insert(0, os.path.abspath('.'))
 
+from task.app.async_client import AsyncDialClient, CompletionRequest
 from task.app.client import DialClient
 from task.models.conversation import Conversation
 from task.models.message import Message
@@ -85,30 +87,24 @@ def test_top_p_range():
     print("\nTesting different top_p values in valid range (0.0 to 1.0)...")
     
     try:
-        client = DialClient(
-            endpoint=DIAL_ENDPOINT,
-            deployment_name=DEFAULT_MODEL,
-        )
-        
         test_values = [0.1, 0.3, 0.5, 0.7, 0.9, 1.0]
-        responses = {}
-        
+        requests = []
+
         for top_p_val in test_values:
-            print(f"\n--- Testing with top_p={top_p_val} ---")
             conversation = Conversation()
             conversation.add_message(Message(Role.SYSTEM, DEFAULT_SYSTEM_PROMPT))
             conversation.add_message(Message(Role.USER, f"Explain top_p parameter with value {top_p_val}. Be brief."))
-            
-            response = client.get_completion(
+            requests.append(CompletionRequest(
                 messages=conversation.get_messages(),
-                print_request=False,
-                print_only_content=True,
-                temperature=0.7,
-                top_p=top_p_val
-            )
-            
-            responses[top_p_val] = response
-        
+                params={"temperature": 0.7, "top_p": top_p_val},
+            ))
+
+        async def send_all():
+            async with AsyncDialClient(endpoint=DIAL_ENDPOINT, deployment_name=DEFAULT_MODEL) as client:
+                return await client.gather_completions(requests, max_concurrency=len(requests))
+
+        responses = dict(zip(test_values, asyncio.run(send_all())))
+
         print(f"\nSUCCESS: Tested {len(test_values)} different top_p values successfully")
         return responses
         
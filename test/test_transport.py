@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""
+Test for task/app/transport.py
+"""
+import threading
+import time
+
+import pytest
+import requests
+
+from conftest import sse_chunks
+from task.app.client import DialClient
+from task.app.transport import CancelScope, ConnectionPoolRegistry, RequestCancelled, host_key
+from task.models.message import Message
+from task.models.role import Role
+
+MESSAGES = [Message(Role.USER, "Hi")]
+
+
+def test_host_key_ignores_path_and_deployment():
+    assert host_key("https://AI-proxy.lab.epam.com/openai/deployments/gpt-4o/chat/completions") == \
+        "https://ai-proxy.lab.epam.com"
+    assert host_key("http://127.0.0.1:8080/a") == "http://127.0.0.1:8080"
+
+
+def test_clients_share_keep_alive_connection(dial_server):
+    for deployment in ["gpt-4o", "gemini-2.0-flash", "gpt-4o"]:
+        client = DialClient(endpoint=dial_server.endpoint, deployment_name=deployment)
+        client.get_completion(MESSAGES, print_request=False, print_only_content=True)
+
+    assert len(dial_server.requests) == 3
+    assert dial_server.connections == 1
+
+
+def test_idle_connections_are_evicted(dial_server):
+    with DialClient(endpoint=dial_server.endpoint, deployment_name="gpt-4o", idle_timeout=0) as client:
+        client.get_completion(MESSAGES, print_request=False, print_only_content=True)
+        client.get_completion(MESSAGES, print_request=False, print_only_content=True)
+
+    assert dial_server.connections == 2
+
+
+def test_registry_resize_and_release():
+    registry = ConnectionPoolRegistry()
+    pool = registry.acquire("https://example.com/a", pool_maxsize=4)
+    same = registry.acquire("https://example.com/b", pool_maxsize=16)
+
+    assert pool is same
+    assert pool.pool_maxsize == 16
+    assert registry.stats()["https://example.com"]["clients"] == 2
+
+    registry.release(pool)
+    registry.release(pool)
+    assert registry.stats()["https://example.com"]["clients"] == 0
+    registry.close_all()
+    assert registry.stats() == {}
+
+
+def test_closed_client_rejects_requests(dial_server):
+    client = DialClient(endpoint=dial_server.endpoint, deployment_name="gpt-4o")
+    client.close()
+    try:
+        client.get_completion(MESSAGES, print_request=False, print_only_content=True)
+    except RuntimeError as e:
+        assert "closed" in str(e)
+    else:
+        raise AssertionError("closed client should raise")
+
+
+def test_cancel_scope_aborts_a_stream_being_read(dial_server):
+    def handler(path, data):
+        chunks = sse_chunks(["a", "b"])
+        if len(dial_server.requests) == 1:
+            chunks.insert(2, 5.0)
+        return 200, {}, chunks
+
+    dial_server.handler = handler
+    client = DialClient(endpoint=dial_server.endpoint, deployment_name="gpt-4o", observers=[])
+    scope = CancelScope()
+    threading.Timer(0.2, scope.cancel).start()
+
+    started = time.monotonic()
+    with scope:
+        stream = client.stream_completion(MESSAGES)
+        with pytest.raises(requests.RequestException):
+            list(stream)
+        with pytest.raises(RequestCancelled):
+            client.stream_completion(MESSAGES)
+    assert time.monotonic() - started < 1.0
+
+    # connections used inside the scope are not cancelled with it afterwards
+    assert "".join(client.stream_completion(MESSAGES)) == "ab"